@@ -1,25 +1,80 @@
 import streamlit as st
 import os
+import threading
 from mistralai.client import MistralClient
 from mistralai.models.chat_completion import ChatMessage
 
+MISTRAL_MODEL = "mistral-tiny"
+MISTRAL_TIMEOUT = 30  # seconds per request
+MISTRAL_MAX_RETRIES = 3  # retries of failed requests, with backoff, done by the client
+
+# Client shared by all requests of this process, and the API key it was created with
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
 def setup_mistral():
-    """Set up the Mistral AI client with the API key from environment"""
+    """
+    Return the shared Mistral AI client for the API key from environment
+
+    The client is created once and reused, so its HTTP connections stay open
+    across requests and reruns; it is only recreated when the API key changes.
+    """
+    global _client, _client_key
     api_key = os.getenv("MISTRAL_API_KEY")
-    if api_key:
-        return MistralClient(api_key=api_key)
-    else:
+    if not api_key:
         st.warning("Mistral API key is not set. Please set the MISTRAL_API_KEY environment variable.")
         return None
+    with _client_lock:
+        if _client is None or _client_key != api_key:
+            _client = MistralClient(api_key=api_key, timeout=MISTRAL_TIMEOUT, max_retries=MISTRAL_MAX_RETRIES)
+            _client_key = api_key
+        return _client
+
+def _mistral_messages(messages):
+    return [ChatMessage(role=message["role"], content=message["content"]) for message in messages]
+
+def _complete(client, messages):
+    """Return the text of a chat completion; its length is left to the model, as before"""
+    response = client.chat(model=MISTRAL_MODEL, messages=_mistral_messages(messages))
+    return (response.choices[0].message.content or "").strip()
+
+def _stream_chat(client, messages):
+    """Yield the text deltas of a streamed chat completion"""
+    for chunk in client.chat_stream(model=MISTRAL_MODEL, messages=_mistral_messages(messages)):
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
 
 def get_explanation(algorithm, step_data, level="beginner"):
     """
     Get a detailed explanation of a specific algorithm step from Mistral
     """
     client = setup_mistral()
-    if not client:
+    if client is None:
         return "Mistral integration not available. Please set your Mistral API key."
     
+    try:
+        return _complete(client, _explanation_messages(algorithm, step_data, level))
+    except Exception as e:
+        return f"Error getting explanation: {str(e)}"
+
+def stream_explanation(algorithm, step_data, level="beginner"):
+    """
+    Stream the explanation of an algorithm step from Mistral as it is generated
+    """
+    client = setup_mistral()
+    if client is None:
+        yield "Mistral integration not available. Please set your Mistral API key."
+        return
+    
+    try:
+        yield from _stream_chat(client, _explanation_messages(algorithm, step_data, level))
+    except Exception as e:
+        yield f"Error getting explanation: {str(e)}"
+
+def _explanation_messages(algorithm, step_data, level):
+    """Build the chat messages asking for the explanation of one step"""
     # Prepare prompt based on algorithm and step
     visited = step_data.get('visited', [])
     current = step_data.get('current')
@@ -47,28 +102,40 @@ def get_explanation(algorithm, step_data, level="beginner"):
     3. How this relates to the {algorithm} algorithm principles
     """
     
-    try:
-        messages = [
-            ChatMessage(role="system", content="You are a helpful tutor explaining graph algorithms."),
-            ChatMessage(role="user", content=prompt)
-        ]
-        
-        response = client.chat(
-            model="mistral-tiny",
-            messages=messages
-        )
-        return response.messages[0].content.strip()
-    except Exception as e:
-        return f"Error getting explanation: {str(e)}"
+    return [
+        {"role": "system", "content": "You are a helpful tutor explaining graph algorithms."},
+        {"role": "user", "content": prompt}
+    ]
 
 def get_hint(question, algorithm, level="beginner"):
     """
     Get a hint for a student's question about the algorithm
     """
     client = setup_mistral()
-    if not client:
+    if client is None:
         return "Mistral integration not available. Please set your Mistral API key."
     
+    try:
+        return _complete(client, _hint_messages(question, algorithm, level))
+    except Exception as e:
+        return f"Error getting hint: {str(e)}"
+
+def stream_hint(question, algorithm, level="beginner"):
+    """
+    Stream a hint for a student's question from Mistral as it is generated
+    """
+    client = setup_mistral()
+    if client is None:
+        yield "Mistral integration not available. Please set your Mistral API key."
+        return
+    
+    try:
+        yield from _stream_chat(client, _hint_messages(question, algorithm, level))
+    except Exception as e:
+        yield f"Error getting hint: {str(e)}"
+
+def _hint_messages(question, algorithm, level):
+    """Build the chat messages asking for a hint"""
     prompt = f"""
     A {level} student learning about the {algorithm} algorithm asks:
     
@@ -78,31 +145,42 @@ def get_hint(question, algorithm, level="beginner"):
     Explain the concept in a way that's appropriate for their expertise level.
     """
     
-    try:
-        messages = [
-            ChatMessage(role="system", content="You are a helpful tutor explaining graph algorithms."),
-            ChatMessage(role="user", content=prompt)
-        ]
-        
-        response = client.chat(
-            model="mistral-tiny",
-            messages=messages
-        )
-        return response.messages[0].content.strip()
-    except Exception as e:
-        return f"Error getting hint: {str(e)}"
+    return [
+        {"role": "system", "content": "You are a helpful tutor explaining graph algorithms."},
+        {"role": "user", "content": prompt}
+    ]
 
 def get_chat_response(messages, algorithm):
     """
     Get a chat response from Mistral based on conversation history
     """
     client = setup_mistral()
-    if not client:
+    if client is None:
         return "Mistral integration not available. Please set your Mistral API key."
     
-    # Convert messages to Mistral format
+    try:
+        return _complete(client, _chat_messages(messages, algorithm))
+    except Exception as e:
+        return f"Error getting response: {str(e)}"
+
+def stream_chat_response(messages, algorithm):
+    """
+    Stream a chat response from Mistral as it is generated
+    """
+    client = setup_mistral()
+    if client is None:
+        yield "Mistral integration not available. Please set your Mistral API key."
+        return
+    
+    try:
+        yield from _stream_chat(client, _chat_messages(messages, algorithm))
+    except Exception as e:
+        yield f"Error getting response: {str(e)}"
+
+def _chat_messages(messages, algorithm):
+    """Copy the conversation history into chat messages, after the tutoring system message"""
     mistral_messages = [
-        ChatMessage(role=msg["role"], content=msg["content"])
+        {"role": msg["role"], "content": msg["content"]}
         for msg in messages
     ]
     
@@ -118,23 +196,15 @@ def get_chat_response(messages, algorithm):
     - Keep responses focused on helping the student learn {algorithm}
     """
     
-    mistral_messages.insert(0, ChatMessage(role="system", content=system_message))
-    
-    try:
-        response = client.chat(
-            model="mistral-tiny",
-            messages=mistral_messages
-        )
-        return response.messages[0].content.strip()
-    except Exception as e:
-        return f"Error getting response: {str(e)}"
+    mistral_messages.insert(0, {"role": "system", "content": system_message})
+    return mistral_messages
 
 def evaluate_answer(student_answer, correct_answer, algorithm, context=None):
     """
     Evaluate a student's answer to a question about the algorithm
     """
     client = setup_mistral()
-    if not client:
+    if client is None:
         return {"score": 0, "feedback": "Mistral integration not available. Please set your Mistral API key."}
     
     prompt = f"""
@@ -156,25 +226,22 @@ def evaluate_answer(student_answer, correct_answer, algorithm, context=None):
     
     try:
         messages = [
-            ChatMessage(role="system", content="You are a helpful tutor evaluating understanding of graph algorithms."),
-            ChatMessage(role="user", content=prompt)
+            {"role": "system", "content": "You are a helpful tutor evaluating understanding of graph algorithms."},
+            {"role": "user", "content": prompt}
         ]
         
-        response = client.chat(
-            model="mistral-tiny",
-            messages=messages
-        )
+        content = _complete(client, messages)
         
         # Parse the response as JSON
         import json
         try:
-            result = json.loads(response.messages[0].content.strip())
+            result = json.loads(content)
             return result
         except:
             # Fallback if response is not valid JSON
             return {
                 "score": 50,
-                "feedback": response.messages[0].content.strip(),
+                "feedback": content,
                 "misconceptions": "Unable to parse specific misconceptions."
             }
             
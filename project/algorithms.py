@@ -1,52 +1,73 @@
+import heapq
+import itertools
+import os
 import networkx as nx
 import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-def dfs_algorithm(G, start_node):
+from traces import StepTrace, WeightedStepTrace, START, SKIP, VISIT, PUSH, DONE
+from graph_index import CSRGraph, MappedCSRGraph, cached_csr, level_bfs
+from path_index import get_path_index
+
+def dfs_algorithm(G, start_node, compact=False):
     """
     Perform Depth-First Search on a graph and record each step
     
     Parameters:
-    - G: NetworkX graph
+    - G: NetworkX graph or CSRGraph
     - start_node: Starting node for the traversal
+    - compact: If True, return a StepTrace that stores each step as a small
+      event and rebuilds the step dictionaries on demand
     
     Returns:
-    - List of steps, where each step contains:
+    - List of steps (or an equivalent StepTrace), where each step contains:
       - visited: List of visited nodes
       - current: Current node being processed
       - stack: Current state of the stack
       - edges: Edges traversed in this step
       - explanation: Text explanation of this step
     """
-    steps = []
-    visited = []
+    trace = dfs_trace(G, start_node)
+    return trace.complete() if compact else list(trace)
+
+def dfs_trace(G, start_node):
+    """
+    Start a lazy Depth-First Search
+    
+    Steps are only computed when they are requested, so trace[0] is
+    available immediately even on very large graphs.
+    
+    Parameters:
+    - G: NetworkX graph or CSRGraph
+    - start_node: Starting node for the traversal
+    
+    Returns:
+    - StepTrace filled on demand with the same steps as dfs_algorithm
+    """
+    return StepTrace("DFS", _dfs_events(G, start_node))
+
+def _dfs_events(G, start_node):
+    """Generate the (kind, node, payload) events of a Depth-First Search"""
+    visited = set()
     stack = [start_node]
+    on_stack = {start_node}  # Mirrors stack for O(1) membership tests
     
     # Initial step
-    steps.append({
-        'visited': [],
-        'current': None,
-        'stack': stack.copy(),
-        'edges': [],
-        'explanation': f"Starting DFS from node {start_node}. Initialize with an empty visited set and add node {start_node} to the stack."
-    })
+    yield (START, start_node, None)
     
     while stack:
         # Get the next node from stack
         current = stack.pop()
+        on_stack.discard(current)
         
         # Skip if already visited
         if current in visited:
-            steps.append({
-                'visited': visited.copy(),
-                'current': current,
-                'stack': stack.copy(),
-                'edges': [],
-                'explanation': f"Node {current} has already been visited, so we skip it and move to the next node in the stack."
-            })
+            yield (SKIP, current, None)
             continue
         
         # Mark as visited
-        visited.append(current)
+        visited.add(current)
         
         # Find neighbors
         neighbors = list(G.neighbors(current))
@@ -54,87 +75,80 @@ def dfs_algorithm(G, start_node):
         # Sort neighbors to ensure consistent behavior
         neighbors.sort(reverse=True)  # Reverse to simulate traditional DFS behavior with stack
         
-        steps.append({
-            'visited': visited.copy(),
-            'current': current,
-            'stack': stack.copy(),
-            'edges': [],
-            'explanation': f"Visit node {current} and mark it as visited. Examine its neighbors: {neighbors}."
-        })
+        yield (VISIT, current, neighbors)
         
         # Push neighbors to stack
-        edges_added = []
+        pushed = []
         for neighbor in neighbors:
-            if neighbor not in visited and neighbor not in stack:
+            if neighbor not in visited and neighbor not in on_stack:
                 stack.append(neighbor)
-                edges_added.append((current, neighbor))
+                on_stack.add(neighbor)
+                pushed.append(neighbor)
         
-        if edges_added:
-            steps.append({
-                'visited': visited.copy(),
-                'current': current,
-                'stack': stack.copy(),
-                'edges': edges_added,
-                'explanation': f"Add unvisited neighbors {[n for _, n in edges_added]} to the stack for later processing."
-            })
+        if pushed:
+            yield (PUSH, current, pushed)
     
     # Final step
-    steps.append({
-        'visited': visited.copy(),
-        'current': None,
-        'stack': [],
-        'edges': [],
-        'explanation': f"DFS complete. All reachable nodes have been visited in this order: {visited}."
-    })
-    
-    return steps
+    yield (DONE, None, None)
 
-def bfs_algorithm(G, start_node):
+def bfs_algorithm(G, start_node, compact=False):
     """
     Perform Breadth-First Search on a graph and record each step
     
     Parameters:
-    - G: NetworkX graph
+    - G: NetworkX graph or CSRGraph
     - start_node: Starting node for the traversal
+    - compact: If True, return a StepTrace that stores each step as a small
+      event and rebuilds the step dictionaries on demand
     
     Returns:
-    - List of steps, where each step contains:
+    - List of steps (or an equivalent StepTrace), where each step contains:
       - visited: List of visited nodes
       - current: Current node being processed
       - queue: Current state of the queue
       - edges: Edges traversed in this step
       - explanation: Text explanation of this step
     """
-    steps = []
-    visited = []
-    queue = [start_node]
+    trace = bfs_trace(G, start_node)
+    return trace.complete() if compact else list(trace)
+
+def bfs_trace(G, start_node):
+    """
+    Start a lazy Breadth-First Search
+    
+    Steps are only computed when they are requested, so trace[0] is
+    available immediately even on very large graphs.
+    
+    Parameters:
+    - G: NetworkX graph or CSRGraph
+    - start_node: Starting node for the traversal
+    
+    Returns:
+    - StepTrace filled on demand with the same steps as bfs_algorithm
+    """
+    return StepTrace("BFS", _bfs_events(G, start_node))
+
+def _bfs_events(G, start_node):
+    """Generate the (kind, node, payload) events of a Breadth-First Search"""
+    visited = set()
+    queue = deque([start_node])
+    in_queue = {start_node}  # Mirrors queue for O(1) membership tests
     
     # Initial step
-    steps.append({
-        'visited': [],
-        'current': None,
-        'queue': queue.copy(),
-        'edges': [],
-        'explanation': f"Starting BFS from node {start_node}. Initialize with an empty visited set and add node {start_node} to the queue."
-    })
+    yield (START, start_node, None)
     
     while queue:
         # Get the next node from queue
-        current = queue.pop(0)
+        current = queue.popleft()
+        in_queue.discard(current)
         
         # Skip if already visited
         if current in visited:
-            steps.append({
-                'visited': visited.copy(),
-                'current': current,
-                'queue': queue.copy(),
-                'edges': [],
-                'explanation': f"Node {current} has already been visited, so we skip it and move to the next node in the queue."
-            })
+            yield (SKIP, current, None)
             continue
         
         # Mark as visited
-        visited.append(current)
+        visited.add(current)
         
         # Find neighbors
         neighbors = list(G.neighbors(current))
@@ -142,48 +156,477 @@ def bfs_algorithm(G, start_node):
         # Sort neighbors to ensure consistent behavior
         neighbors.sort()
         
-        steps.append({
-            'visited': visited.copy(),
-            'current': current,
-            'queue': queue.copy(),
-            'edges': [],
-            'explanation': f"Visit node {current} and mark it as visited. Examine its neighbors: {neighbors}."
-        })
+        yield (VISIT, current, neighbors)
         
         # Add neighbors to queue
-        edges_added = []
+        pushed = []
         for neighbor in neighbors:
-            if neighbor not in visited and neighbor not in queue:
+            if neighbor not in visited and neighbor not in in_queue:
                 queue.append(neighbor)
-                edges_added.append((current, neighbor))
+                in_queue.add(neighbor)
+                pushed.append(neighbor)
+        
+        if pushed:
+            yield (PUSH, current, pushed)
+    
+    # Final step
+    yield (DONE, None, None)
+
+def bfs_levels(G, start_node):
+    """
+    Level-synchronous Breadth-First Search for large graphs
+    
+    Instead of recording every node, the whole frontier is expanded at once
+    with NumPy operations on the CSR arrays, one level per iteration. This is
+    meant for analytics on big graphs where only distances and parents matter.
+    
+    Parameters:
+    - G: NetworkX graph or CSRGraph
+    - start_node: Starting node for the traversal
+    
+    Returns:
+    - Dictionary with:
+      - nodes: Node ids, in the index order used by the arrays
+      - distance: NumPy array of hop counts from start_node (-1 if unreachable)
+      - parent: NumPy array of parent indices in the BFS tree (-1 for the start and unreachable nodes)
+      - steps: One summary step per level, with level, frontier_size,
+        visited_count, edges_scanned and explanation
+    """
+    csr = cached_csr(G)
+    distance, parent, levels = level_bfs(csr.indptr, csr.indices, csr.index_of(start_node))
+    
+    steps = []
+    visited_count = 1
+    for level, (frontier_size, edges_scanned, discovered) in enumerate(levels):
+        steps.append({
+            'level': level,
+            'frontier_size': frontier_size,
+            'visited_count': visited_count,
+            'edges_scanned': edges_scanned,
+            'explanation': f"Level {level}: expand {frontier_size} frontier nodes across {edges_scanned} edges, "
+                           f"discovering {discovered} new nodes at distance {level + 1}."
+        })
+        visited_count += discovered
+    
+    return {
+        'nodes': csr.node_ids,
+        'distance': distance,
+        'parent': parent,
+        'steps': steps
+    }
+
+def dijkstra_algorithm(G, start_node, weight="weight", record_steps=True, compact=False):
+    """
+    Perform Dijkstra's algorithm with a binary heap and record each step
+    
+    Parameters:
+    - G: NetworkX graph, or CSRGraph built with to_csr(G, weight=...)
+    - start_node: Starting node for the search
+    - weight: Edge attribute holding the (non-negative) weight, 1 when missing
+    - record_steps: If False, skip step recording and only return distances,
+      which keeps the run O((V + E) log V) on very large graphs
+    - compact: If True, return a WeightedStepTrace that stores each step as a
+      small event and rebuilds the step dictionaries on demand
+    
+    Returns:
+    - List of steps in the bfs_algorithm format (or an equivalent
+      WeightedStepTrace), where queue holds the priority queue in pop order
+      and each step also has distances, or, without record_steps, a
+      dictionary with distance and parent maps
+    """
+    if record_steps:
+        trace = dijkstra_trace(G, start_node, weight)
+        return trace.complete() if compact else list(trace)
+    return _distances_from_events(start_node, _dijkstra_events(G, start_node, weight))
+
+def dijkstra_trace(G, start_node, weight="weight"):
+    """
+    Start a lazy run of Dijkstra's algorithm
+    
+    Returns:
+    - WeightedStepTrace filled on demand with the same steps as dijkstra_algorithm
+    """
+    return WeightedStepTrace("Dijkstra", _dijkstra_events(G, start_node, weight))
+
+def _dijkstra_events(G, start_node, weight):
+    """Generate the (kind, node, payload) events of Dijkstra's algorithm"""
+    distances = {start_node: 0}
+    settled = set()
+    order = itertools.count()
+    heap = [(0, next(order), start_node)]
+    
+    # Initial step
+    yield (START, start_node, None)
+    
+    while heap:
+        # Get the closest node from the priority queue
+        distance, _, current = heapq.heappop(heap)
+        
+        # Skip entries made outdated by a later, shorter distance
+        if current in settled:
+            yield (SKIP, current, None)
+            continue
+        
+        # Settle the node: no shorter path to it can exist
+        settled.add(current)
+        neighbors = _weighted_neighbors(G, current, weight)
+        
+        yield (VISIT, current, neighbors)
+        
+        # Relax outgoing edges
+        relaxed = []
+        for neighbor, edge_weight in neighbors:
+            if edge_weight < 0:
+                raise ValueError(f"Dijkstra's algorithm needs non-negative weights, got {edge_weight} on edge ({current}, {neighbor})")
+            new_distance = distance + edge_weight
+            if neighbor not in settled and new_distance < distances.get(neighbor, float("inf")):
+                distances[neighbor] = new_distance
+                heapq.heappush(heap, (new_distance, next(order), neighbor))
+                relaxed.append((neighbor, new_distance, edge_weight))
+        
+        if relaxed:
+            yield (PUSH, current, relaxed)
+    
+    # Final step
+    yield (DONE, None, None)
+
+def zero_one_bfs_algorithm(G, start_node, weight="weight", record_steps=True, compact=False):
+    """
+    Perform 0-1 BFS with a deque and record each step
+    
+    For edge weights of 0 or 1 a deque replaces Dijkstra's heap: a node
+    reached through a 0-weight edge goes to the front, through a 1-weight
+    edge to the back, so the deque always stays sorted by distance.
+    
+    Parameters:
+    - G: NetworkX graph, or CSRGraph built with to_csr(G, weight=...)
+    - start_node: Starting node for the search
+    - weight: Edge attribute holding the weight (0 or 1), 1 when missing
+    - record_steps: If False, skip step recording and only return distances
+    - compact: If True, return a WeightedStepTrace that stores each step as a
+      small event and rebuilds the step dictionaries on demand
+    
+    Returns:
+    - List of steps in the bfs_algorithm format (queue holds the deque, and
+      each step also has distances), or an equivalent WeightedStepTrace, or,
+      without record_steps, a dictionary with distance and parent maps
+    """
+    if record_steps:
+        trace = zero_one_bfs_trace(G, start_node, weight)
+        return trace.complete() if compact else list(trace)
+    return _distances_from_events(start_node, _zero_one_bfs_events(G, start_node, weight))
+
+def zero_one_bfs_trace(G, start_node, weight="weight"):
+    """
+    Start a lazy 0-1 BFS
+    
+    Returns:
+    - WeightedStepTrace filled on demand with the same steps as zero_one_bfs_algorithm
+    """
+    return WeightedStepTrace("0-1 BFS", _zero_one_bfs_events(G, start_node, weight))
+
+def _zero_one_bfs_events(G, start_node, weight):
+    """Generate the (kind, node, payload) events of a 0-1 BFS"""
+    distances = {start_node: 0}
+    settled = set()
+    queue = deque([start_node])
+    
+    # Initial step
+    yield (START, start_node, None)
+    
+    while queue:
+        # Get the next node from the front of the deque
+        current = queue.popleft()
+        
+        # A node can sit in the deque twice; only the first pop counts
+        if current in settled:
+            yield (SKIP, current, None)
+            continue
         
-        if edges_added:
+        settled.add(current)
+        neighbors = _weighted_neighbors(G, current, weight)
+        
+        yield (VISIT, current, neighbors)
+        
+        # Relax outgoing edges, 0-weight to the front and 1-weight to the back
+        relaxed = []
+        for neighbor, edge_weight in neighbors:
+            if edge_weight not in (0, 1):
+                raise ValueError(f"0-1 BFS needs edge weights of 0 or 1, got {edge_weight} on edge ({current}, {neighbor})")
+            new_distance = distances[current] + edge_weight
+            if neighbor not in settled and new_distance < distances.get(neighbor, float("inf")):
+                distances[neighbor] = new_distance
+                if edge_weight == 0:
+                    queue.appendleft(neighbor)
+                else:
+                    queue.append(neighbor)
+                relaxed.append((neighbor, new_distance, edge_weight))
+        
+        if relaxed:
+            yield (PUSH, current, relaxed)
+    
+    # Final step
+    yield (DONE, None, None)
+
+def _distances_from_events(start_node, events):
+    """Run a weighted search to the end and collect its final distance and parent maps"""
+    distances = {start_node: 0}
+    parents = {start_node: None}
+    for kind, current, payload in events:
+        if kind == PUSH:
+            for neighbor, distance, _ in payload:
+                distances[neighbor] = distance
+                parents[neighbor] = current
+    return {'distance': distances, 'parent': parents}
+
+def _weighted_neighbors(G, node, weight):
+    """Return (neighbor, weight) pairs sorted by neighbor, for NetworkX graphs and CSRGraphs"""
+    if isinstance(G, CSRGraph):
+        pairs = G.weighted_neighbors(node)
+    else:
+        pairs = [(neighbor, data.get(weight, 1)) for neighbor, data in G[node].items()]
+    pairs.sort(key=lambda pair: pair[0])
+    return pairs
+
+def calculate_shortest_path(G, start_node, end_node):
+    """
+    Calculate the shortest path between two nodes
+    
+    Queries go through the graph's ShortestPathIndex, so repeated queries
+    from the same source reuse a cached BFS tree until the graph is edited.
+    
+    Parameters:
+    - G: NetworkX graph or CSRGraph
+    - start_node: First node of the path
+    - end_node: Last node of the path
+    
+    Returns:
+    - List of nodes on a shortest path, or None if there is no path
+    """
+    return get_path_index(G).shortest_path(start_node, end_node)
+
+def batch_shortest_paths(G, pairs=None, sources=None, output="paths", processes=None):
+    """
+    Answer many shortest-path queries with one BFS per source
+    
+    Pairs are grouped by source, and each source is searched once with the
+    vectorized level-synchronous BFS. Sources are spread over a process pool.
+    
+    Parameters:
+    - G: NetworkX graph or CSRGraph
+    - pairs: List of (source, target) pairs
+    - sources: List of source nodes, used when pairs is not given
+    - output: "paths" or "matrix"
+    - processes: Number of worker processes (default: one per CPU, 1 runs in-process)
+    
+    Returns:
+    - For "paths": dictionary mapping (source, target) to the node path, or None
+      if there is no path. When only sources are given, every node is a target.
+    - For "matrix": dictionary with sources, targets and a distance matrix
+      (NumPy array, -1 where there is no path)
+    """
+    if output not in ("paths", "matrix"):
+        raise ValueError(f"Unknown output format: {output}")
+    
+    csr = cached_csr(G)
+    
+    # Group the requested targets by source
+    if pairs is not None:
+        targets_by_source = {}
+        for source, target in pairs:
+            targets_by_source.setdefault(source, []).append(target)
+        target_nodes = list(dict.fromkeys(target for _, target in pairs))
+        target_indices = np.array([csr.index_of(target) for target in target_nodes], dtype=np.int64)
+    else:
+        targets_by_source = {source: None for source in sources}
+        target_nodes = csr.nodes()
+        target_indices = np.arange(csr.number_of_nodes(), dtype=np.int64)
+    
+    # Targets are translated once and handed to every worker up front, so a
+    # task only carries its source and, for pairs, positions of its own targets
+    if output == "paths" and pairs is not None:
+        position = {target: i for i, target in enumerate(target_nodes)}
+    tasks = []
+    for source, targets in targets_by_source.items():
+        selection = None
+        if output == "paths" and targets is not None:
+            selection = np.array([position[target] for target in targets], dtype=np.int64)
+        tasks.append((csr.index_of(source), selection, output == "paths"))
+    
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    
+    if processes <= 1:
+        _init_batch_worker(csr.indptr, csr.indices, target_indices)
+        try:
+            results = [_batch_worker_task(task) for task in tasks]
+        finally:
+            _init_batch_worker(None, None, None)
+    else:
+        # Workers reopen a memory-mapped store themselves and share its pages
+        if isinstance(csr, MappedCSRGraph):
+            initargs = (csr.path, None, target_indices)
+        else:
+            initargs = (csr.indptr, csr.indices, target_indices)
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_batch_worker,
+                                 initargs=initargs) as executor:
+            chunksize = max(1, len(tasks) // (4 * processes))
+            results = list(executor.map(_batch_worker_task, tasks, chunksize=chunksize))
+    
+    if output == "matrix":
+        return {
+            'sources': list(targets_by_source),
+            'targets': target_nodes,
+            'distance': np.vstack(results) if results else np.empty((0, len(target_nodes)), dtype=np.int64)
+        }
+    
+    paths = {}
+    for (source, targets), source_paths in zip(targets_by_source.items(), results):
+        for target, path in zip(target_nodes if targets is None else targets, source_paths):
+            paths[(source, target)] = csr.to_nodes(path) if path is not None else None
+    return paths
+
+# CSR arrays and target indices shared by the tasks of one batch worker process
+_batch_arrays = None
+
+def _init_batch_worker(indptr, indices, targets):
+    """Store the CSR arrays and targets once per worker instead of once per task; a path opens a graph store"""
+    global _batch_arrays
+    if isinstance(indptr, str):
+        store = MappedCSRGraph(indptr)
+        indptr, indices = store.indptr, store.indices
+    _batch_arrays = (indptr, indices, targets) if indptr is not None else None
+
+def _batch_worker_task(task):
+    """Run one BFS and return either index paths or a row of distances"""
+    source, selection, want_paths = task
+    indptr, indices, targets = _batch_arrays
+    if selection is not None:
+        targets = targets[selection]
+    distance, parent, _ = level_bfs(indptr, indices, source)
+    
+    if not want_paths:
+        return distance[targets]
+    
+    paths = []
+    for target in targets.tolist():
+        if distance[target] == -1:
+            paths.append(None)
+            continue
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        path.reverse()
+        paths.append(path)
+    return paths
+
+def bidirectional_shortest_path(G, start_node, end_node, record_steps=False):
+    """
+    Find a shortest path by growing BFS frontiers from both ends
+    
+    Each round expands one whole level of the smaller frontier, and the
+    search stops at the first level where the two searches meet. On large
+    sparse graphs this explores far fewer nodes than a full BFS.
+    
+    Parameters:
+    - G: NetworkX graph or CSRGraph
+    - start_node: First node of the path
+    - end_node: Last node of the path
+    - record_steps: If True, also return steps in the bfs_algorithm format
+      for the forward search, with direction, visited_backward and
+      queue_backward describing the backward search
+    
+    Returns:
+    - List of nodes on a shortest path (None if there is no path), or a
+      (path, steps) tuple when record_steps is True
+    """
+    for node in (start_node, end_node):
+        if node not in G:
+            raise nx.NodeNotFound(f"Node {node} not in graph")
+    
+    # The backward search follows edges in reverse on directed graphs
+    expand = {
+        'forward': G.neighbors,
+        'backward': G.predecessors if G.is_directed() else G.neighbors
+    }
+    distances = {'forward': {start_node: 0}, 'backward': {end_node: 0}}
+    parents = {'forward': {start_node: None}, 'backward': {end_node: None}}
+    queues = {'forward': deque([start_node]), 'backward': deque([end_node])}
+    visited = {'forward': [], 'backward': []}
+    steps = []
+    
+    def record_step(direction, current, edges, explanation):
+        if record_steps:
             steps.append({
-                'visited': visited.copy(),
+                'visited': visited['forward'].copy(),
                 'current': current,
-                'queue': queue.copy(),
-                'edges': edges_added,
-                'explanation': f"Add unvisited neighbors {[n for _, n in edges_added]} to the queue for later processing."
+                'queue': list(queues['forward']),
+                'edges': edges,
+                'direction': direction,
+                'visited_backward': visited['backward'].copy(),
+                'queue_backward': list(queues['backward']),
+                'explanation': explanation
             })
     
+    # Initial step
+    record_step(None, None, [], f"Starting bidirectional BFS: a forward search from node {start_node} and a backward search from node {end_node}.")
+    
+    # (path length, forward-side node, backward-side node) of the best meeting edge
+    meeting = (0, start_node, start_node) if start_node == end_node else None
+    
+    while meeting is None and queues['forward'] and queues['backward']:
+        # Expand one whole level of the smaller frontier (the less explored side on ties)
+        sizes = {side: (len(queues[side]), len(visited[side])) for side in queues}
+        direction = 'forward' if sizes['forward'] <= sizes['backward'] else 'backward'
+        other = 'backward' if direction == 'forward' else 'forward'
+        queue, distance, parent = queues[direction], distances[direction], parents[direction]
+        
+        for _ in range(len(queue)):
+            current = queue.popleft()
+            visited[direction].append(current)
+            neighbors = sorted(expand[direction](current))
+            
+            reached = []
+            for neighbor in neighbors:
+                if neighbor not in distance:
+                    distance[neighbor] = distance[current] + 1
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+                    reached.append(neighbor)
+                
+                # Reaching a node the other search has seen joins the two halves
+                if neighbor in distances[other]:
+                    length = distance[current] + 1 + distances[other][neighbor]
+                    ends = (current, neighbor) if direction == 'forward' else (neighbor, current)
+                    if meeting is None or length < meeting[0]:
+                        meeting = (length,) + ends
+            
+            edges_added = [(current, n) if direction == 'forward' else (n, current) for n in reached]
+            record_step(direction, current, edges_added, f"Expand node {current} in the {direction} search (distance {distance[current]} from node {start_node if direction == 'forward' else end_node}). Newly reached: {reached}.")
+    
+    explored = len(distances['forward'].keys() | distances['backward'].keys())
+    if meeting is None:
+        record_step(None, None, [], f"One of the searches ran out of nodes before they met, so there is no path from node {start_node} to node {end_node}. Explored {explored} nodes.")
+        return (None, steps) if record_steps else None
+    
+    # Join the forward half (start to meeting) with the backward half (meeting to end)
+    _, forward_end, backward_start = meeting
+    path = [forward_end]
+    while parents['forward'][path[-1]] is not None:
+        path.append(parents['forward'][path[-1]])
+    path.reverse()
+    node = backward_start
+    if node != forward_end:
+        path.append(node)
+    while parents['backward'][node] is not None:
+        node = parents['backward'][node]
+        path.append(node)
+    
     # Final step
-    steps.append({
-        'visited': visited.copy(),
-        'current': None,
-        'queue': [],
-        'edges': [],
-        'explanation': f"BFS complete. All reachable nodes have been visited in this order: {visited}."
-    })
+    record_step(None, None, [(forward_end, backward_start)] if forward_end != backward_start else [], f"The searches met between nodes {forward_end} and {backward_start}. Shortest path: {path} with length {len(path) - 1}, found after exploring {explored} nodes.")
     
-    return steps
-
-def calculate_shortest_path(G, start_node, end_node):
-    """Calculate the shortest path between two nodes"""
-    try:
-        path = nx.shortest_path(G, source=start_node, target=end_node)
-        return path
-    except nx.NetworkXNoPath:
-        return None
+    return (path, steps) if record_steps else path
 
 def get_algorithm_properties():
     """
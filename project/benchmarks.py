@@ -0,0 +1,222 @@
+"""
+Benchmarks for the graph algorithms
+
+Run from the project directory:
+
+    python benchmarks.py traversal
+"""
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import networkx as nx
+import numpy as np
+
+from algorithms import (dfs_trace, bfs_trace, bfs_levels, batch_shortest_paths, dijkstra_algorithm,
+                        zero_one_bfs_algorithm, bidirectional_shortest_path)
+from graph_index import CSRGraph, cached_csr, level_bfs
+from graph_io import open_graph_store, read_npz, write_graph_store, write_npz
+from graph_utils import get_graph_layout, get_node_colors, visualize_graph
+from layout import force_directed_layout
+from renderer import StepRenderer
+
+
+def random_graph_with_edges(num_edges, average_degree=8, seed=42):
+    """Create a sparse random graph with roughly num_edges edges"""
+    num_nodes = max(2, 2 * num_edges // average_degree)
+    return nx.gnm_random_graph(num_nodes, num_edges, seed=seed)
+
+
+def random_csr_with_edges(num_edges, average_degree=8, seed=42, max_weight=None):
+    """
+    Build a random undirected CSRGraph directly from NumPy arrays
+
+    Skips NetworkX entirely so graphs with tens of millions of edges fit in
+    memory. Duplicate edges are kept; they do not change traversal results.
+    With max_weight, edges get random integer weights in [0, max_weight].
+    """
+    rng = np.random.default_rng(seed)
+    num_nodes = max(2, 2 * num_edges // average_degree)
+    src = rng.integers(0, num_nodes, num_edges)
+    dst = rng.integers(0, num_nodes, num_edges)
+    rows = np.concatenate([src, dst])
+    cols = np.concatenate([dst, src])
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+
+    weights = None
+    if max_weight is not None:
+        edge_weights = rng.integers(0, max_weight + 1, num_edges)
+        weights = np.concatenate([edge_weights, edge_weights])[order]
+    return CSRGraph(indptr, cols[order], list(range(num_nodes)), weights=weights)
+
+
+def time_call(function):
+    """Return the wall-clock seconds taken by one call"""
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def bench_traversal(edge_counts=(1_000, 10_000, 100_000, 1_000_000)):
+    """
+    Time full DFS and BFS step recording for growing graph sizes
+
+    With set membership and a deque frontier the time per edge should stay
+    roughly constant from 1k to 1M edges.
+    """
+    print(f"{'edges':>10} {'nodes':>10} {'DFS (s)':>10} {'BFS (s)':>10} {'DFS us/edge':>12} {'BFS us/edge':>12}")
+    for num_edges in edge_counts:
+        G = random_graph_with_edges(num_edges)
+        dfs_time = time_call(lambda: dfs_trace(G, 0).complete())
+        bfs_time = time_call(lambda: bfs_trace(G, 0).complete())
+        print(f"{num_edges:>10} {G.number_of_nodes():>10} {dfs_time:>10.3f} {bfs_time:>10.3f} "
+              f"{dfs_time / num_edges * 1e6:>12.2f} {bfs_time / num_edges * 1e6:>12.2f}")
+
+
+def bench_levels(edge_counts=(100_000, 1_000_000, 10_000_000)):
+    """Time the vectorized level-synchronous BFS on prebuilt CSR graphs"""
+    print(f"{'edges':>10} {'nodes':>10} {'levels':>8} {'BFS levels (s)':>15}")
+    for num_edges in edge_counts:
+        csr = random_csr_with_edges(num_edges)
+        result = {}
+        elapsed = time_call(lambda: result.update(bfs_levels(csr, 0)))
+        print(f"{num_edges:>10} {csr.number_of_nodes():>10} {len(result['steps']):>8} {elapsed:>15.3f}")
+
+
+def bench_batch(num_edges=1_000_000, num_sources=64):
+    """Time batched distance queries with a growing number of worker processes"""
+    csr = random_csr_with_edges(num_edges)
+    sources = list(range(num_sources))
+    print(f"{num_sources} sources on {num_edges} edges, {os.cpu_count()} CPUs")
+    print(f"{'processes':>10} {'seconds':>10}")
+    process_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for processes in process_counts:
+        elapsed = time_call(lambda: batch_shortest_paths(csr, sources=sources, output="matrix", processes=processes))
+        print(f"{processes:>10} {elapsed:>10.3f}")
+
+
+def bench_weighted(edge_counts=(100_000, 1_000_000, 4_000_000)):
+    """Time heap-based Dijkstra (weights 0-9) and 0-1 BFS (weights 0-1) without step recording"""
+    print(f"{'edges':>10} {'Dijkstra (s)':>13} {'0-1 BFS (s)':>12}")
+    for num_edges in edge_counts:
+        csr = random_csr_with_edges(num_edges, max_weight=9)
+        dijkstra_time = time_call(lambda: dijkstra_algorithm(csr, 0, record_steps=False))
+        csr = random_csr_with_edges(num_edges, max_weight=1)
+        zero_one_time = time_call(lambda: zero_one_bfs_algorithm(csr, 0, record_steps=False))
+        print(f"{num_edges:>10} {dijkstra_time:>13.3f} {zero_one_time:>12.3f}")
+
+
+def bench_bidirectional(num_edges=1_000_000, num_queries=20, seed=7):
+    """Compare point-to-point queries: bidirectional BFS against a plain BFS from the source"""
+    csr = random_csr_with_edges(num_edges)
+    rng = np.random.default_rng(seed)
+    pairs = rng.integers(0, csr.number_of_nodes(), (num_queries, 2)).tolist()
+    bidirectional_time = time_call(lambda: [bidirectional_shortest_path(csr, s, t) for s, t in pairs])
+    bfs_time = time_call(lambda: [bfs_levels(csr, s) for s, _ in pairs])
+    print(f"{num_queries} queries on {num_edges} edges")
+    print(f"bidirectional BFS: {bidirectional_time / num_queries * 1e3:.2f} ms/query")
+    print(f"full BFS:          {bfs_time / num_queries * 1e3:.2f} ms/query")
+
+
+def layout_stress(G, pos, num_sources=20, seed=0):
+    """
+    Normalized stress of a layout on pairs from a few sampled sources
+
+    Compares Euclidean distances with hop distances after the best uniform
+    scaling; 0 is a perfect match and lower is better.
+    """
+    csr = cached_csr(G)
+    coords = np.array([pos[node] for node in csr.nodes()])
+    rng = np.random.default_rng(seed)
+    hops, euclid = [], []
+    for source in rng.choice(csr.number_of_nodes(), num_sources, replace=False):
+        distance, _, _ = level_bfs(csr.indptr, csr.indices, source)
+        reached = distance > 0
+        hops.append(distance[reached])
+        euclid.append(np.hypot(*(coords[reached] - coords[source]).T))
+    hops, euclid = np.concatenate(hops).astype(float), np.concatenate(euclid)
+    scale = (hops * euclid).sum() / (euclid * euclid).sum()
+    return float(((scale * euclid - hops) ** 2).sum() / (hops * hops).sum())
+
+
+def bench_layout(node_counts=(500, 2_000, 10_000, 100_000), spring_limit=2_000):
+    """Compare runtime and stress of force_directed_layout against nx.spring_layout"""
+    print(f"{'nodes':>8} {'edges':>8} {'spring (s)':>11} {'spring stress':>14} {'engine (s)':>11} {'engine stress':>14}")
+    for num_nodes in node_counts:
+        G = nx.convert_node_labels_to_integers(nx.random_geometric_graph(num_nodes, np.sqrt(6 / (np.pi * num_nodes)), seed=1))
+        G = G.subgraph(max(nx.connected_components(G), key=len)).copy()
+        spring_time, spring_stress = float("nan"), float("nan")
+        if num_nodes <= spring_limit:
+            pos = {}
+            spring_time = time_call(lambda: pos.update(nx.spring_layout(G, seed=42)))
+            spring_stress = layout_stress(G, pos)
+        pos = {}
+        engine_time = time_call(lambda: pos.update(force_directed_layout(G, seed=42)))
+        print(f"{G.number_of_nodes():>8} {G.number_of_edges():>8} {spring_time:>11.2f} {spring_stress:>14.3f} "
+              f"{engine_time:>11.2f} {layout_stress(G, pos):>14.3f}")
+
+
+def bench_render(node_counts=(20, 200, 1_000), num_frames=20):
+    """Compare frames per second of visualize_graph against a reused StepRenderer over a BFS trace"""
+    import matplotlib.pyplot as plt
+
+    print(f"{'nodes':>8} {'edges':>8} {'visualize_graph fps':>20} {'StepRenderer fps':>17}")
+    for num_nodes in node_counts:
+        G = nx.gnm_random_graph(num_nodes, 3 * num_nodes, seed=42)
+        pos = get_graph_layout(G)
+        steps = bfs_trace(G, 0)[:num_frames]
+        frames = [(get_node_colors(G, step['visited'], step['current']), step['edges']) for step in steps]
+
+        def replot():
+            for colors, edges in frames:
+                fig = visualize_graph(G, node_colors=colors, highlighted_edges=edges, pos=pos)
+                fig.savefig(BytesIO(), format='png')
+                plt.close()
+
+        renderer = StepRenderer(G, pos)
+        replot_time = time_call(replot)
+        reuse_time = time_call(lambda: [renderer.render(colors, edges) for colors, edges in frames])
+        print(f"{num_nodes:>8} {G.number_of_edges():>8} {len(frames) / replot_time:>20.1f} "
+              f"{len(frames) / reuse_time:>17.1f}")
+
+
+def bench_store(num_edges=20_000_000, num_steps=10_000):
+    """Compare loading a .npz file into memory against opening a memory-mapped graph store"""
+    csr = random_csr_with_edges(num_edges)
+    with tempfile.TemporaryDirectory() as directory:
+        npz_path, store_path = os.path.join(directory, "graph.npz"), os.path.join(directory, "store")
+        write_npz(csr, npz_path)
+        write_graph_store(csr, store_path)
+        print(f"{num_edges} edges, first {num_steps} BFS steps and a full level BFS")
+        print(f"{'graph':>8} {'open (s)':>10} {'steps (s)':>10} {'levels (s)':>11}")
+        for name, load in (("npz", lambda: read_npz(npz_path)), ("store", lambda: open_graph_store(store_path))):
+            start = time.perf_counter()
+            graph = load()
+            open_time = time.perf_counter() - start
+            steps_time = time_call(lambda: bfs_trace(graph, 0).extend_to(num_steps))
+            levels_time = time_call(lambda: bfs_levels(graph, 0))
+            print(f"{name:>8} {open_time:>10.3f} {steps_time:>10.3f} {levels_time:>11.3f}")
+            del graph
+
+
+BENCHMARKS = {
+    "traversal": bench_traversal,
+    "levels": bench_levels,
+    "batch": bench_batch,
+    "weighted": bench_weighted,
+    "bidirectional": bench_bidirectional,
+    "layout": bench_layout,
+    "render": bench_render,
+    "store": bench_store,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
@@ -0,0 +1,253 @@
+"""
+BFS distances that are kept up to date while the graph is edited.
+
+Recomputing a BFS after every click in the Graph Editor is wasteful on large
+graphs: adding or removing one edge usually changes the distances of a small
+region only. DynamicBFS listens to the graph_utils edit helpers and repairs
+just that region.
+"""
+import heapq
+import itertools
+import weakref
+from collections import deque
+
+from graph_index import add_graph_listener, graph_version
+
+# Per-graph {source: DynamicBFS}, kept in sync through a graph listener
+_dynamic_searches = weakref.WeakKeyDictionary()
+
+
+class DynamicBFS:
+    """
+    Single-source BFS distances and parents under graph edits
+
+    - Adding an edge only propagates from the endpoint whose distance improved
+    - Removing a BFS tree edge first tries to re-attach the cut-off node to
+      another parent at the same distance; otherwise only the cut-off subtree
+      is recomputed, seeded from its neighbors outside the subtree
+    - Removing a non-tree edge, or adding a node, changes nothing
+
+    The graph is passed to every update instead of being stored, so the
+    search does not keep the graph alive.
+    """
+
+    def __init__(self, G, source):
+        self.source = source
+        self.directed = G.is_directed()
+        self.rebuild(G)
+
+    # Queries
+
+    def distance_to(self, node):
+        """Return the hop distance from the source to node, or None if unreachable"""
+        return self.distance.get(node)
+
+    def reached(self):
+        """Return the number of nodes reachable from the source, the source included"""
+        return len(self.distance)
+
+    def path_to(self, node):
+        """Return the BFS tree path from the source to node, or None if unreachable"""
+        if node not in self.distance:
+            return None
+        path = [node]
+        while path[-1] != self.source:
+            path.append(self.parent[path[-1]])
+        path.reverse()
+        return path
+
+    # Updates
+
+    def rebuild(self, G):
+        """Recompute everything from scratch"""
+        self.distance = {}
+        self.parent = {}
+        self.children = {}
+        self.version = graph_version(G)
+        if self.source not in G:
+            return
+
+        self.distance[self.source] = 0
+        self.children[self.source] = set()
+        queue = deque([self.source])
+        while queue:
+            u = queue.popleft()
+            for v in self._successors(G, u):
+                if v not in self.distance:
+                    self._attach(v, u)
+                    queue.append(v)
+
+    def apply(self, G, change, previous=None):
+        """
+        Update distances after an edit described by a graph_utils change tuple
+
+        The tree is only repaired if it matched the graph right before the
+        edit, i.e. `previous` (the graph_version taken before it) is the
+        version the tree was built for. Otherwise the graph was also edited
+        some other way in between and the tree is rebuilt.
+        """
+        kind = change[0] if change else None
+        if previous is None or previous != self.version:
+            self.rebuild(G)
+        elif kind == "add_edge":
+            self.edge_added(G, change[1], change[2])
+        elif kind == "remove_edge":
+            self.edge_removed(G, change[1], change[2])
+        elif kind == "add_node":
+            self.node_added(G, change[1])
+        elif kind == "remove_node":
+            self.node_removed(G, change[1])
+        else:
+            self.rebuild(G)
+        self.version = graph_version(G)
+
+    def edge_added(self, G, u, v):
+        self._relax_from(G, u, v)
+        if not self.directed:
+            self._relax_from(G, v, u)
+
+    def edge_removed(self, G, u, v):
+        for a, b in ((u, v), (v, u)) if not self.directed else ((u, v),):
+            if self.parent.get(b) == a:
+                self._cut_tree_edge(G, b)
+
+    def node_added(self, G, node):
+        if node == self.source:
+            self.rebuild(G)
+
+    def node_removed(self, G, node):
+        if node == self.source:
+            self.rebuild(G)
+        elif node in self.distance:
+            subtree = self._subtree(node)
+            self._detach(node)
+            subtree.discard(node)
+            self.children.pop(node, None)
+            self._repair(G, subtree)
+
+    # Internals
+
+    def _successors(self, G, node):
+        return G.successors(node) if self.directed else G.neighbors(node)
+
+    def _predecessors(self, G, node):
+        return G.predecessors(node) if self.directed else G.neighbors(node)
+
+    def _attach(self, node, parent):
+        self.distance[node] = self.distance[parent] + 1
+        self.parent[node] = parent
+        self.children[parent].add(node)
+        self.children.setdefault(node, set())
+
+    def _detach(self, node):
+        """Remove node from the tree, leaving its children in place"""
+        parent = self.parent.pop(node, None)
+        if parent is not None and parent in self.children:
+            self.children[parent].discard(node)
+        self.distance.pop(node, None)
+
+    def _relax_from(self, G, u, v):
+        """Propagate an improvement through the new edge u -> v"""
+        if u not in self.distance or self.distance[u] + 1 >= self.distance.get(v, float("inf")):
+            return
+        self._detach(v)
+        self._attach(v, u)
+        queue = deque([v])
+        while queue:
+            x = queue.popleft()
+            for y in self._successors(G, x):
+                if self.distance[x] + 1 < self.distance.get(y, float("inf")):
+                    self._detach(y)
+                    self._attach(y, x)
+                    queue.append(y)
+
+    def _cut_tree_edge(self, G, node):
+        """Handle the loss of node's tree edge to its parent"""
+        # Cheap case: another neighbor one level up can adopt the node
+        level = self.distance[node] - 1
+        for candidate in self._predecessors(G, node):
+            if self.distance.get(candidate) == level:
+                self.children[self.parent[node]].discard(node)
+                self.parent[node] = candidate
+                self.children[candidate].add(node)
+                return
+
+        subtree = self._subtree(node)
+        self._repair(G, subtree)
+
+    def _subtree(self, node):
+        subtree = {node}
+        queue = deque([node])
+        while queue:
+            for child in self.children.get(queue.popleft(), ()):
+                if child not in subtree:
+                    subtree.add(child)
+                    queue.append(child)
+        return subtree
+
+    def _repair(self, G, region):
+        """Recompute distances inside region, seeded from its neighbors outside it"""
+        for node in region:
+            self._detach(node)
+        for node in region:
+            self.children[node] = set()
+
+        # Each node's best entry point from the still-valid part of the tree;
+        # the counter keeps the heap from ever comparing node ids
+        order = itertools.count()
+        heap = []
+        for node in region:
+            for p in self._predecessors(G, node):
+                if p not in region and p in self.distance:
+                    heap.append((self.distance[p] + 1, next(order), node, p))
+        heapq.heapify(heap)
+
+        # Unit edge weights but different seed distances, so settle in distance order
+        while heap:
+            d, _, node, p = heapq.heappop(heap)
+            if node in self.distance:
+                continue
+            self._attach(node, p)
+            for y in self._successors(G, node):
+                if y in region and y not in self.distance:
+                    heapq.heappush(heap, (d + 1, next(order), y, node))
+
+        # Whatever was not reached is now disconnected from the source
+        for node in region:
+            if node not in self.distance:
+                self.children.pop(node, None)
+
+
+def get_dynamic_bfs(G, source):
+    """
+    Return a DynamicBFS from source that follows edits made to G
+
+    The search is built once and then updated incrementally by the
+    graph_utils edit helpers. If the graph was changed some other way, it is
+    rebuilt from scratch.
+
+    Parameters:
+    - G: NetworkX graph
+    - source: Node the distances are measured from
+
+    Returns:
+    - DynamicBFS for the current state of G
+    """
+    searches = _dynamic_searches.get(G)
+    if searches is None:
+        searches = {}
+        _dynamic_searches[G] = searches
+
+        def update_searches(graph, change, previous):
+            for search in searches.values():
+                search.apply(graph, change, previous)
+
+        add_graph_listener(G, update_searches)
+
+    search = searches.get(source)
+    if search is None:
+        search = DynamicBFS(G, source)
+        searches[source] = search
+    elif search.version != graph_version(G):
+        search.rebuild(G)
+    return search
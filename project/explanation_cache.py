@@ -0,0 +1,180 @@
+"""
+Persistent cache for LLM step explanations.
+
+The visualization asks for an AI explanation of the shown step on every
+Streamlit rerun, and each request is a multi-second, paid API call. The
+ExplanationCache keeps finished explanations in a SQLite file keyed by a
+fingerprint of everything that shapes the prompt, so a step that has been
+explained once is answered instantly, across reruns, sessions and server
+restarts.
+
+Entries expire after a time-to-live, and the least recently used ones are
+evicted once the cache exceeds its entry or size limit.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "graph_tutor", "explanations.sqlite")
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_TTL = 30 * 24 * 3600  # seconds
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS explanations (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS explanations_accessed ON explanations (accessed);
+"""
+
+# The cache shared by every session of this process, created on first use
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def step_fingerprint(algorithm, step_data, level, model, prompt_version):
+    """
+    Return a canonical key for an explanation request
+
+    Only the step fields that appear in the prompt are included, so two
+    steps with the same visited list, current node, frontier and edges share
+    an entry however they were produced. Node ids are encoded with repr, so
+    1 and "1" stay distinct.
+
+    Parameters:
+    - algorithm: 'DFS' or 'BFS'
+    - step_data: Step dictionary from a traversal
+    - level: Expertise level the explanation is written for
+    - model: Name of the model that writes the explanation
+    - prompt_version: Version of the prompt template; bump it when the wording changes
+
+    Returns:
+    - Hex SHA-256 digest
+    """
+    frontier_key = "stack" if algorithm == "DFS" else "queue"
+    state = {
+        'algorithm': algorithm,
+        'level': level,
+        'model': model,
+        'prompt_version': prompt_version,
+        'current': repr(step_data.get('current')),
+        'visited': [repr(node) for node in step_data.get('visited', [])],
+        frontier_key: [repr(node) for node in step_data.get(frontier_key, [])],
+        'edges': [[repr(u), repr(v)] for u, v in step_data.get('edges', [])],
+    }
+    canonical = json.dumps(state, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ExplanationCache:
+    """
+    SQLite-backed key/value store with TTL and LRU eviction
+
+    Reads refresh an entry's access time; every write first drops expired
+    entries and then the least recently used ones until both max_entries and
+    max_bytes (total UTF-8 size of the stored texts) hold again. The
+    database uses WAL mode, so several Streamlit worker processes can share
+    one cache file; within a process, access is serialized by a lock.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+
+    def get(self, key):
+        """Return the cached text for key, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT value, created FROM explanations WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._connection.execute("DELETE FROM explanations WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE explanations SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def __contains__(self, key):
+        """Whether an unexpired entry exists, without counting a hit or refreshing it"""
+        with self._lock:
+            row = self._connection.execute("SELECT created FROM explanations WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def put(self, key, value):
+        """Store value under key, then evict entries beyond the TTL and size limits"""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO explanations (key, value, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, value, now, now, size)
+            )
+            self._evict(now)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._connection.execute("DELETE FROM explanations")
+
+    def stats(self):
+        """Return the entry count, total size in bytes, and hits and misses of this process"""
+        with self._lock:
+            entries, total = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM explanations").fetchone()
+        return {'entries': entries, 'bytes': total, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self, now):
+        self._connection.execute("DELETE FROM explanations WHERE created < ?", (now - self.ttl,))
+        entries, total = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM explanations").fetchone()
+        if entries <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Walk from the least recently used entry until both limits hold
+        stale = []
+        for key, size in self._connection.execute("SELECT key, size FROM explanations ORDER BY accessed"):
+            if entries <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            entries -= 1
+            total -= size
+        self._connection.executemany("DELETE FROM explanations WHERE key = ?", stale)
+
+
+def get_explanation_cache():
+    """
+    Return the process-wide ExplanationCache
+
+    The file location can be changed with the EXPLANATION_CACHE_PATH
+    environment variable.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ExplanationCache(os.getenv("EXPLANATION_CACHE_PATH", DEFAULT_CACHE_PATH))
+        return _shared_cache
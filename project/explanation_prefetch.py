@@ -0,0 +1,169 @@
+"""
+Background prefetching of AI step explanations.
+
+Without prefetching, the explanation of step k+1 is only requested once the
+user has navigated there, so every "Next" click waits for the LLM. An
+ExplanationPrefetcher requests the next few steps ahead of time on a shared
+asyncio event loop, with a cap on concurrent requests; finished
+explanations land in the persistent explanation cache, where get_explanation
+finds them. Requests are cancelled as soon as the user jumps elsewhere,
+a new trace is started or the graph is edited.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import weakref
+
+from explanation_cache import get_explanation_cache
+from graph_index import add_graph_listener
+from llm_integration import explanation_key, get_explanation
+
+DEFAULT_LOOKAHEAD = 5
+DEFAULT_MAX_CONCURRENCY = 2
+
+# Event loop shared by all prefetchers of this process, started on first use
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop():
+    """Return the process-wide prefetch event loop, running in a daemon thread"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="explanation-prefetch", daemon=True).start()
+        return _loop
+
+
+class ExplanationPrefetcher:
+    """
+    Fetch the explanations of upcoming steps before they are shown
+
+    Every call to schedule() describes the steps worth having: the step on
+    screen and the `lookahead` steps after it. Work for any other step is
+    cancelled, so jumping around never leaves a backlog of stale requests.
+    Requests share `max_concurrency` slots. The step on screen is never
+    requested here, since the UI streams it; a prefetch already running for
+    it is kept and its answer used through result().
+
+    The blocking API call runs in a worker thread, so cancelling a request
+    that has already been sent stops waiting for it but not the call itself;
+    its answer is still cached. One prefetcher is meant per user session,
+    all of them sharing a single event loop thread.
+    """
+
+    def __init__(self, lookahead=DEFAULT_LOOKAHEAD, max_concurrency=DEFAULT_MAX_CONCURRENCY, fetch=get_explanation):
+        self.lookahead = lookahead
+        self.max_concurrency = max_concurrency
+        self._fetch = fetch
+        self._loop = _event_loop()
+        self._semaphore = None  # Created on the event loop by the first request
+        self._lock = threading.RLock()  # Cancelling runs _forget right away, under the lock
+        self._tasks = {}  # Fingerprint -> future of the queued or running request
+        self._started = set()  # Fingerprints whose request has been sent
+        self._trace = None
+        self._watched = weakref.WeakSet()
+
+    def schedule(self, G, trace, index, algorithm, level="beginner"):
+        """
+        Request the explanations of step index and the steps after it
+
+        Must be called from the thread that owns the trace, since it reads
+        the steps; only the step dictionaries are handed to the event loop.
+
+        Parameters:
+        - G: Graph the trace runs on; editing it cancels all requests
+        - trace: Step list or StepTrace being shown
+        - index: Index of the step on screen
+        - algorithm: 'DFS' or 'BFS'
+        - level: Expertise level the explanations are written for
+        """
+        if G not in self._watched:
+            add_graph_listener(G, weakref.WeakMethod(self._graph_changed))
+            self._watched.add(G)
+
+        wanted = {}
+        for i in range(index, index + self.lookahead + 1):
+            try:
+                step = trace[i]
+            except IndexError:
+                break
+            key = explanation_key(algorithm, step, level)
+            if i > index:
+                wanted.setdefault(key, step)
+            else:
+                wanted[key] = None  # Keep, but do not request, the step on screen
+
+        cache = get_explanation_cache()
+        with self._lock:
+            if trace is not self._trace:
+                self._trace = trace
+                self._cancel(list(self._tasks))
+            self._cancel([key for key in self._tasks if key not in wanted])
+
+            for key, step in wanted.items():
+                if step is None or key in self._tasks or key in cache:
+                    continue
+                self._started.discard(key)  # A cancelled request may have just marked itself sent
+                future = asyncio.run_coroutine_threadsafe(self._request(key, algorithm, step, level), self._loop)
+                future.add_done_callback(lambda done, key=key: self._forget(key, done))
+                self._tasks[key] = future
+
+    def result(self, algorithm, step, level="beginner", timeout=None):
+        """
+        Wait for the prefetched explanation of step, if its request was sent
+
+        A request still waiting for a slot is cancelled instead, as asking
+        directly is then faster.
+
+        Returns:
+        - The explanation, or None if it was never requested, was cancelled
+          or is not ready within timeout seconds; the caller then asks for
+          it itself (get_explanation answers from the cache when possible)
+        """
+        key = explanation_key(algorithm, step, level)
+        with self._lock:
+            future = self._tasks.get(key)
+            if future is not None and key not in self._started:
+                self._cancel([key])
+                future = None
+        if future is None:
+            return None
+        try:
+            return future.result(timeout)
+        except (concurrent.futures.CancelledError, concurrent.futures.TimeoutError):
+            return None
+
+    @property
+    def pending(self):
+        """Number of requests queued or running"""
+        with self._lock:
+            return len(self._tasks)
+
+    def cancel(self):
+        """Cancel every request"""
+        with self._lock:
+            self._cancel(list(self._tasks))
+
+    async def _request(self, key, algorithm, step, level):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            with self._lock:
+                self._started.add(key)
+            return await asyncio.to_thread(self._fetch, algorithm, step, level)
+
+    def _cancel(self, keys):
+        for key in keys:
+            self._started.discard(key)
+            self._tasks.pop(key).cancel()
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._tasks.get(key) is future:
+                del self._tasks[key]
+                self._started.discard(key)
+
+    def _graph_changed(self, G, change, previous):
+        self.cancel()
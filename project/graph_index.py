@@ -0,0 +1,446 @@
+"""
+Array-backed graph structures shared by the algorithms.
+
+NetworkX stores graphs as dicts of dicts, which is flexible but slow and
+memory hungry on large graphs. This module converts a graph into a
+compressed-sparse-row (CSR) structure and caches the result per graph
+version, so repeated algorithm runs on an unchanged graph skip conversion.
+"""
+import itertools
+import json
+import os
+import weakref
+
+import networkx as nx
+import numpy as np
+
+# Layout of a graph store directory (see MappedCSRGraph)
+STORE_FORMAT_VERSION = 1
+STORE_METADATA = "graph.json"
+
+# Edit counters, change listeners and cached CSR arrays, keyed by the NetworkX graph object
+_graph_versions = weakref.WeakKeyDictionary()
+_graph_listeners = weakref.WeakKeyDictionary()
+_csr_cache = weakref.WeakKeyDictionary()
+_node_index_cache = weakref.WeakKeyDictionary()
+
+# Key of the edit stamp kept in G.__networkx_cache__, and the source of new stamps.
+# NetworkX clears that cache on structural edits from version 3.3 on.
+_EDIT_STAMP = "graph_index_edit_stamp"
+_edit_stamps = itertools.count(1)
+_NX_CLEARS_CACHE = hasattr(nx, "_clear_cache")
+
+
+def graph_version(G):
+    """
+    Return a key that changes whenever the graph changes, in O(1)
+
+    The edit counter is bumped by mark_graph_changed, which the graph_utils
+    helpers call. Nodes and edges added or removed directly on a NetworkX
+    graph are caught through G.__networkx_cache__: NetworkX empties that
+    dict on every such edit, so the stamp stored in it disappears and the
+    next call hands out a new one. Changing edge attributes in place does
+    not clear it, so such code should call mark_graph_changed afterwards.
+    """
+    edits = _graph_versions.get(G, 0)
+    cache = getattr(G, "__networkx_cache__", None)
+    if cache is None or not _NX_CLEARS_CACHE:
+        # CSRGraph arrays are never edited in place; older NetworkX needs the O(V) count
+        return (edits, len(G), _adjacency_size(G))
+    stamp = cache.get(_EDIT_STAMP)
+    if stamp is None:
+        stamp = cache[_EDIT_STAMP] = next(_edit_stamps)
+    return (edits, stamp)
+
+
+def _adjacency_size(G):
+    """Number of stored neighbor entries: edges, counted twice on undirected graphs except self-loops"""
+    if isinstance(G, CSRGraph):
+        return int(G.indptr[-1])
+    return sum(map(len, G._adj.values()))
+
+
+def mark_graph_changed(G, change=None, previous=None):
+    """
+    Record that G has been edited, invalidating anything cached for it
+
+    Parameters:
+    - G: The edited graph
+    - change: Optional tuple describing the edit, passed on to listeners:
+      ("add_node", node), ("remove_node", node), ("add_edge", u, v) or
+      ("remove_edge", u, v)
+    - previous: Optional graph_version(G) taken right before the edit, passed
+      on to listeners so that they can tell whether their state was current
+      before this edit
+    """
+    _graph_versions[G] = _graph_versions.get(G, 0) + 1
+    listeners = _graph_listeners.get(G, [])
+    for listener in list(listeners):
+        if isinstance(listener, weakref.WeakMethod):
+            method = listener()
+            if method is None:
+                listeners.remove(listener)
+                continue
+            listener = method
+        listener(G, change, previous)
+
+
+def add_graph_listener(G, listener):
+    """
+    Call listener(G, change, previous) after every edit reported through mark_graph_changed
+
+    Listeners must not hold a strong reference to G, or the graph and
+    everything cached for it would never be freed. A listener may be a
+    weakref.WeakMethod, so that listening does not keep its object alive;
+    it is dropped once the object has been freed.
+    """
+    _graph_listeners.setdefault(G, []).append(listener)
+
+
+class CSRGraph:
+    """
+    Compressed-sparse-row view of a graph
+
+    The neighbors of the node at index i are indices[indptr[i]:indptr[i+1]],
+    sorted by index. `node_ids` maps an index back to the original node id
+    and index_of() maps a node id to its index.
+
+    CSRGraph implements the parts of the NetworkX graph interface used by the
+    traversals (neighbors, nodes, membership), so dfs_algorithm and
+    bfs_algorithm run on it unchanged. An optional `weights` array, aligned
+    with `indices`, holds edge weights for the weighted algorithms.
+    """
+
+    def __init__(self, indptr, indices, nodes, directed=False, weights=None, identity=None):
+        self.indptr = indptr
+        self.indices = indices
+        self.node_ids = nodes
+        self.directed = directed
+        self.weights = weights
+        # Graphs whose nodes are 0..n-1 need no id translation at all
+        self._identity = _is_identity(nodes) if identity is None else identity
+        self._index = None
+        self._reverse = None
+
+    @property
+    def identity(self):
+        """Whether the node ids are exactly 0..n-1, so that ids and indices coincide"""
+        return self._identity
+
+    def index_of(self, node):
+        """Return the index of a node id, raising KeyError if it is missing"""
+        if self._identity:
+            if isinstance(node, (int, np.integer)) and 0 <= node < len(self.node_ids):
+                return int(node)
+            raise KeyError(node)
+        if self._index is None:
+            self._index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        return self._index[node]
+
+    def to_nodes(self, indices):
+        """Translate an array of indices into a list of node ids"""
+        if self._identity:
+            return np.asarray(indices).tolist()
+        if isinstance(self.node_ids, np.ndarray):
+            return self.node_ids[indices].tolist()
+        return [self.node_ids[i] for i in np.asarray(indices).tolist()]
+
+    def neighbor_indices(self, i):
+        """Return the neighbor indices of the node at index i"""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def neighbors(self, node):
+        return iter(self.to_nodes(self.neighbor_indices(self.index_of(node))))
+
+    def predecessors(self, node):
+        """Return the in-neighbors of node (the neighbors on undirected graphs)"""
+        if not self.directed:
+            return self.neighbors(node)
+        if self._reverse is None:
+            # Transpose once: sort the (target, source) pairs by target
+            rows = np.repeat(np.arange(len(self.node_ids)), np.diff(self.indptr))
+            order = np.lexsort((rows, self.indices))
+            reverse_indptr = np.zeros(len(self.node_ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=len(self.node_ids)), out=reverse_indptr[1:])
+            self._reverse = (reverse_indptr, rows[order])
+        reverse_indptr, reverse_indices = self._reverse
+        i = self.index_of(node)
+        return iter(self.to_nodes(reverse_indices[reverse_indptr[i]:reverse_indptr[i + 1]]))
+
+    def weighted_neighbors(self, node):
+        """Return (neighbor id, weight) pairs; edges weigh 1 without a weights array"""
+        i = self.index_of(node)
+        neighbors = self.to_nodes(self.neighbor_indices(i))
+        if self.weights is None:
+            return [(neighbor, 1) for neighbor in neighbors]
+        return list(zip(neighbors, self.weights[self.indptr[i]:self.indptr[i + 1]].tolist()))
+
+    def nodes(self):
+        return self.to_nodes(np.arange(len(self.node_ids)))
+
+    def number_of_nodes(self):
+        return len(self.node_ids)
+
+    def number_of_edges(self):
+        num_entries = int(self.indptr[-1])
+        return num_entries if self.directed else (num_entries + self._num_self_loops()) // 2
+
+    def _num_self_loops(self):
+        rows = np.repeat(np.arange(len(self.node_ids)), np.diff(self.indptr))
+        return int(np.count_nonzero(rows == self.indices))
+
+    def is_directed(self):
+        return self.directed
+
+    def __contains__(self, node):
+        try:
+            self.index_of(node)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.node_ids)
+
+
+def _is_identity(nodes):
+    """Whether the node ids are exactly 0..n-1, without building lists for ranges and arrays"""
+    if isinstance(nodes, range):
+        return nodes == range(len(nodes))
+    if isinstance(nodes, np.ndarray):
+        return nodes.dtype.kind in "iu" and bool(np.array_equal(nodes, np.arange(len(nodes))))
+    return list(nodes) == list(range(len(nodes)))
+
+
+class MappedCSRGraph(CSRGraph):
+    """
+    CSRGraph whose arrays are memory-mapped from a graph store directory
+
+    The arrays are opened read-only with np.load(mmap_mode="r"), so opening a
+    store reads only its small metadata file. Traversals slice the mapped
+    arrays directly and the operating system pages in the parts they touch;
+    every process that opens the same store shares those pages through the
+    page cache instead of holding its own copy.
+
+    Node ids are looked up by binary search through a stored sort order of
+    the id table, so index_of never builds a dictionary over all nodes.
+    Pickling a MappedCSRGraph only records the path, so worker processes
+    reopen the store rather than receiving a copy of the arrays.
+
+    Stores are written by graph_io.write_graph_store.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, STORE_METADATA), "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("format") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported graph store format: {metadata.get('format')}")
+
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+
+        identity = metadata["node_ids"] == "identity"
+        super().__init__(
+            load("indptr"),
+            load("indices"),
+            range(metadata["num_nodes"]) if identity else load("node_ids"),
+            directed=metadata["directed"],
+            weights=load("weights") if metadata["weighted"] else None,
+            identity=identity,
+        )
+        self.path = path
+        self._num_edges = metadata["num_edges"]
+        self._sorter = None if identity else load("node_order")
+
+    def index_of(self, node):
+        if self._identity:
+            return super().index_of(node)
+        if self.node_ids.dtype.kind == "U":
+            if not isinstance(node, str):
+                raise KeyError(node)
+        elif not isinstance(node, (int, np.integer)):
+            raise KeyError(node)
+
+        position = int(np.searchsorted(self.node_ids, node, sorter=self._sorter))
+        if position < len(self._sorter):
+            i = int(self._sorter[position])
+            if self.node_ids[i] == node:
+                return i
+        raise KeyError(node)
+
+    def number_of_edges(self):
+        return self._num_edges
+
+    def __reduce__(self):
+        return (MappedCSRGraph, (self.path,))
+
+
+def to_csr(G, weight=None):
+    """
+    Convert a NetworkX graph into a CSRGraph
+
+    Parameters:
+    - G: NetworkX Graph or DiGraph
+    - weight: Optional edge attribute to store as edge weights (missing values count as 1)
+
+    Returns:
+    - CSRGraph with out-neighbors for directed graphs and both directions
+      for undirected graphs
+    """
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    num_nodes = len(nodes)
+
+    degrees = np.fromiter((len(nbrs) for _, nbrs in G.adjacency()), dtype=np.int64, count=num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(degrees, out=indptr[1:])
+
+    indices = np.fromiter(
+        (index[neighbor] for _, nbrs in G.adjacency() for neighbor in nbrs),
+        dtype=np.int64,
+        count=int(indptr[-1])
+    )
+
+    weights = None
+    if weight is not None:
+        weights = np.fromiter(
+            (data.get(weight, 1) for _, nbrs in G.adjacency() for data in nbrs.values()),
+            dtype=np.float64,
+            count=int(indptr[-1])
+        )
+
+    # Sort each row so neighbors come out in a stable order
+    rows = np.repeat(np.arange(num_nodes), degrees)
+    order = np.lexsort((indices, rows))
+    indices = indices[order]
+    if weights is not None:
+        weights = weights[order]
+
+    return CSRGraph(indptr, indices, nodes, directed=G.is_directed(), weights=weights)
+
+
+def csr_from_edge_arrays(src, dst, nodes, directed=False, weights=None):
+    """
+    Build a CSRGraph from arrays of edge endpoint indices
+
+    Duplicate edges are merged, keeping the weight of the last one like
+    repeated G.add_edge calls. Undirected edges are stored in both directions,
+    self-loops once, matching to_csr.
+
+    Parameters:
+    - src, dst: Integer arrays of node indices, one entry per edge
+    - nodes: Node ids, indexed by those indices
+    - directed: Whether the edges are directed
+    - weights: Optional float array of edge weights aligned with src and dst
+
+    Returns:
+    - CSRGraph with sorted neighbor lists
+    """
+    num_nodes = len(nodes)
+    base = max(num_nodes, 1)
+    src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+    if not directed:
+        # u-v and v-u are one edge: merge them before mirroring, so both directions get the same weight
+        src, dst = np.minimum(src, dst), np.maximum(src, dst)
+
+    # Sorting the combined (row, column) keys orders and deduplicates the edges;
+    # searching the reversed keys keeps the last occurrence of each edge
+    unique_keys, last = np.unique((src * base + dst)[::-1], return_index=True)
+    rows, indices = np.divmod(unique_keys, base)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[::-1][last]
+
+    if not directed:
+        # Store every edge in both directions, then sort back into row order
+        mirrored = rows != indices
+        rows, indices = np.concatenate([rows, indices[mirrored]]), np.concatenate([indices, rows[mirrored]])
+        order = np.argsort(rows * base + indices)
+        rows, indices = rows[order], indices[order]
+        if weights is not None:
+            weights = np.concatenate([weights, weights[mirrored]])[order]
+
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+    return CSRGraph(indptr, indices, nodes, directed=directed, weights=weights)
+
+
+def cached_csr(G):
+    """
+    Return the CSRGraph for G, converting it only when the graph has changed
+
+    Parameters:
+    - G: NetworkX graph, or a CSRGraph which is returned as is
+
+    Returns:
+    - CSRGraph for the current version of G
+    """
+    if isinstance(G, CSRGraph):
+        return G
+
+    version = graph_version(G)
+    cached = _csr_cache.get(G)
+    if cached is None or cached[0] != version:
+        cached = (version, to_csr(G))
+        _csr_cache[G] = cached
+    return cached[1]
+
+
+def node_index(G):
+    """
+    Return the nodes of G and a {node: position} dict, rebuilt only when the graph changes
+
+    Positions follow G.nodes(), the order used for node colors and CSR
+    indices, so per-node state can be kept in NumPy arrays indexed by them.
+
+    Parameters:
+    - G: NetworkX graph or CSRGraph
+
+    Returns:
+    - (nodes, index) tuple
+    """
+    version = graph_version(G)
+    cached = _node_index_cache.get(G)
+    if cached is None or cached[0] != version:
+        nodes = list(G.nodes())
+        cached = (version, (nodes, {node: i for i, node in enumerate(nodes)}))
+        _node_index_cache[G] = cached
+    return cached[1]
+
+
+def level_bfs(indptr, indices, source):
+    """
+    Run a level-synchronous BFS over CSR arrays
+
+    Returns:
+    - distance and parent index arrays, and a (frontier size, edges scanned,
+      nodes discovered) tuple for every level
+    """
+    num_nodes = len(indptr) - 1
+    distance = np.full(num_nodes, -1, dtype=np.int64)
+    parent = np.full(num_nodes, -1, dtype=np.int64)
+    distance[source] = 0
+
+    frontier = np.array([source], dtype=np.int64)
+    level = 0
+    levels = []
+
+    while frontier.size:
+        # Gather the neighbor lists of the whole frontier in one shot
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        edges_scanned = int(counts.sum())
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(edges_scanned)
+        neighbors = indices[offsets]
+        discovered_by = np.repeat(frontier, counts)
+
+        # Keep unseen neighbors, each with the first frontier node that reached it
+        unseen = distance[neighbors] == -1
+        next_frontier, first = np.unique(neighbors[unseen], return_index=True)
+        parent[next_frontier] = discovered_by[unseen][first]
+        distance[next_frontier] = level + 1
+
+        levels.append((int(frontier.size), edges_scanned, int(next_frontier.size)))
+        frontier = next_frontier
+        level += 1
+
+    return distance, parent, levels
@@ -0,0 +1,539 @@
+"""
+Import and export of graphs: edge lists, GraphML, binary .npz CSR files and
+memory-mapped graph store directories.
+
+Large inputs are never held in memory as text. Edge lists are parsed in
+chunks of lines into NumPy arrays, and GraphML is read with iterparse,
+discarding each element once it is consumed. Readers can return either a
+NetworkX graph for the UI or a CSRGraph, which every function in
+algorithms.py accepts directly and which scales to far larger graphs.
+Graph stores go one step further for graphs that do not fit in memory: the
+CSR arrays stay on disk and are memory-mapped when the store is opened.
+"""
+import io
+import itertools
+import json
+import os
+import xml.etree.ElementTree as ET
+from array import array
+from contextlib import contextmanager
+from xml.sax.saxutils import escape, quoteattr
+
+import networkx as nx
+import numpy as np
+
+from graph_index import (STORE_FORMAT_VERSION, STORE_METADATA, CSRGraph, MappedCSRGraph, cached_csr,
+                         csr_from_edge_arrays, to_csr)
+
+GRAPHML_NS = "http://graphml.graphdrawing.org/xmlns"
+
+# File extensions recognized by read_graph and write_graph
+FORMATS = {
+    ".npz": "npz",
+    ".graphml": "graphml",
+    ".xml": "graphml",
+}
+
+
+def detect_format(name):
+    """Guess the file format from a file name; directories are graph stores and anything unknown an edge list"""
+    if os.path.isdir(str(name)):
+        return "store"
+    return FORMATS.get(os.path.splitext(str(name))[1].lower(), "edgelist")
+
+
+def read_graph(source, file_format=None, directed=False, output="networkx", delimiter=None):
+    """
+    Read a graph in any supported format
+
+    Parameters:
+    - source: Path or binary file object (e.g. a Streamlit upload)
+    - file_format: "edgelist", "graphml", "npz" or "store"; detected from the name if omitted
+    - directed: Whether an edge list describes a directed graph (the other
+      formats record this themselves)
+    - output: "networkx" for a NetworkX graph or "csr" for a CSRGraph
+    - delimiter: Edge list column separator; whitespace by default, or a
+      comma for .csv files
+
+    Returns:
+    - The graph
+    """
+    name = str(getattr(source, "name", source))
+    if file_format is None:
+        file_format = detect_format(name)
+    if delimiter is None and name.lower().endswith(".csv"):
+        delimiter = ","
+    if file_format == "npz":
+        csr = read_npz(source)
+    elif file_format == "store":
+        csr = open_graph_store(source)
+    elif file_format == "graphml":
+        csr = read_graphml(source)
+    elif file_format == "edgelist":
+        csr = read_edge_list(source, directed=directed, delimiter=delimiter)
+    else:
+        raise ValueError(f"Unknown graph format: {file_format}")
+    return to_networkx(csr) if output == "networkx" else csr
+
+
+def write_graph(G, target, file_format=None):
+    """
+    Write a NetworkX graph or CSRGraph in any supported format
+
+    Parameters:
+    - G: Graph to write
+    - target: Path or binary file object; a directory path for "store"
+    - file_format: "edgelist", "graphml", "npz" or "store"; detected from the name if omitted
+    """
+    if file_format is None:
+        file_format = detect_format(getattr(target, "name", target))
+    if file_format == "npz":
+        write_npz(G, target)
+    elif file_format == "store":
+        write_graph_store(G, target)
+    elif file_format == "graphml":
+        write_graphml(G, target)
+    elif file_format == "edgelist":
+        write_edge_list(G, target)
+    else:
+        raise ValueError(f"Unknown graph format: {file_format}")
+
+
+# Node ids
+
+class _NodeTable:
+    """
+    Translate node ids read from a file into consecutive indices
+
+    Ids stay NumPy integers for as long as every id parses as one; the
+    table is then just the sorted unique ids. The first non-integer id
+    switches to a dict of string ids in order of first appearance, and the
+    integers read so far become strings too, so "5" and 5 never end up as
+    two different nodes.
+    """
+
+    def __init__(self):
+        self.int_chunks = []  # Raw integer ids, translated in finish()
+        self.index = None     # {id: index} once a non-integer id was seen
+
+    @property
+    def integer_ids(self):
+        return self.index is None
+
+    def add_ints(self, ids):
+        """Add a chunk of ids already parsed as integers; only valid while integer_ids"""
+        self.int_chunks.append(ids)
+
+    def add(self, tokens):
+        """Return an index array for tokens (or None while ids are still raw integers)"""
+        if self.index is None:
+            try:
+                ids = np.asarray(tokens).astype(np.int64)
+            except ValueError:
+                self._switch_to_labels()
+            else:
+                self.int_chunks.append(ids)
+                return None
+        return np.fromiter((self.index.setdefault(token, len(self.index)) for token in tokens),
+                           dtype=np.int64, count=len(tokens))
+
+    def _switch_to_labels(self):
+        self.index = {}
+        for chunk in self.int_chunks:
+            for node in chunk.tolist():
+                self.index.setdefault(str(node), len(self.index))
+
+    def finish(self, chunks):
+        """Resolve the per-chunk index arrays; return (indices, nodes)"""
+        if self.index is None:
+            raw = np.concatenate(self.int_chunks) if self.int_chunks else np.empty(0, dtype=np.int64)
+            nodes, indices = np.unique(raw, return_inverse=True)
+            return indices, nodes
+
+        # Chunks read before the switch hold raw integer ids
+        resolved, int_chunks = [], iter(self.int_chunks)
+        for chunk in chunks:
+            if chunk is None:
+                chunk = np.fromiter((self.index[str(node)] for node in next(int_chunks).tolist()), dtype=np.int64)
+            resolved.append(chunk)
+        indices = np.concatenate(resolved) if resolved else np.empty(0, dtype=np.int64)
+        return indices, list(self.index)
+
+
+def _node_array(nodes):
+    """Store node ids compactly: NumPy integers when possible, otherwise a list"""
+    if isinstance(nodes, np.ndarray):
+        return nodes
+    if all(isinstance(node, (int, np.integer)) for node in nodes):
+        return np.array(nodes, dtype=np.int64)
+    return nodes
+
+
+# Edge lists
+
+def read_edge_list(source, directed=False, comments="#", delimiter=None, chunk_size=1_000_000):
+    """
+    Stream an edge list into a CSRGraph
+
+    Each line holds "u v" or "u v weight". Lines are read chunk_size at a
+    time and converted to NumPy arrays, so only the arrays are kept, never
+    the text. Node ids are integers if all of them parse as integers, and
+    strings otherwise.
+
+    Parameters:
+    - source: Path or file object (text or binary)
+    - directed: Whether edges are directed
+    - comments: Lines starting with this are ignored, as are blank lines
+    - delimiter: Column separator, whitespace by default
+    - chunk_size: Number of lines parsed at once
+
+    Returns:
+    - CSRGraph, with edge weights when the file has a third column
+    """
+    table = _NodeTable()
+    chunks, weight_chunks = [], []
+    columns = None
+
+    with _open_text(source) as lines:
+        line_number = 0
+        while True:
+            block = list(itertools.islice(lines, chunk_size))
+            if not block:
+                break
+
+            # Blocks of only comments and blank lines hold no edges, and np.loadtxt warns about them
+            block_columns = _count_columns(block, comments, delimiter)
+            if block_columns is None:
+                line_number += len(block)
+                continue
+            if columns is None:
+                columns = block_columns
+
+            # Fast path: integer ids parsed by NumPy in C
+            if table.integer_ids and columns in (2, 3):
+                parsed = _parse_int_block(block, columns, comments, delimiter)
+                if parsed is not None:
+                    ids, weights = parsed
+                    table.add_ints(ids.ravel())
+                    chunks.append(None)
+                    if weights is not None:
+                        weight_chunks.append(weights)
+                    line_number += len(block)
+                    continue
+
+            rows = []
+            for line in block:
+                line_number += 1
+                line = line.strip()
+                if not line or line.startswith(comments):
+                    continue
+                fields = line.split(delimiter)
+                if columns not in (2, 3):
+                    raise ValueError(f"Line {line_number}: expected 'u v' or 'u v weight', got {line!r}")
+                if len(fields) != columns:
+                    raise ValueError(f"Line {line_number}: expected {columns} columns, got {line!r}")
+                rows.append(fields)
+            if not rows:
+                continue
+
+            # Source and target ids of the chunk, interleaved
+            endpoints = [field for fields in rows for field in fields[:2]]
+            chunks.append(table.add(endpoints))
+            if columns == 3:
+                weight_chunks.append(np.array([fields[2] for fields in rows], dtype=np.float64))
+
+    indices, nodes = table.finish(chunks)
+    weights = np.concatenate(weight_chunks) if weight_chunks else None
+    return csr_from_edge_arrays(indices[0::2], indices[1::2], _node_array(nodes), directed=directed, weights=weights)
+
+
+def _count_columns(block, comments, delimiter):
+    """Number of columns of the first data line in block, or None if it has none"""
+    for line in block:
+        line = line.strip()
+        if line and not line.startswith(comments):
+            return len(line.split(delimiter))
+    return None
+
+
+def _parse_int_block(block, columns, comments, delimiter):
+    """
+    Parse a block of lines with np.loadtxt, or return None if the slow path is needed
+
+    The slow path also takes over for blocks with errors, so that it can
+    report the offending line.
+    """
+    try:
+        table = np.loadtxt(block, dtype=np.int64 if columns == 2 else np.float64, comments=comments,
+                           delimiter=delimiter, ndmin=2)
+    except ValueError:
+        return None
+    if table.shape[1] != columns:
+        return None
+    if columns == 2:
+        return table, None
+
+    # Weighted lines are parsed as floats; the ids must still be exact integers
+    ids = table[:, :2]
+    if not (np.all(np.abs(ids) < 2 ** 53) and np.all(ids == np.round(ids))):
+        return None
+    return ids.astype(np.int64), table[:, 2].copy()
+
+
+def write_edge_list(G, target, chunk_size=1_000_000):
+    """
+    Write "u v" lines, or "u v weight" when the graph has weights, in chunks
+
+    Undirected edges are written once. Node ids are written with str().
+    """
+    csr = _weighted_csr(G)
+    rows = np.repeat(np.arange(csr.number_of_nodes()), np.diff(csr.indptr))
+    keep = np.ones(len(rows), dtype=bool) if csr.directed else rows <= csr.indices
+
+    with _open_output(target) as out:
+        for start in range(0, len(rows), chunk_size):
+            part = slice(start, start + chunk_size)
+            mask = keep[part]
+            u, v = csr.to_nodes(rows[part][mask]), csr.to_nodes(csr.indices[part][mask])
+            if csr.weights is not None:
+                lines = (f"{a} {b} {w:g}\n" for a, b, w in zip(u, v, csr.weights[part][mask].tolist()))
+            else:
+                lines = (f"{a} {b}\n" for a, b in zip(u, v))
+            out.write("".join(lines).encode("utf-8"))
+
+
+# GraphML
+
+def read_graphml(source):
+    """
+    Stream a GraphML file into a CSRGraph
+
+    Elements are parsed with iterparse and cleared as soon as they are read,
+    and the element holding them is emptied too, so the parsed tree never
+    grows with the number of nodes and edges. A "weight" edge attribute, if declared, becomes the edge weights. Node
+    ids that are all integers (as written by nx.write_graphml for integer
+    nodes) are converted back to integers.
+    """
+    index = {}
+    src, dst, weights = array("q"), array("q"), array("d")  # Packed, 8 bytes per entry
+    weight_key = None
+    directed = False
+    container = None  # Parent of the node and edge elements: the root, then the <graph> element
+
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        tag = element.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            if container is None:
+                container = element
+            if tag == "graph":
+                directed = element.get("edgedefault", "directed") == "directed"
+                container = element
+            continue
+
+        if tag == "key" and element.get("attr.name") == "weight" and element.get("for") in ("edge", "all"):
+            weight_key = element.get("id")
+        elif tag == "node":
+            index.setdefault(element.get("id"), len(index))
+            container.clear()
+        elif tag == "edge":
+            src.append(index.setdefault(element.get("source"), len(index)))
+            dst.append(index.setdefault(element.get("target"), len(index)))
+            weight = 1.0
+            for data in element:
+                if data.get("key") == weight_key:
+                    weight = float(data.text)
+            weights.append(weight)
+            container.clear()
+
+    nodes = list(index)
+    if all(node.lstrip("-").isdigit() for node in nodes):
+        nodes = [int(node) for node in nodes]
+    return csr_from_edge_arrays(np.frombuffer(src, dtype=np.int64), np.frombuffer(dst, dtype=np.int64),
+                                _node_array(nodes), directed=directed,
+                                weights=np.frombuffer(weights, dtype=np.float64) if weight_key is not None else None)
+
+
+def write_graphml(G, target):
+    """Write a GraphML file element by element, with a "weight" key when the graph has weights"""
+    csr = _weighted_csr(G)
+    rows = np.repeat(np.arange(csr.number_of_nodes()), np.diff(csr.indptr))
+    keep = np.ones(len(rows), dtype=bool) if csr.directed else rows <= csr.indices
+
+    with _open_output(target) as out:
+        def write(text):
+            out.write(text.encode("utf-8"))
+
+        write("<?xml version='1.0' encoding='utf-8'?>\n")
+        write(f'<graphml xmlns="{GRAPHML_NS}">\n')
+        if csr.weights is not None:
+            write('  <key id="weight" for="edge" attr.name="weight" attr.type="double"/>\n')
+        write(f'  <graph edgedefault="{"directed" if csr.directed else "undirected"}">\n')
+        for node in csr.nodes():
+            write(f"    <node id={quoteattr(str(node))}/>\n")
+        for u, v, i in zip(csr.to_nodes(rows[keep]), csr.to_nodes(csr.indices[keep]), np.flatnonzero(keep).tolist()):
+            if csr.weights is not None:
+                write(f'    <edge source={quoteattr(str(u))} target={quoteattr(str(v))}>'
+                      f'<data key="weight">{escape(repr(float(csr.weights[i])))}</data></edge>\n')
+            else:
+                write(f"    <edge source={quoteattr(str(u))} target={quoteattr(str(v))}/>\n")
+        write("  </graph>\n</graphml>\n")
+
+
+# Binary CSR
+
+def write_npz(G, target):
+    """
+    Save the CSR arrays of a graph to a .npz file
+
+    Integer node ids are stored as an int64 array (omitted for 0..n-1) and
+    string ids as a Unicode array; other id types are not supported.
+    """
+    csr = _weighted_csr(G)
+    arrays = {
+        'indptr': csr.indptr,
+        'indices': csr.indices,
+        'directed': np.array(csr.directed),
+    }
+    if csr.weights is not None:
+        arrays['weights'] = csr.weights
+    if not csr.identity:
+        arrays['node_ids'] = _node_id_array(csr)
+    np.savez(target, **arrays)
+
+
+def read_npz(source):
+    """Load a CSRGraph saved by write_npz"""
+    with np.load(source, allow_pickle=False) as data:
+        indptr, indices = data['indptr'], data['indices']
+        num_nodes = len(indptr) - 1
+        nodes = data['node_ids'] if 'node_ids' in data else list(range(num_nodes))
+        weights = data['weights'] if 'weights' in data else None
+        return CSRGraph(indptr, indices, nodes, directed=bool(data['directed']), weights=weights)
+
+
+def _node_id_array(csr):
+    """Node ids of a non-identity CSRGraph as an int64 or Unicode array"""
+    node_ids = _node_array(csr.node_ids)
+    if not isinstance(node_ids, np.ndarray):
+        if not all(isinstance(node, str) for node in node_ids):
+            raise ValueError("Only integer or string node ids can be saved in binary formats")
+        node_ids = np.array(node_ids, dtype=np.str_)
+    return node_ids
+
+
+# Memory-mapped store
+
+def write_graph_store(G, directory):
+    """
+    Save a graph as a directory of .npy files that open_graph_store maps into memory
+
+    The directory holds indptr.npy, indices.npy, optionally weights.npy, and
+    for ids other than 0..n-1 a node id table (node_ids.npy) with its sort
+    order (node_order.npy) for binary-search lookups. Neighbor indices are
+    stored as int32 when the node count allows, halving the largest file.
+    graph.json is written last, so an interrupted write never leaves a store
+    that opens.
+
+    Parameters:
+    - G: NetworkX graph or CSRGraph, e.g. read_edge_list(..., output="csr")
+      for inputs too large for NetworkX
+    - directory: Store directory, created if needed
+    """
+    csr = _weighted_csr(G)
+    os.makedirs(directory, exist_ok=True)
+    metadata_path = os.path.join(directory, STORE_METADATA)
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+    def save(name, array):
+        np.save(os.path.join(directory, f"{name}.npy"), array, allow_pickle=False)
+
+    num_nodes = csr.number_of_nodes()
+    index_dtype = np.int32 if num_nodes <= np.iinfo(np.int32).max else np.int64
+    save("indptr", np.asarray(csr.indptr, dtype=np.int64))
+    save("indices", np.asarray(csr.indices, dtype=index_dtype))
+    if csr.weights is not None:
+        save("weights", np.asarray(csr.weights, dtype=np.float64))
+    if csr.identity:
+        node_kind = "identity"
+    else:
+        node_ids = _node_id_array(csr)
+        save("node_ids", node_ids)
+        save("node_order", np.argsort(node_ids, kind="stable").astype(np.int64))
+        node_kind = "str" if node_ids.dtype.kind == "U" else "int"
+
+    metadata = {
+        "format": STORE_FORMAT_VERSION,
+        "num_nodes": num_nodes,
+        "num_edges": csr.number_of_edges(),
+        "directed": bool(csr.directed),
+        "weighted": csr.weights is not None,
+        "node_ids": node_kind,
+    }
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def open_graph_store(directory):
+    """
+    Open a graph store written by write_graph_store without loading it
+
+    Returns:
+    - MappedCSRGraph whose arrays are read-only memory maps; the DFS and BFS
+      functions in algorithms.py traverse it in place
+    """
+    return MappedCSRGraph(str(directory))
+
+
+# Conversion
+
+def to_networkx(csr):
+    """
+    Build a NetworkX graph from a CSRGraph, e.g. to show it in the UI
+
+    Edge weights become a "weight" attribute.
+    """
+    G = nx.DiGraph() if csr.directed else nx.Graph()
+    G.add_nodes_from(csr.nodes())
+    rows = np.repeat(np.arange(csr.number_of_nodes()), np.diff(csr.indptr))
+    u, v = csr.to_nodes(rows), csr.to_nodes(csr.indices)
+    if csr.weights is None:
+        G.add_edges_from(zip(u, v))
+    else:
+        G.add_weighted_edges_from(zip(u, v, csr.weights.tolist()))
+    return G
+
+
+def _weighted_csr(G):
+    """CSR view of G, including edge weights if any edge of a NetworkX graph has one"""
+    if isinstance(G, CSRGraph):
+        return G
+    if any('weight' in data for _, _, data in G.edges(data=True)):
+        return to_csr(G, weight='weight')
+    return cached_csr(G)
+
+
+@contextmanager
+def _open_text(source):
+    """Iterate the lines of a path or file object as text, closing only what was opened here"""
+    if not hasattr(source, "read"):
+        with open(source, "r", encoding="utf-8") as f:
+            yield f
+    elif isinstance(source, io.TextIOBase):
+        yield source
+    else:
+        wrapper = io.TextIOWrapper(source, encoding="utf-8")
+        try:
+            yield wrapper
+        finally:
+            wrapper.detach()  # Leave the caller's file object open
+
+
+@contextmanager
+def _open_output(target):
+    """Binary output to a path or file object, closing only what was opened here"""
+    if hasattr(target, "write"):
+        yield target
+    else:
+        with open(target, "wb") as f:
+            yield f
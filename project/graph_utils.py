@@ -1,79 +1,220 @@
+import weakref
+
 import networkx as nx
 import matplotlib.pyplot as plt
 import streamlit as st
 import numpy as np
 from matplotlib.colors import to_rgba
 
-def create_sample_graph(num_nodes=6, edge_probability=0.4, directed=False):
+from graph_index import graph_version, mark_graph_changed, node_index
+from layout import force_directed_layout
+import lod as lod_settings
+
+# Node positions per graph, reused across reruns and algorithm steps
+_layout_cache = weakref.WeakKeyDictionary()
+
+# Regular-edge layer of visualize_graph per graph, reused while the graph, layout and options stay the same
+_edge_layer_cache = weakref.WeakKeyDictionary()
+
+# Above this many nodes spring_layout is too slow and force_directed_layout is used
+LARGE_LAYOUT_THRESHOLD = 1000
+LAYOUT_TIME_BUDGET = 10.0  # seconds
+
+def create_sample_graph(num_nodes=6, edge_probability=0.4, directed=False, seed=None):
     """
-    Create a random graph for demonstration
+    Create a random G(n, p) graph for demonstration
+    
+    Instead of drawing a random number for every node pair, the gaps between
+    sampled pairs are drawn from a geometric distribution in NumPy batches,
+    so the cost is proportional to the number of edges.
+    
+    Parameters:
+    - num_nodes: Number of nodes, labelled 0..num_nodes-1
+    - edge_probability: Probability of each possible edge
+    - directed: If True, each ordered pair (i, j) with i != j is a candidate edge
+    - seed: Seed for reproducible graphs (None for a fresh random graph)
+    
+    Returns:
+    - NetworkX Graph or DiGraph, with components joined so that it is
+      (weakly) connected
     """
-    if directed:
-        G = nx.DiGraph()
-    else:
-        G = nx.Graph()
-        
+    rng = np.random.default_rng(seed)
+    G = nx.DiGraph() if directed else nx.Graph()
+    
     # Add nodes
-    for i in range(num_nodes):
-        G.add_node(i)
+    G.add_nodes_from(range(num_nodes))
     
     # Add random edges
-    for i in range(num_nodes):
-        for j in range(i+1, num_nodes):
-            if np.random.random() < edge_probability:
-                G.add_edge(i, j)
-    
-    # Ensure graph is connected
-    if not nx.is_connected(G) and not directed:
-        components = list(nx.connected_components(G))
-        for i in range(1, len(components)):
-            node1 = list(components[0])[0]
-            node2 = list(components[i])[0]
-            G.add_edge(node1, node2)
+    num_pairs = num_nodes * (num_nodes - 1) if directed else num_nodes * (num_nodes - 1) // 2
+    positions = _sample_pair_positions(num_pairs, edge_probability, rng)
+    sources, targets = _pair_positions_to_edges(positions, num_nodes, directed)
+    G.add_edges_from(zip(sources.tolist(), targets.tolist()))
+    
+    # Ensure graph is connected by joining every component to the first one
+    components = nx.weakly_connected_components(G) if directed else nx.connected_components(G)
+    anchor = None
+    for component in components:
+        node = next(iter(component))
+        if anchor is None:
+            anchor = node
+        else:
+            G.add_edge(anchor, node)
     
     return G
 
-def visualize_graph(G, node_colors=None, highlighted_edges=None, title=None, figsize=(8, 6)):
+def _sample_pair_positions(num_pairs, probability, rng):
+    """Return the sorted positions of the pairs that become edges, by geometric skipping"""
+    if num_pairs == 0 or probability <= 0:
+        return np.empty(0, dtype=np.int64)
+    if probability >= 1:
+        return np.arange(num_pairs, dtype=np.int64)
+    
+    # Draw gaps in batches sized a few standard deviations above the expected edge count
+    expected = num_pairs * probability
+    batch_size = int(expected + 5 * np.sqrt(expected) + 16)
+    chunks = []
+    last = -1
+    while last < num_pairs:
+        positions = last + np.cumsum(rng.geometric(probability, batch_size))
+        chunks.append(positions)
+        last = int(positions[-1])
+    
+    positions = np.concatenate(chunks)
+    return positions[positions < num_pairs]
+
+def _pair_positions_to_edges(positions, num_nodes, directed):
+    """Map pair positions back to (source, target) node arrays"""
+    if directed:
+        # Row i holds the num_nodes - 1 targets j != i
+        sources = positions // (num_nodes - 1) if num_nodes > 1 else positions
+        offsets = positions - sources * (num_nodes - 1)
+        return sources, offsets + (offsets >= sources)
+    
+    # Invert the row start of the upper triangle, where row i holds the targets j > i
+    b = 2 * num_nodes - 1
+    sources = ((b - np.sqrt(np.maximum(b * b - 8 * positions, 0))) // 2).astype(np.int64)
+    # Correct floating point rounding at row boundaries
+    sources -= _upper_row_start(sources, num_nodes) > positions
+    sources += _upper_row_start(sources + 1, num_nodes) <= positions
+    return sources, positions - _upper_row_start(sources, num_nodes) + sources + 1
+
+def _upper_row_start(rows, num_nodes):
+    """Position of the first pair (i, i+1) of each row i in the upper triangle"""
+    return rows * (2 * num_nodes - rows - 1) // 2
+
+def get_graph_layout(G):
+    """
+    Return node positions for G, recomputing only what the graph's edits require
+    
+    - Unchanged graph: the cached positions are returned as is
+    - Nodes added: existing nodes stay put, new nodes start at the centroid of
+      their placed neighbors and are relaxed by spring_layout with the others fixed
+      (large graphs skip the relaxation)
+    - Nodes removed or edges changed: the remaining positions are kept
+    
+    Parameters:
+    - G: NetworkX graph
+    
+    Returns:
+    - Dictionary mapping each node to an (x, y) position
+    """
+    version = graph_version(G)
+    cached = _layout_cache.get(G)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    if cached is None:
+        pos = _initial_layout(G)
+    else:
+        pos = _extend_layout(G, cached[1])
+    
+    _layout_cache[G] = (version, pos)
+    return pos
+
+def _initial_layout(G):
+    """Lay out G from scratch with a fixed seed, for a consistent layout"""
+    if G.number_of_nodes() > LARGE_LAYOUT_THRESHOLD:
+        return force_directed_layout(G, seed=42, time_budget=LAYOUT_TIME_BUDGET)
+    return nx.spring_layout(G, seed=42)
+
+def _extend_layout(G, old_pos):
+    """Place nodes missing from old_pos without moving the ones already placed"""
+    pos = {node: old_pos[node] for node in G.nodes() if node in old_pos}
+    new_nodes = [node for node in G.nodes() if node not in pos]
+    if not new_nodes:
+        return pos
+    if not pos:
+        return _initial_layout(G)
+    
+    rng = np.random.default_rng(42)
+    placed = np.array(list(pos.values()))
+    center, spread = placed.mean(axis=0), placed.std(axis=0).mean() or 1.0
+    for node in new_nodes:
+        anchors = [pos[n] for n in nx.all_neighbors(G, node) if n in pos]
+        base = np.mean(anchors, axis=0) if anchors else center
+        pos[node] = base + rng.normal(scale=0.1 * spread, size=2)
+    
+    if G.number_of_nodes() > LARGE_LAYOUT_THRESHOLD:
+        return pos
+    fixed = [node for node in G.nodes() if node not in new_nodes]
+    return nx.spring_layout(G, pos=pos, fixed=fixed, seed=42)
+
+def visualize_graph(G, node_colors=None, highlighted_edges=None, title=None, figsize=(8, 6), pos=None,
+                    lod=True, rasterize=None):
     """
     Visualize a graph with optional node coloring and edge highlighting
+    
+    Node positions come from get_graph_layout unless pos is given, so
+    stepping through a trace never recomputes the layout.
+    
+    With lod (level of detail), large graphs are simplified so the drawing
+    cost stays bounded: labels are dropped and nodes shrink above
+    lod.LABEL_NODE_THRESHOLD nodes, and at most lod.MAX_DRAWN_EDGES regular
+    edges are drawn. rasterize=True draws the regular edges as one density
+    image instead; the default (None) does so above lod.RASTER_EDGE_THRESHOLD
+    edges. Highlighted edges are always drawn in full, on top of the regular
+    ones. The sampled edges or the density image are kept per graph version
+    and layout, so each step of a trace only redraws them.
     """
     plt.figure(figsize=figsize)
-    pos = nx.spring_layout(G, seed=42)  # For consistent layout
+    if pos is None:
+        pos = get_graph_layout(G)
+    num_nodes = G.number_of_nodes()
     
     # Default node colors if not specified
     if node_colors is None:
-        node_colors = ['#1f78b4'] * len(G.nodes())
+        node_colors = ['#1f78b4'] * num_nodes
     
     # Draw nodes
     nx.draw_networkx_nodes(
         G, pos, 
         node_color=node_colors,
-        node_size=500,
+        node_size=lod_settings.node_size(num_nodes) if lod else 500,
         alpha=0.8,
         edgecolors='black',
-        linewidths=1.0
+        linewidths=1.0 if not lod or lod_settings.show_labels(num_nodes) else 0.3
     )
     
-    # Draw all edges
-    if highlighted_edges is None:
-        nx.draw_networkx_edges(
-            G, pos, 
-            width=1.5,
-            alpha=0.7,
-            edge_color='gray'
-        )
+    # Regular edges, dimmed while a step highlights some, as in StepRenderer
+    layer = _edge_layer(G, pos, lod, rasterize)
+    if layer[0] == 'raster':
+        _draw_edge_raster(layer[1], layer[2])
     else:
-        # Draw regular edges
-        regular_edges = [e for e in G.edges() if e not in highlighted_edges and (e[1], e[0]) not in highlighted_edges]
+        _, regular_edges, regular_alpha = layer
+        if highlighted_edges is not None:
+            regular_alpha *= 0.5 / 0.7
         nx.draw_networkx_edges(
             G, pos, 
             edgelist=regular_edges,
             width=1.5,
-            alpha=0.5,
-            edge_color='gray'
+            alpha=regular_alpha,
+            edge_color='gray',
+            # Per-edge arrow patches are far too slow once edges are sampled
+            arrows=False if lod and len(regular_edges) >= lod_settings.MAX_DRAWN_EDGES else None
         )
-        
-        # Draw highlighted edges
+    
+    # Draw highlighted edges
+    if highlighted_edges:
         nx.draw_networkx_edges(
             G, pos, 
             edgelist=highlighted_edges,
@@ -85,12 +226,13 @@ def visualize_graph(G, node_colors=None, highlighted_edges=None, title=None, fig
         )
     
     # Draw labels
-    nx.draw_networkx_labels(
-        G, pos,
-        font_size=14,
-        font_weight='bold',
-        font_color='white'
-    )
+    if not lod or lod_settings.show_labels(num_nodes):
+        nx.draw_networkx_labels(
+            G, pos,
+            font_size=14,
+            font_weight='bold',
+            font_color='white'
+        )
     
     # Add title if provided
     if title:
@@ -101,30 +243,132 @@ def visualize_graph(G, node_colors=None, highlighted_edges=None, title=None, fig
     
     return plt
 
+def _edge_layer(G, pos, lod, rasterize):
+    """
+    Return the regular edges of visualize_graph, built once per graph version, layout and options
+    
+    Returns:
+    - ('raster', density image or None without edges, extent), or
+      ('lines', edges to draw, alpha) with the edges sampled under lod
+    """
+    key = (graph_version(G), lod, rasterize)
+    cached = _edge_layer_cache.get(G)
+    if cached is not None and cached[0] == key and cached[1] is pos:
+        return cached[2]
+    
+    edges = list(G.edges())
+    if lod and lod_settings.should_rasterize(len(edges), rasterize):
+        extent = lod_settings.layout_extent(list(pos.values()))
+        segments = np.array([(pos[u], pos[v]) for u, v in edges], dtype=float)
+        layer = ('raster', lod_settings.rasterize_segments(segments, extent) if edges else None, extent)
+    else:
+        alpha = 0.7
+        if lod:
+            edges, alpha = lod_settings.sample_edges(edges, alpha)
+        layer = ('lines', edges, alpha)
+    _edge_layer_cache[G] = (key, pos, layer)
+    return layer
+
+def _draw_edge_raster(image, extent):
+    """Draw a density image of the edges underneath the nodes"""
+    if image is None:
+        return
+    ax = plt.gca()
+    ax.imshow(image, extent=extent, origin='upper', interpolation='nearest', zorder=0.5)
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_aspect('auto')
+
 def add_node_to_graph(G):
-    """Add a new node to the graph"""
-    new_node = len(G.nodes())
+    """Add a new node to the graph, with an unused id of the same type as the existing ids"""
+    new_node = _new_node_id(G)
+    previous = graph_version(G)
     G.add_node(new_node)
+    mark_graph_changed(G, ("add_node", new_node), previous)
     return G
 
+def _new_node_id(G):
+    """Return the next integer after the largest id, or for string ids (e.g. imported) an unused numeric string"""
+    if all(isinstance(node, (int, np.integer)) for node in G):
+        return int(max(G, default=-1)) + 1
+    candidate = len(G)
+    while str(candidate) in G:
+        candidate += 1
+    return str(candidate)
+
 def add_edge_to_graph(G, from_node, to_node):
     """Add an edge to the graph"""
-    if from_node in G.nodes() and to_node in G.nodes():
+    if from_node in G.nodes() and to_node in G.nodes() and not G.has_edge(from_node, to_node):
+        previous = graph_version(G)
         G.add_edge(from_node, to_node)
+        mark_graph_changed(G, ("add_edge", from_node, to_node), previous)
     return G
 
 def remove_node_from_graph(G, node):
     """Remove a node from the graph"""
     if node in G.nodes():
+        previous = graph_version(G)
         G.remove_node(node)
+        mark_graph_changed(G, ("remove_node", node), previous)
     return G
 
 def remove_edge_from_graph(G, from_node, to_node):
     """Remove an edge from the graph"""
     if G.has_edge(from_node, to_node):
+        previous = graph_version(G)
         G.remove_edge(from_node, to_node)
+        mark_graph_changed(G, ("remove_edge", from_node, to_node), previous)
     return G
 
+# Colors by node state: unvisited, visited, current
+NODE_STATE_COLORS = np.array(['#1f78b4', '#33a02c', '#e31a1c'])
+UNVISITED, VISITED, CURRENT = 0, 1, 2
+
+def get_node_state(G, visited=None, current=None, queue=None, stack=None):
+    """
+    Build NumPy arrays describing every node, indexed by position in G.nodes()
+    
+    Lists of nodes are translated through the cached node index once, so
+    each call is O(V) however long the visited list or frontier is.
+    
+    Returns:
+    - Dictionary with 'state' (UNVISITED, VISITED or CURRENT), and
+      'queue_position' and 'stack_position' (-1 when absent)
+    """
+    nodes, index = node_index(G)
+    num_nodes = len(nodes)
+    
+    return {
+        'state': _node_states(index, visited, current),
+        'queue_position': _first_positions(index, queue, num_nodes),
+        'stack_position': _first_positions(index, stack, num_nodes)
+    }
+
+def _node_states(index, visited, current):
+    """UNVISITED, VISITED or CURRENT for every position of index"""
+    state = np.full(len(index), UNVISITED, dtype=np.int8)
+    state[_node_positions(index, visited)] = VISITED
+    if current in index:
+        state[index[current]] = CURRENT
+    return state
+
+def _node_positions(index, nodes):
+    """Positions of the given nodes, skipping any that are not in the graph"""
+    if not nodes:
+        return np.empty(0, dtype=np.int64)
+    return np.fromiter((index[node] for node in nodes if node in index), dtype=np.int64)
+
+def _first_positions(index, sequence, num_nodes):
+    """Position of each node's first occurrence in sequence, or -1"""
+    positions = np.full(num_nodes, -1, dtype=np.int64)
+    if sequence:
+        found = [(index[node], i) for i, node in enumerate(sequence) if node in index]
+        if found:
+            found = np.array(found, dtype=np.int64)
+            # Later assignments win, so write the occurrences back to front
+            positions[found[::-1, 0]] = found[::-1, 1]
+    return positions
+
 def get_node_colors(G, visited=None, current=None):
     """
     Generate node colors based on visited status and current node
@@ -136,46 +380,35 @@ def get_node_colors(G, visited=None, current=None):
     Returns:
     - List of colors for each node
     """
-    if visited is None:
-        visited = []
-    
-    colors = []
-    for node in G.nodes():
-        if node == current:
-            colors.append('#e31a1c')  # Red for current node
-        elif node in visited:
-            colors.append('#33a02c')  # Green for visited nodes
-        else:
-            colors.append('#1f78b4')  # Blue for unvisited nodes
+    return node_colors_for_index(node_index(G)[1], visited=visited, current=current)
+
+def node_colors_for_index(index, visited=None, current=None):
+    """
+    Node colors like get_node_colors, for a {node: position} dict from node_index
     
-    return colors
+    The dict returned by node_index is never modified, so one kept from an
+    earlier graph version still colors the nodes of that version.
+    """
+    return NODE_STATE_COLORS[_node_states(index, visited, current)].tolist()
 
 def get_node_status_text(G, visited=None, current=None, queue=None, stack=None):
     """
     Generate text explaining the status of each node
     """
-    if visited is None:
-        visited = []
-    if queue is None:
-        queue = []
-    if stack is None:
-        stack = []
-    
-    status_text = ""
-    for node in sorted(G.nodes()):
-        status = f"Node {node}: "
-        if node == current:
-            status += "Currently being processed"
-        elif node in visited:
-            status += "Visited"
-        else:
-            status += "Not visited yet"
+    node_state = get_node_state(G, visited=visited, current=current, queue=queue, stack=stack)
+    _, index = node_index(G)
+    descriptions = {UNVISITED: "Not visited yet", VISITED: "Visited", CURRENT: "Currently being processed"}
+    
+    lines = []
+    for node in sorted(index):
+        i = index[node]
+        status = f"Node {node}: {descriptions[node_state['state'][i]]}"
         
-        if node in queue:
-            status += f" (in queue at position {queue.index(node)})"
-        if node in stack:
-            status += f" (in stack at position {stack.index(node)})"
-            
-        status_text += status + "\n"
-    
-    return status_text
\ No newline at end of file
+        if node_state['queue_position'][i] >= 0:
+            status += f" (in queue at position {node_state['queue_position'][i]})"
+        if node_state['stack_position'][i] >= 0:
+            status += f" (in stack at position {node_state['stack_position'][i]})"
+        
+        lines.append(status + "\n")
+    
+    return "".join(lines)
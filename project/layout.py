@@ -0,0 +1,224 @@
+"""
+Scalable force-directed layout for large graphs.
+
+nx.spring_layout computes every pairwise repulsion, which is O(V^2) per
+iteration and unusable past a few thousand nodes. This engine combines two
+standard approximations, both written with NumPy:
+
+- Multilevel coarsening: the graph is repeatedly shrunk by merging matched
+  node pairs, laid out at the coarsest level, then refined level by level
+- Barnes-Hut style repulsion: nodes are binned into a hierarchy of grids,
+  and distant cells act as a single body at their center of mass
+
+The result is deterministic for a given seed, and an optional time budget
+stops refinement early while still placing every node.
+"""
+import time
+
+import numpy as np
+
+from graph_index import cached_csr
+
+
+def force_directed_layout(G, seed=42, iterations=30, time_budget=None, coarsest_size=64, leaf_size=4):
+    """
+    Compute node positions with a multilevel Barnes-Hut force-directed layout
+
+    Parameters:
+    - G: NetworkX graph or CSRGraph
+    - seed: Seed for the initial positions and the coarsening
+    - iterations: Force iterations per level (the coarsest level gets more)
+    - time_budget: Optional limit in seconds; once reached, the remaining
+      levels are only interpolated, not refined
+    - coarsest_size: Stop coarsening once a level has at most this many nodes
+    - leaf_size: Target number of nodes per cell in the finest repulsion grid
+
+    Returns:
+    - Dictionary mapping each node to an (x, y) NumPy array in [-1, 1],
+      like nx.spring_layout
+    """
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    rng = np.random.default_rng(seed)
+    csr = cached_csr(G)
+    num_nodes = csr.number_of_nodes()
+    if num_nodes == 0:
+        return {}
+
+    # Undirected edge list without duplicates or self-loops
+    rows = np.repeat(np.arange(num_nodes), np.diff(csr.indptr))
+    src, dst = np.minimum(rows, csr.indices), np.maximum(rows, csr.indices)
+    keep = src != dst
+    edges = np.unique(np.stack([src[keep], dst[keep]], axis=1), axis=0)
+
+    # Coarsen until the graph is small or stops shrinking
+    levels = [(num_nodes, edges)]
+    mappings = []
+    while levels[-1][0] > coarsest_size:
+        size, level_edges = levels[-1]
+        mapping, coarse_size = _match_nodes(size, level_edges, rng)
+        if coarse_size > 0.9 * size:
+            break
+        coarse_edges = mapping[level_edges]
+        coarse_edges = coarse_edges[coarse_edges[:, 0] != coarse_edges[:, 1]]
+        coarse_edges = np.unique(np.sort(coarse_edges, axis=1), axis=0)
+        mappings.append(mapping)
+        levels.append((coarse_size, coarse_edges))
+
+    # Lay out the coarsest level, then interpolate and refine back down
+    size, level_edges = levels[-1]
+    pos = rng.random((size, 2))
+    pos = _refine(pos, level_edges, 4 * iterations, 0.1, leaf_size, deadline)
+
+    for level in range(len(mappings) - 1, -1, -1):
+        size, level_edges = levels[level]
+        k = np.sqrt(1.0 / size)
+        pos = pos[mappings[level]] + rng.normal(scale=0.1 * k, size=(size, 2))
+        pos = _refine(pos, level_edges, iterations, 2 * k, leaf_size, deadline)
+
+    pos = _rescale(pos)
+    return dict(zip(csr.nodes(), pos))
+
+
+def _match_nodes(num_nodes, edges, rng, rounds=3):
+    """
+    Merge nodes along a random maximal-ish matching
+
+    Each round every unmatched node proposes its lowest-priority incident edge
+    among edges with both ends unmatched; an edge is matched when both ends
+    proposed it (handshake matching, fully vectorized).
+
+    Returns:
+    - mapping from node to coarse node, and the number of coarse nodes
+    """
+    mate = np.full(num_nodes, -1, dtype=np.int64)
+    if len(edges):
+        priority = rng.random(len(edges))
+        for _ in range(rounds):
+            free = (mate[edges[:, 0]] == -1) & (mate[edges[:, 1]] == -1)
+            if not free.any():
+                break
+            candidates, candidate_priority = edges[free], priority[free]
+            best = np.full(num_nodes, np.inf)
+            np.minimum.at(best, candidates[:, 0], candidate_priority)
+            np.minimum.at(best, candidates[:, 1], candidate_priority)
+            chosen = (best[candidates[:, 0]] == candidate_priority) & (best[candidates[:, 1]] == candidate_priority)
+            u, v = candidates[chosen, 0], candidates[chosen, 1]
+            mate[u], mate[v] = v, u
+
+    # Each matched pair, and each unmatched node, becomes one coarse node
+    representative = np.where(mate == -1, np.arange(num_nodes), np.minimum(np.arange(num_nodes), mate))
+    unique, mapping = np.unique(representative, return_inverse=True)
+    return mapping, len(unique)
+
+
+def _refine(pos, edges, iterations, start_temperature, leaf_size, deadline):
+    """Run Fruchterman-Reingold iterations with a cooling temperature"""
+    num_nodes = len(pos)
+    k = np.sqrt(1.0 / num_nodes)
+    for iteration in range(iterations):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        temperature = start_temperature * (1 - iteration / iterations)
+
+        displacement = _repulsion(pos, k, leaf_size)
+
+        # Attraction along edges: d^2 / k
+        delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+        distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+        force = delta * (distance / k)[:, None]
+        for axis in range(2):
+            displacement[:, axis] -= np.bincount(edges[:, 0], force[:, axis], minlength=num_nodes)
+            displacement[:, axis] += np.bincount(edges[:, 1], force[:, axis], minlength=num_nodes)
+
+        # Move each node at most `temperature`
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 1e-9)
+        pos = pos + displacement * (np.minimum(length, temperature) / length)[:, None]
+    return pos
+
+
+def _repulsion(pos, k, leaf_size):
+    """
+    Approximate the k^2 / d repulsion from all other nodes
+
+    Uses a hierarchy of square grids. At each level, a cell interacts with
+    the cells that are children of its parent's neighbors but are not its own
+    neighbors (its interaction list), each treated as one body at its center
+    of mass; the resulting field is evaluated at the cell's center of mass
+    and shared by the nodes inside it. At the finest level, each node also
+    interacts with its neighboring cells, and with the center of mass of the
+    other nodes in its own cell. Every other node is counted exactly once.
+    """
+    num_nodes = len(pos)
+    if num_nodes < 2:
+        return np.zeros_like(pos)
+
+    origin = pos.min(axis=0)
+    side = max(float((pos.max(axis=0) - origin).max()), 1e-9) * (1 + 1e-9)
+    depth = max(2, int(np.ceil(np.log2(np.sqrt(num_nodes / leaf_size)))))
+    displacement = np.zeros_like(pos)
+
+    for level in range(2, depth + 1):
+        cells = 2 ** level
+        cell_xy = np.minimum(((pos - origin) / side * cells).astype(np.int64), cells - 1)
+        node_cell = cell_xy[:, 0] * cells + cell_xy[:, 1]
+        count, center = _cell_centers(pos, node_cell, cells)
+
+        # Far field between occupied cells, shared by the nodes of each cell
+        occupied = np.flatnonzero(count)
+        own_x, own_y = occupied // cells, occupied % cells
+        block_x, block_y = 2 * (own_x // 2) - 2, 2 * (own_y // 2) - 2
+        field = np.zeros((len(occupied), 2))
+        for ox in range(6):
+            for oy in range(6):
+                cx, cy = block_x + ox, block_y + oy
+                far = (np.abs(cx - own_x) > 1) | (np.abs(cy - own_y) > 1)
+                valid = far & (cx >= 0) & (cy >= 0) & (cx < cells) & (cy < cells)
+                _add_cell_force(field, center[occupied], count, center, cx * cells + cy, valid, k)
+        cell_field = np.zeros((cells * cells, 2))
+        cell_field[occupied] = field
+        displacement += cell_field[node_cell]
+
+        if level == depth:
+            # Near field, per node
+            for ox in (-1, 0, 1):
+                for oy in (-1, 0, 1):
+                    cx, cy = cell_xy[:, 0] + ox, cell_xy[:, 1] + oy
+                    valid = (cx >= 0) & (cy >= 0) & (cx < cells) & (cy < cells)
+                    if ox or oy:
+                        _add_cell_force(displacement, pos, count, center, cx * cells + cy, valid, k)
+                        continue
+                    # Own cell: center of mass of the other nodes in it
+                    others = count[node_cell] - 1
+                    own_center = (center[node_cell] * count[node_cell][:, None] - pos) / np.maximum(others, 1)[:, None]
+                    _add_body_force(displacement, pos, others, own_center, others > 0, k)
+
+    return displacement
+
+
+def _cell_centers(pos, node_cell, cells):
+    count = np.bincount(node_cell, minlength=cells * cells).astype(np.float64)
+    center = np.zeros((cells * cells, 2))
+    for axis in range(2):
+        center[:, axis] = np.bincount(node_cell, pos[:, axis], minlength=cells * cells)
+    center /= np.maximum(count, 1)[:, None]
+    return count, center
+
+
+def _add_cell_force(displacement, pos, count, center, cell, valid, k):
+    cell = np.where(valid, cell, 0)
+    _add_body_force(displacement, pos, count[cell], center[cell], valid & (count[cell] > 0), k)
+
+
+def _add_body_force(displacement, pos, mass, body, valid, k):
+    """Add mass * k^2 / d repulsion from bodies at the given positions"""
+    delta = pos - body
+    distance_sq = np.maximum(delta[:, 0] ** 2 + delta[:, 1] ** 2, 1e-12)
+    scale = np.where(valid, mass * k * k / distance_sq, 0.0)
+    displacement += delta * scale[:, None]
+
+
+def _rescale(pos):
+    """Center positions and scale them into [-1, 1], as nx.rescale_layout does"""
+    pos = pos - pos.mean(axis=0)
+    extent = np.abs(pos).max()
+    return pos / extent if extent > 0 else pos
@@ -1,33 +1,118 @@
-import openai
+import json
 import streamlit as st
-import os
 
-# Set up OpenAI API
-def setup_openai():
-    """Set up the OpenAI API with the API key from environment"""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if api_key:
-        openai.api_key = api_key
-        return True
-    else:
-        st.warning("OpenAI API key is not set. Please set the OPENAI_API_KEY environment variable.")
-        return False
+from explanation_cache import get_explanation_cache, step_fingerprint
+from llm_providers import get_provider
 
-def get_explanation(algorithm, step_data, level="beginner"):
+# Bump the prompt version whenever the explanation prompt wording changes,
+# so cached explanations written for the old prompt are no longer served
+EXPLANATION_PROMPT_VERSION = 1
+
+# Steps explained per request by explain_trace, and the completion tokens allowed per step
+BATCH_SEGMENT_SIZE = 20
+BATCH_TOKENS_PER_STEP = 120
+
+# Set up the LLM provider
+def setup_llm():
+    """
+    Return the configured LLM provider, warning when its API key is not set
+    
+    The provider (OpenAI by default, see llm_providers) is created once and
+    keeps its connection pool, so this is cheap to call for every request.
+    """
+    provider = get_provider()
+    if provider is None:
+        st.warning("LLM API key is not set. Please set the OPENAI_API_KEY environment variable.")
+    return provider
+
+def llm_available():
+    """Whether a provider is configured, without warning"""
+    return get_provider() is not None
+
+def explanation_key(algorithm, step_data, level="beginner"):
+    """Explanation cache key of a step, for the model of the configured provider"""
+    provider = get_provider()
+    model = provider.model if provider is not None else None
+    return step_fingerprint(algorithm, step_data, level, model, EXPLANATION_PROMPT_VERSION)
+
+def get_explanation(algorithm, step_data, level="beginner", use_cache=True):
     """
-    Get a detailed explanation of a specific algorithm step from GPT
+    Get a detailed explanation of a specific algorithm step from the LLM
+    
+    Explanations are kept in the persistent explanation cache, so showing a
+    step again answers from disk instead of calling the API. Errors are
+    never cached.
     
     Parameters:
     - algorithm: String, either 'DFS' or 'BFS'
     - step_data: Dictionary containing data about the current step
     - level: String indicating the expertise level (beginner, intermediate, advanced)
+    - use_cache: Whether to read and fill the explanation cache
     
     Returns:
     - String with the explanation
     """
-    if not setup_openai():
-        return "GPT integration not available. Please set your OpenAI API key."
+    key = explanation_key(algorithm, step_data, level)
+    if use_cache:
+        cached = get_explanation_cache().get(key)
+        if cached is not None:
+            return cached
     
+    provider = setup_llm()
+    if provider is None:
+        return "LLM integration not available. Please set your API key."
+    
+    try:
+        explanation = provider.complete(
+            _explanation_messages(algorithm, step_data, level),
+            max_tokens=250,
+            temperature=0.7
+        )
+    except Exception as e:
+        return f"Error getting explanation: {str(e)}"
+    
+    if use_cache:
+        get_explanation_cache().put(key, explanation)
+    return explanation
+
+def stream_explanation(algorithm, step_data, level="beginner", use_cache=True):
+    """
+    Stream the explanation of an algorithm step as it is generated
+    
+    Takes the same parameters as get_explanation. A cached explanation is
+    yielded in one piece; otherwise the completed text is cached once the
+    stream ends.
+    
+    Yields:
+    - Text fragments that concatenate to the explanation
+    """
+    key = explanation_key(algorithm, step_data, level)
+    if use_cache:
+        cached = get_explanation_cache().get(key)
+        if cached is not None:
+            yield cached
+            return
+    
+    provider = setup_llm()
+    if provider is None:
+        yield "LLM integration not available. Please set your API key."
+        return
+    
+    parts = []
+    try:
+        for token in provider.stream(_explanation_messages(algorithm, step_data, level), max_tokens=250,
+                                     temperature=0.7):
+            parts.append(token)
+            yield token
+    except Exception as e:
+        yield f"Error getting explanation: {str(e)}"
+        return
+    
+    if use_cache and parts:
+        get_explanation_cache().put(key, "".join(parts).strip())
+
+def _explanation_messages(algorithm, step_data, level):
+    """Build the chat messages asking for the explanation of one step"""
     # Prepare prompt based on algorithm and step
     visited = step_data.get('visited', [])
     current = step_data.get('current')
@@ -57,19 +142,139 @@ def get_explanation(algorithm, step_data, level="beginner"):
     Keep your explanation concise and educational, focusing on helping the student understand the algorithm.
     """
     
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",  # or "gpt-3.5-turbo" depending on your needs
-            messages=[
-                {"role": "system", "content": "You are a helpful tutor explaining graph algorithms."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=250,
-            temperature=0.7
+    return [
+        {"role": "system", "content": "You are a helpful tutor explaining graph algorithms."},
+        {"role": "user", "content": prompt}
+    ]
+
+def explain_trace(algorithm, steps, level="beginner", start=0, end=None, segment_size=BATCH_SEGMENT_SIZE,
+                  use_cache=True):
+    """
+    Explain many steps of a trace with one request per segment
+    
+    Instead of one round trip per step, each resending the same system
+    prompt, the steps are sent in segments of up to segment_size and the
+    model answers with a JSON list of per-step explanations. The answers are
+    split into the explanation cache under the same keys get_explanation
+    uses, so showing, streaming or prefetching those steps later is free.
+    Steps that are already cached are not sent again.
+    
+    Parameters:
+    - algorithm: String, either 'DFS' or 'BFS'
+    - steps: Step list or StepTrace
+    - level: String indicating the expertise level
+    - start, end: Range of step indices to explain (default: all steps)
+    - segment_size: Maximum number of steps per request
+    - use_cache: Whether to read and fill the explanation cache
+    
+    Returns:
+    - Dictionary mapping step index to explanation; steps the model left
+      out or that failed are missing
+    """
+    if end is None:
+        end = len(steps)
+    cache = get_explanation_cache()
+    explanations = {}
+    pending = []  # (index, step, cache key) of the steps still to explain
+    for index in range(start, end):
+        try:
+            step = steps[index]
+        except IndexError:
+            break
+        key = explanation_key(algorithm, step, level)
+        cached = cache.get(key) if use_cache else None
+        if cached is not None:
+            explanations[index] = cached
+        else:
+            pending.append((index, step, key))
+    
+    provider = setup_llm() if pending else None
+    if provider is None:
+        return explanations
+    
+    for offset in range(0, len(pending), segment_size):
+        segment = pending[offset:offset + segment_size]
+        try:
+            answers = _parse_batch_explanations(provider.complete(
+                _batch_explanation_messages(algorithm, [(index, step) for index, step, _ in segment], level),
+                max_tokens=BATCH_TOKENS_PER_STEP * len(segment),
+                temperature=0.7
+            ))
+        except Exception:
+            continue  # Leave the segment unexplained; get_explanation can still answer step by step
+        
+        for index, _, key in segment:
+            explanation = answers.get(index)
+            if explanation:
+                explanations[index] = explanation
+                if use_cache:
+                    cache.put(key, explanation)
+    return explanations
+
+def _batch_explanation_messages(algorithm, indexed_steps, level):
+    """Build the chat messages asking for explanations of several steps in one JSON answer"""
+    frontier_name = "Stack" if algorithm == "DFS" else "Queue"
+    frontier_key = frontier_name.lower()
+    lines = []
+    for index, step in indexed_steps:
+        current = step.get('current')
+        lines.append(
+            f"Step {index}: current node {current if current is not None else 'None'}; "
+            f"visited {step.get('visited', [])}; {frontier_name} {step.get(frontier_key, [])}; "
+            f"edges added {step.get('edges', [])}"
         )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Error getting explanation: {str(e)}"
+    steps_text = "\n    ".join(lines)
+    
+    prompt = f"""
+    Explain each of the following steps of the {algorithm} algorithm to a {level} student.
+    
+    {steps_text}
+    
+    For every step, explain what is happening, why, and how it relates to the {algorithm} algorithm principles,
+    in a few concise and educational sentences.
+    
+    Answer with a JSON object only, in this format:
+    {{"explanations": [{{"step": <step number>, "explanation": "<text>"}}, ...]}}
+    """
+    
+    return [
+        {"role": "system", "content": "You are a helpful tutor explaining graph algorithms."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _parse_batch_explanations(text):
+    """
+    Parse the JSON answer of a batch explanation request
+    
+    Tolerates code fences or prose around the JSON object, and a bare list
+    of {"step", "explanation"} items.
+    
+    Returns:
+    - Dictionary mapping step index to explanation
+    """
+    starts = [position for position in (text.find("{"), text.find("[")) if position != -1]
+    if not starts:
+        return {}
+    start = min(starts)
+    end = max(text.rfind("}"), text.rfind("]")) + 1
+    try:
+        data = json.loads(text[start:end])
+    except ValueError:
+        return {}
+    
+    items = data.get("explanations", []) if isinstance(data, dict) else data
+    explanations = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("step"))
+        except (TypeError, ValueError):
+            continue
+        explanation = item.get("explanation")
+        if isinstance(explanation, str) and explanation.strip():
+            explanations[index] = explanation.strip()
+    return explanations
 
 def get_hint(question, algorithm, level="beginner"):
     """
@@ -83,9 +288,40 @@ def get_hint(question, algorithm, level="beginner"):
     Returns:
     - String with the hint
     """
-    if not setup_openai():
-        return "GPT integration not available. Please set your OpenAI API key."
+    provider = setup_llm()
+    if provider is None:
+        return "LLM integration not available. Please set your API key."
     
+    try:
+        return provider.complete(
+            _hint_messages(question, algorithm, level),
+            max_tokens=150,
+            temperature=0.7
+        )
+    except Exception as e:
+        return f"Error getting hint: {str(e)}"
+
+def stream_hint(question, algorithm, level="beginner"):
+    """
+    Stream a hint for a student's question as it is generated
+    
+    Takes the same parameters as get_hint.
+    
+    Yields:
+    - Text fragments that concatenate to the hint
+    """
+    provider = setup_llm()
+    if provider is None:
+        yield "LLM integration not available. Please set your API key."
+        return
+    
+    try:
+        yield from provider.stream(_hint_messages(question, algorithm, level), max_tokens=150, temperature=0.7)
+    except Exception as e:
+        yield f"Error getting hint: {str(e)}"
+
+def _hint_messages(question, algorithm, level):
+    """Build the chat messages asking for a hint"""
     prompt = f"""
     A {level} student learning about the {algorithm} algorithm asks:
     
@@ -94,19 +330,10 @@ def get_hint(question, algorithm, level="beginner"):
     Give a helpful hint that guides them towards understanding without giving away the complete answer. Explain the concept in a way that's appropriate for their expertise level.
     """
     
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",  # or "gpt-3.5-turbo" depending on your needs
-            messages=[
-                {"role": "system", "content": "You are a helpful tutor explaining graph algorithms."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Error getting hint: {str(e)}"
+    return [
+        {"role": "system", "content": "You are a helpful tutor explaining graph algorithms."},
+        {"role": "user", "content": prompt}
+    ]
 
 def evaluate_answer(student_answer, correct_answer, algorithm, context=None):
     """
@@ -121,8 +348,9 @@ def evaluate_answer(student_answer, correct_answer, algorithm, context=None):
     Returns:
     - Dictionary with evaluation results
     """
-    if not setup_openai():
-        return {"score": 0, "feedback": "GPT integration not available. Please set your OpenAI API key."}
+    provider = setup_llm()
+    if provider is None:
+        return {"score": 0, "feedback": "LLM integration not available. Please set your API key."}
     
     prompt = f"""
     Evaluate this student's answer about the {algorithm} algorithm.
@@ -142,9 +370,8 @@ def evaluate_answer(student_answer, correct_answer, algorithm, context=None):
     """
     
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",  # or "gpt-3.5-turbo" depending on your needs
-            messages=[
+        feedback = provider.complete(
+            [
                 {"role": "system", "content": "You are a helpful tutor evaluating understanding of graph algorithms."},
                 {"role": "user", "content": prompt}
             ],
@@ -152,10 +379,7 @@ def evaluate_answer(student_answer, correct_answer, algorithm, context=None):
             temperature=0.3
         )
         
-        feedback = response.choices[0].message.content.strip()
-        
         # Simple parsing of JSON-like response
-        import json
         try:
             result = json.loads(feedback)
             return result
@@ -185,9 +409,40 @@ def get_chat_response(messages, algorithm):
     Returns:
     - String with the assistant's response
     """
-    if not setup_openai():
-        return "GPT integration not available. Please set your OpenAI API key."
+    provider = setup_llm()
+    if provider is None:
+        return "LLM integration not available. Please set your API key."
+    
+    try:
+        return provider.complete(
+            _chat_messages(messages, algorithm),
+            max_tokens=500,
+            temperature=0.7
+        )
+    except Exception as e:
+        return f"Error getting response: {str(e)}"
+
+def stream_chat_response(messages, algorithm):
+    """
+    Stream a chat response as it is generated
+    
+    Takes the same parameters as get_chat_response.
+    
+    Yields:
+    - Text fragments that concatenate to the response
+    """
+    provider = setup_llm()
+    if provider is None:
+        yield "LLM integration not available. Please set your API key."
+        return
     
+    try:
+        yield from provider.stream(_chat_messages(messages, algorithm), max_tokens=500, temperature=0.7)
+    except Exception as e:
+        yield f"Error getting response: {str(e)}"
+
+def _chat_messages(messages, algorithm):
+    """Prepend the tutoring system message to the conversation history"""
     # Create system message with context about the algorithm
     system_message = f"""
     You are an intelligent tutoring system specializing in graph algorithms, particularly {algorithm}.
@@ -203,17 +458,6 @@ def get_chat_response(messages, algorithm):
     """
     
     # Prepare the full message list including the system message
-    full_messages = [
+    return [
         {"role": "system", "content": system_message}
     ] + messages
-    
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",  # or "gpt-3.5-turbo" depending on your needs
-            messages=full_messages,
-            max_tokens=500,
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Error getting response: {str(e)}"
\ No newline at end of file
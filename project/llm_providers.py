@@ -0,0 +1,319 @@
+"""
+Chat completion providers behind one interface.
+
+llm_integration talks to an LLMProvider instead of a vendor SDK. A provider
+is created once per configuration and reused, so its HTTP connection pool
+stays warm across requests and Streamlit reruns. Every request has a
+timeout, and transient failures (timeouts, dropped connections, HTTP 429
+and 5xx) are retried with exponential backoff and full jitter.
+
+- OpenAIProvider: the openai>=1 client on a pooled httpx.Client
+- MistralProvider: one long-lived MistralClient
+- StubProvider: deterministic offline answers for tests, CI and load tests
+
+The vendor SDKs are imported by the provider that needs them, so the stub
+works without either installed.
+"""
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+
+DEFAULT_TIMEOUT = 30.0  # seconds per request
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5  # seconds before the first retry, at most
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_MAX_CONNECTIONS = 16
+
+# Providers of this process: (API key, provider) per backend, and providers set explicitly
+_providers = {}
+_overrides = {}
+_providers_lock = threading.Lock()
+
+
+class LLMProvider:
+    """
+    Chat completions with timeouts and retries
+
+    Subclasses implement _complete and _stream for one backend; messages are
+    always lists of {"role", "content"} dictionaries. Requests that fail with
+    a transient error are retried up to max_retries times, sleeping a random
+    time between 0 and min(backoff_max, backoff_base * 2**attempt) before
+    each retry, so clients that failed together do not retry in lockstep.
+    A stream is only retried until its first delta has arrived.
+    """
+
+    name = "base"
+    # Errors worth retrying besides responses with status 408, 429 or 5xx
+    transient_errors = (TimeoutError, ConnectionError)
+
+    def __init__(self, model, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX, seed=None, sleep=time.sleep):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._random = random.Random(seed)
+        self._sleep = sleep
+
+    def complete(self, messages, max_tokens=256, temperature=0.7, model=None):
+        """
+        Return the text of a chat completion
+
+        Parameters:
+        - messages: List of {"role", "content"} dictionaries
+        - max_tokens: Maximum number of completion tokens
+        - temperature: Sampling temperature
+        - model: Model name, the provider's default if omitted
+
+        Returns:
+        - The completion text, stripped
+        """
+        for attempt in itertools.count():
+            try:
+                return self._complete(messages, model or self.model, max_tokens, temperature).strip()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+            self._sleep(self.backoff_delay(attempt))
+
+    def stream(self, messages, max_tokens=256, temperature=0.7, model=None):
+        """
+        Stream a chat completion; takes the same parameters as complete()
+
+        Yields:
+        - Text deltas as they arrive
+        """
+        for attempt in itertools.count():
+            started = False
+            try:
+                for delta in self._stream(messages, model or self.model, max_tokens, temperature):
+                    started = True
+                    yield delta
+                return
+            except Exception as e:
+                # Deltas already shown cannot be taken back, so only a stream that never started is retried
+                if started or not self._should_retry(e, attempt):
+                    raise
+            self._sleep(self.backoff_delay(attempt))
+
+    def is_transient(self, error):
+        """Whether a failed request is worth retrying"""
+        status = getattr(error, "status_code", None) or getattr(error, "http_status", None)
+        if isinstance(status, int):
+            return status in (408, 429) or status >= 500
+        return isinstance(error, self.transient_errors)
+
+    def backoff_delay(self, attempt):
+        """Seconds to wait before retry number attempt + 1, with full jitter"""
+        return self._random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def close(self):
+        """Release the provider's connections"""
+
+    def _should_retry(self, error, attempt):
+        return attempt < self.max_retries and self.is_transient(error)
+
+    def _complete(self, messages, model, max_tokens, temperature):
+        raise NotImplementedError
+
+    def _stream(self, messages, model, max_tokens, temperature):
+        raise NotImplementedError
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    OpenAI chat completions through one client with a pooled httpx.Client
+
+    The SDK's own retries are disabled so that the backoff policy of
+    LLMProvider applies to every provider alike.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key, model="gpt-4", max_connections=DEFAULT_MAX_CONNECTIONS, **options):
+        import httpx
+        import openai
+
+        super().__init__(model, **options)
+        self.transient_errors = (openai.APIConnectionError, httpx.TransportError) + LLMProvider.transient_errors
+        self._http = httpx.Client(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self._client = openai.OpenAI(api_key=api_key, timeout=self.timeout, max_retries=0, http_client=self._http)
+
+    def close(self):
+        self._http.close()
+
+    def _complete(self, messages, model, max_tokens, temperature):
+        response = self._client.chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, temperature=temperature
+        )
+        return response.choices[0].message.content or ""
+
+    def _stream(self, messages, model, max_tokens, temperature):
+        response = self._client.chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, temperature=temperature, stream=True
+        )
+        for chunk in response:
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if content:
+                yield content
+
+
+class MistralProvider(LLMProvider):
+    """Mistral chat completions through one long-lived MistralClient and its connection pool"""
+
+    name = "mistral"
+
+    def __init__(self, api_key, model="mistral-tiny", **options):
+        from mistralai.client import MistralClient
+        from mistralai.exceptions import MistralConnectionException
+        from mistralai.models.chat_completion import ChatMessage
+
+        super().__init__(model, **options)
+        self.transient_errors = (MistralConnectionException,) + LLMProvider.transient_errors
+        self._message_class = ChatMessage
+        self._client = MistralClient(api_key=api_key, timeout=self.timeout, max_retries=0)
+
+    def _messages(self, messages):
+        return [self._message_class(role=message["role"], content=message["content"]) for message in messages]
+
+    def _complete(self, messages, model, max_tokens, temperature):
+        response = self._client.chat(
+            model=model, messages=self._messages(messages), max_tokens=max_tokens, temperature=temperature
+        )
+        return response.choices[0].message.content or ""
+
+    def _stream(self, messages, model, max_tokens, temperature):
+        for chunk in self._client.chat_stream(
+            model=model, messages=self._messages(messages), max_tokens=max_tokens, temperature=temperature
+        ):
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic local provider that never touches the network
+
+    The answer depends only on the messages: it is tagged with a short hash
+    of them and echoes the start of the last message, so tests can assert on
+    it. Prompts asking for the batch explanation JSON format get a valid JSON
+    answer with one entry per "Step N:" line, so explain_trace works end to
+    end. `latency` delays every request and `tokens_per_second` paces
+    streams, for load tests; `failures` makes the first requests raise a
+    transient error to exercise the retry path.
+    """
+
+    name = "stub"
+
+    def __init__(self, model="stub", latency=0.0, tokens_per_second=None, failures=0, **options):
+        super().__init__(model, **options)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.requests = 0
+        self._failures = failures
+        self._lock = threading.Lock()
+
+    def answer(self, messages, max_tokens=256):
+        """Return the deterministic answer to messages"""
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+        prompt = messages[-1]["content"] if messages else ""
+        steps = re.findall(r"^\s*Step (\d+):", prompt, re.MULTILINE)
+        if steps and '"explanations"' in prompt:
+            return json.dumps({"explanations": [
+                {"step": int(step), "explanation": f"Stub explanation {digest} of step {step}."} for step in steps
+            ]})
+        words = prompt.split()[:max(1, min(max_tokens, 40))]
+        return f"Stub response {digest}: " + " ".join(words)
+
+    def _request(self):
+        with self._lock:
+            self.requests += 1
+            fail = self._failures > 0
+            self._failures -= fail
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError("stub provider: simulated transient failure")
+
+    def _complete(self, messages, model, max_tokens, temperature):
+        self._request()
+        return self.answer(messages, max_tokens)
+
+    def _stream(self, messages, model, max_tokens, temperature):
+        self._request()
+        for token in re.findall(r"\S+\s*", self.answer(messages, max_tokens)):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield token
+
+
+# API key environment variable of each provider
+PROVIDER_KEYS = {
+    "openai": "OPENAI_API_KEY",
+    "mistral": "MISTRAL_API_KEY",
+}
+
+PROVIDER_CLASSES = {
+    "openai": OpenAIProvider,
+    "mistral": MistralProvider,
+    "stub": StubProvider,
+}
+
+
+def get_provider(name=None):
+    """
+    Return the shared provider for a backend, creating it on first use
+
+    Parameters:
+    - name: "openai", "mistral" or "stub"; defaults to the LLM_PROVIDER
+      environment variable, then to "openai"
+
+    Returns:
+    - The provider, or None if its API key environment variable is not set.
+      A provider is reused for as long as its API key stays the same.
+    """
+    name = name or os.getenv("LLM_PROVIDER", "openai")
+    if name not in PROVIDER_CLASSES:
+        raise ValueError(f"Unknown LLM provider: {name}")
+
+    with _providers_lock:
+        if name in _overrides:
+            return _overrides[name]
+        api_key = os.getenv(PROVIDER_KEYS[name]) if name in PROVIDER_KEYS else None
+        if name in PROVIDER_KEYS and not api_key:
+            return None
+
+        cached = _providers.get(name)
+        if cached is not None and cached[0] == api_key:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()  # The key changed, e.g. entered in the sidebar
+        provider = PROVIDER_CLASSES[name](api_key) if api_key else PROVIDER_CLASSES[name]()
+        _providers[name] = (api_key, provider)
+        return provider
+
+
+def set_provider(provider, name=None):
+    """
+    Make get_provider(name) return the given provider, e.g. a StubProvider with latency for load tests
+
+    Parameters:
+    - provider: Provider instance, or None to go back to the configured one
+    - name: Backend it replaces, by default the one get_provider() selects
+    """
+    name = name or os.getenv("LLM_PROVIDER", "openai")
+    with _providers_lock:
+        if provider is None:
+            _overrides.pop(name, None)
+        else:
+            _overrides[name] = provider
@@ -0,0 +1,120 @@
+"""
+Level-of-detail settings for drawing large graphs.
+
+Drawing every edge and label of a dense graph takes seconds per frame and
+the result is an unreadable blot anyway. visualize_graph and StepRenderer use
+these helpers to keep the drawing cost bounded:
+
+- Labels are dropped and nodes shrink above LABEL_NODE_THRESHOLD nodes
+- Above MAX_DRAWN_EDGES edges, a fixed-size random sample is drawn with a
+  higher alpha, so the overall density looks about the same
+- Above RASTER_EDGE_THRESHOLD edges (or on request), edges are accumulated
+  into a fixed-size density image in NumPy, datashader style, and shown
+  with a single imshow
+"""
+import numpy as np
+
+LABEL_NODE_THRESHOLD = 200
+MAX_DRAWN_EDGES = 5_000
+RASTER_EDGE_THRESHOLD = 50_000
+RASTER_SHAPE = (600, 800)  # rows, columns
+
+# Points sampled along one edge when rasterizing, at most, and in total
+_MAX_EDGE_SAMPLES = 64
+_RASTER_SAMPLE_BUDGET = 8_000_000
+
+
+def show_labels(num_nodes):
+    """Whether node labels are still readable at this graph size"""
+    return num_nodes <= LABEL_NODE_THRESHOLD
+
+
+def node_size(num_nodes, base_size=500):
+    """Marker area for the nodes, shrinking so large graphs do not become a single blob"""
+    if num_nodes <= LABEL_NODE_THRESHOLD:
+        return base_size
+    return max(4.0, base_size * LABEL_NODE_THRESHOLD / num_nodes)
+
+
+def should_rasterize(num_edges, rasterize=None):
+    """Resolve the rasterize option: None means automatic, based on the edge count"""
+    return num_edges > RASTER_EDGE_THRESHOLD if rasterize is None else bool(rasterize)
+
+
+def sample_edges(edges, alpha, max_edges=MAX_DRAWN_EDGES, seed=42):
+    """
+    Keep at most max_edges edges, chosen at random with a fixed seed
+
+    Parameters:
+    - edges: List of edges (or segments)
+    - alpha: Alpha the edges would be drawn with if all were kept
+
+    Returns:
+    - The kept edges and the alpha to draw them with. Thinning by a factor f
+      raises alpha by about sqrt(f), which keeps dense areas visibly dense
+    """
+    if len(edges) <= max_edges:
+        return edges, alpha
+    rng = np.random.default_rng(seed)
+    keep = np.sort(rng.choice(len(edges), max_edges, replace=False))
+    boost = np.sqrt(len(edges) / max_edges)
+    return [edges[i] for i in keep.tolist()], min(1.0, alpha * boost)
+
+
+def rasterize_segments(segments, extent, shape=RASTER_SHAPE, color=(0.5, 0.5, 0.5), chunk_size=50_000):
+    """
+    Accumulate line segments into a fixed-size RGBA density image
+
+    Every segment is sampled at about one point per pixel of its length and
+    the hits are counted per pixel with np.bincount. The samples per edge
+    are capped so the total stays within _RASTER_SAMPLE_BUDGET; on very
+    dense graphs long edges become dotted, which the density image hides.
+    The alpha channel is the log-scaled count, so single edges stay visible
+    next to dense clusters. The image size, and therefore the drawing cost,
+    does not depend on the number of edges.
+
+    Parameters:
+    - segments: Array of shape (E, 2, 2) with the endpoints of each edge
+    - extent: (xmin, xmax, ymin, ymax) in data coordinates covered by the image
+    - shape: (rows, columns) of the image
+    - color: RGB color of the edges
+
+    Returns:
+    - RGBA float array of the given shape, with row 0 at the top, for imshow
+    """
+    rows, columns = shape
+    xmin, xmax, ymin, ymax = extent
+    scale = np.array([(columns - 1) / ((xmax - xmin) or 1), (rows - 1) / ((ymax - ymin) or 1)], dtype=np.float32)
+    counts = np.zeros(rows * columns, dtype=np.int64)
+
+    segments = np.asarray(segments, dtype=np.float32).reshape(-1, 2, 2)
+    max_samples = int(np.clip(_RASTER_SAMPLE_BUDGET // max(len(segments), 1), 2, _MAX_EDGE_SAMPLES))
+    for start in range(0, len(segments), chunk_size):
+        chunk = (segments[start:start + chunk_size] - np.array([xmin, ymin], dtype=np.float32)) * scale
+        begin, delta = chunk[:, 0], chunk[:, 1] - chunk[:, 0]
+        samples = np.clip(np.ceil(np.hypot(delta[:, 0], delta[:, 1])), 1, max_samples - 1).astype(np.int64) + 1
+
+        # Parameter t in [0, 1] for every sample of every segment
+        owner = np.repeat(np.arange(len(chunk)), samples)
+        offsets = np.arange(len(owner)) - np.repeat(np.cumsum(samples) - samples, samples)
+        t = (offsets / (samples - 1)[owner]).astype(np.float32)
+
+        x = np.clip(np.rint(begin[owner, 0] + t * delta[owner, 0]).astype(np.int64), 0, columns - 1)
+        y = np.clip(np.rint(begin[owner, 1] + t * delta[owner, 1]).astype(np.int64), 0, rows - 1)
+        counts += np.bincount((rows - 1 - y) * columns + x, minlength=rows * columns)
+
+    image = np.zeros((rows * columns, 4))
+    image[:, :3] = color
+    if counts.max() > 0:
+        image[:, 3] = np.log1p(counts) / np.log1p(counts.max())
+    return image.reshape(rows, columns, 4)
+
+
+def layout_extent(coords, margin=0.05):
+    """Bounding box of the node positions, padded by a fraction of its size"""
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    if not len(coords):
+        return (-1.0, 1.0, -1.0, 1.0)
+    low, high = coords.min(axis=0), coords.max(axis=0)
+    pad = np.maximum((high - low) * margin, 1e-3)
+    return (low[0] - pad[0], high[0] + pad[0], low[1] - pad[1], high[1] + pad[1])
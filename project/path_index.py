@@ -0,0 +1,204 @@
+"""
+Shortest-path index for repeated queries on the same graph.
+
+While a user explores one graph, the same start/end pairs are queried over
+and over. The index keeps BFS trees for recently used sources and, on large
+graphs, landmark distances for ALT (A*, landmarks, triangle inequality)
+searches. It is tied to the graph version, so it is dropped by any edit made
+through the graph_utils helpers and by any direct edit that changes the
+node or edge count.
+"""
+import heapq
+import weakref
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+
+from graph_index import cached_csr, graph_version, level_bfs
+
+# One index per graph, rebuilt when the graph version changes
+_path_indexes = weakref.WeakKeyDictionary()
+
+
+class ShortestPathIndex:
+    """
+    Cached shortest-path answers for one version of a graph
+
+    - BFS trees (distance and parent arrays) are kept for the most recently
+      queried sources, so repeat queries only walk the parent pointers
+    - On graphs with at least `landmark_threshold` nodes, distances from a few
+      far-apart landmarks give lower bounds used by an A* search, which answers
+      cold queries without exploring the whole graph
+    """
+
+    def __init__(self, G, max_trees=32, num_landmarks=8, landmark_threshold=10_000, max_cached_paths=4096):
+        self.version = graph_version(G)
+        self.csr = cached_csr(G)
+        self.max_trees = max_trees
+        self.max_cached_paths = max_cached_paths
+        self._trees = OrderedDict()  # source index -> (distance, parent)
+        self._paths = OrderedDict()  # (source index, target index) -> index path
+
+        self._landmark_distance = None
+        if self.csr.number_of_nodes() >= landmark_threshold and num_landmarks > 0:
+            self._landmark_distance = self._select_landmarks(num_landmarks)
+
+    # Queries
+
+    def shortest_path(self, start_node, end_node):
+        """Return a shortest path from start_node to end_node as a list of nodes, or None"""
+        try:
+            source, target = self.csr.index_of(start_node), self.csr.index_of(end_node)
+        except KeyError as e:
+            raise nx.NodeNotFound(f"Node {e.args[0]} not in graph") from None
+
+        path = self._index_path(source, target)
+        return self.csr.to_nodes(path) if path is not None else None
+
+    def distance(self, start_node, end_node):
+        """Return the hop distance from start_node to end_node, or None if there is no path"""
+        path = self.shortest_path(start_node, end_node)
+        return len(path) - 1 if path is not None else None
+
+    def lower_bound(self, start_node, end_node):
+        """Return the landmark lower bound on the distance (0 without landmarks)"""
+        source, target = self.csr.index_of(start_node), self.csr.index_of(end_node)
+        return self._heuristic(source, target)
+
+    def _index_path(self, source, target):
+        # A cached tree from either end answers the query directly
+        if source in self._trees:
+            self._trees.move_to_end(source)
+            return self._tree_path(self._trees[source], source, target)
+        if not self.csr.directed and target in self._trees:
+            self._trees.move_to_end(target)
+            path = self._tree_path(self._trees[target], target, source)
+            return path[::-1] if path is not None else None
+
+        key = (source, target)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            return self._paths[key]
+
+        if self._landmark_distance is not None:
+            path = self._alt_path(source, target)
+            self._paths[key] = path
+            if len(self._paths) > self.max_cached_paths:
+                self._paths.popitem(last=False)
+            return path
+
+        return self._tree_path(self._tree(source), source, target)
+
+    # BFS trees
+
+    def _tree(self, source):
+        distance, parent, _ = level_bfs(self.csr.indptr, self.csr.indices, source)
+        self._trees[source] = (distance, parent)
+        if len(self._trees) > self.max_trees:
+            self._trees.popitem(last=False)
+        return distance, parent
+
+    @staticmethod
+    def _tree_path(tree, source, target):
+        distance, parent = tree
+        if distance[target] == -1:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        path.reverse()
+        return path
+
+    # Landmarks (ALT)
+
+    def _select_landmarks(self, num_landmarks):
+        """Pick landmarks by farthest-point selection and return their distance rows"""
+        indptr, indices = self.csr.indptr, self.csr.indices
+        landmark = int(np.argmax(np.diff(indptr)))  # Start from the highest degree node
+        rows = []
+        closest = None
+
+        for _ in range(num_landmarks):
+            distance, _, _ = level_bfs(indptr, indices, landmark)
+            rows.append(distance)
+            reached = np.where(distance >= 0, distance, np.iinfo(np.int64).max)
+            closest = reached if closest is None else np.minimum(closest, reached)
+
+            # The next landmark is the reachable node farthest from all chosen ones
+            candidates = np.where(closest == np.iinfo(np.int64).max, -1, closest)
+            landmark = int(np.argmax(candidates))
+            if candidates[landmark] <= 0:
+                break
+
+        return np.vstack(rows)
+
+    def _unreachable_by_landmarks(self, source, target):
+        """A landmark that reaches the source but not the target proves there is no path"""
+        from_landmark = self._landmark_distance
+        separated = (from_landmark[:, source] >= 0) & (from_landmark[:, target] == -1)
+        if not self.csr.directed:
+            separated |= (from_landmark[:, source] == -1) & (from_landmark[:, target] >= 0)
+        return bool(separated.any())
+
+    def _heuristic(self, node, target):
+        if self._landmark_distance is None:
+            return 0
+        to_node = self._landmark_distance[:, node]
+        to_target = self._landmark_distance[:, target]
+        known = (to_node >= 0) & (to_target >= 0)
+        if not known.any():
+            return 0
+        # d(L, t) <= d(L, v) + d(v, t), and symmetrically on undirected graphs
+        bounds = to_target[known] - to_node[known]
+        if not self.csr.directed:
+            bounds = np.abs(bounds)
+        return max(0, int(bounds.max()))
+
+    def _alt_path(self, source, target):
+        """A* search guided by the landmark lower bounds"""
+        if self._unreachable_by_landmarks(source, target):
+            return None
+
+        indptr, indices = self.csr.indptr, self.csr.indices
+        best = {source: 0}
+        parent = {source: source}
+        closed = set()
+        heap = [(self._heuristic(source, target), 0, source)]
+
+        while heap:
+            _, cost, u = heapq.heappop(heap)
+            if u == target:
+                path = [target]
+                while path[-1] != source:
+                    path.append(parent[path[-1]])
+                path.reverse()
+                return path
+            if u in closed:
+                continue
+            closed.add(u)
+
+            for v in indices[indptr[u]:indptr[u + 1]].tolist():
+                if cost + 1 < best.get(v, float("inf")):
+                    best[v] = cost + 1
+                    parent[v] = u
+                    heapq.heappush(heap, (cost + 1 + self._heuristic(v, target), cost + 1, v))
+
+        return None
+
+
+def get_path_index(G):
+    """
+    Return the ShortestPathIndex for the current version of G
+
+    Parameters:
+    - G: NetworkX graph or CSRGraph
+
+    Returns:
+    - ShortestPathIndex, rebuilt only after the graph has changed
+    """
+    index = _path_indexes.get(G)
+    if index is None or index.version != graph_version(G):
+        index = ShortestPathIndex(G)
+        _path_indexes[G] = index
+    return index
@@ -0,0 +1,262 @@
+"""
+Client-side playback of traversal traces.
+
+Server-side stepping costs a full Streamlit rerun and a matplotlib render per
+click. In playback mode the graph, its layout and the compact trace are sent
+to the browser once, as JSON inside a small self-contained SVG component; the
+browser rebuilds every step from the trace events itself, so playing,
+scrubbing and stepping use no server CPU at all.
+"""
+import json
+
+from graph_utils import get_graph_layout
+
+
+def playback_payload(G, trace, pos=None):
+    """
+    Build the JSON-serializable payload for the playback component
+
+    Nodes are referred to by their position in G.nodes(), so the payload
+    only contains small integers besides the labels and coordinates.
+
+    Parameters:
+    - G: NetworkX graph the trace was run on
+    - trace: StepTrace from dfs_trace or bfs_trace (completed if lazy)
+    - pos: Node positions, get_graph_layout(G) by default
+
+    Returns:
+    - Dictionary with the graph, the layout and the trace events
+    """
+    if pos is None:
+        pos = get_graph_layout(G)
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    compact = trace.export()
+
+    events = []
+    for kind, node, payload in compact['events']:
+        if isinstance(payload, list):
+            payload = [index[neighbor] for neighbor in payload]
+        events.append([kind, index[node] if node is not None else None, payload])
+
+    return {
+        'algorithm': compact['algorithm'],
+        'frontier_key': compact['frontier_key'],
+        'directed': G.is_directed(),
+        'labels': [str(node) for node in nodes],
+        'reprs': [repr(node) for node in nodes],
+        'positions': [[round(float(x), 5), round(float(y), 5)] for x, y in (pos[node] for node in nodes)],
+        'edges': [[index[u], index[v]] for u, v in G.edges()],
+        'events': events,
+        'pushed': [index[node] for node in compact['pushed']],
+        'below': compact['below'],
+        'order': [index[node] for node in compact['order']],
+    }
+
+
+def playback_html(G, trace, pos=None, width=800, height=560):
+    """
+    Return a self-contained HTML page that plays the trace in the browser
+
+    Pass the result to streamlit.components.v1.html. The page draws the
+    graph as SVG with the same colors as get_node_colors, and offers
+    First/Previous/Play/Next/Last buttons, a step slider, a speed selector
+    and the arrow keys. The step explanations are rebuilt client-side with
+    the same wording as StepTrace.
+    """
+    payload = json.dumps(playback_payload(G, trace, pos), separators=(',', ':'))
+    # Keep a "</script>" inside node labels from closing the script element
+    payload = payload.replace('</', '<\\/')
+    return (_PLAYBACK_TEMPLATE
+            .replace('__PAYLOAD__', payload)
+            .replace('__WIDTH__', str(width))
+            .replace('__HEIGHT__', str(height)))
+
+
+_PLAYBACK_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<style>
+  body { font-family: sans-serif; margin: 0; color: #262730; }
+  #title { font-size: 18px; text-align: center; margin: 4px 0; }
+  #controls { display: flex; gap: 6px; align-items: center; margin: 6px 0; }
+  #controls input[type=range] { flex: 1; }
+  #info { font-size: 14px; line-height: 1.4; }
+  .edge { stroke: gray; stroke-width: 1.5; stroke-opacity: 0.5; }
+  .edge-hl { stroke: red; stroke-width: 2.5; }
+  .node { stroke: black; stroke-width: 1; fill-opacity: 0.8; }
+  .label { fill: white; font-weight: bold; text-anchor: middle; dominant-baseline: central; pointer-events: none; }
+</style>
+</head>
+<body>
+<div id="title"></div>
+<svg id="graph" width="100%" viewBox="0 0 __WIDTH__ __HEIGHT__">
+  <defs>
+    <marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" orient="auto">
+      <path d="M 0 0 L 10 5 L 0 10" fill="none" stroke="red" stroke-width="2"/>
+    </marker>
+  </defs>
+  <g id="edges"></g><g id="highlights"></g><g id="nodes"></g><g id="labels"></g>
+</svg>
+<div id="controls">
+  <button id="first">&#x23EE; First</button>
+  <button id="prev">&#x25C0; Previous</button>
+  <button id="play">&#x25B6; Play</button>
+  <button id="next">Next &#x25B6;</button>
+  <button id="last">Last &#x23ED;</button>
+  <input id="slider" type="range" min="0" value="0">
+  <select id="speed">
+    <option value="0.5">0.5 steps/s</option><option value="1" selected>1 step/s</option>
+    <option value="2">2 steps/s</option><option value="4">4 steps/s</option><option value="8">8 steps/s</option>
+  </select>
+</div>
+<div id="info"></div>
+<script>
+const P = __PAYLOAD__;
+const W = __WIDTH__, H = __HEIGHT__, SVG_NS = "http://www.w3.org/2000/svg";
+const isStack = P.frontier_key === "stack";
+const n = P.labels.length;
+
+// Cursor (visited count, pushed count, head/top) after every step, as in StepTrace._advance
+const cursors = [];
+let cursor = [0, 0, isStack ? -1 : 0];
+for (const [kind, , payload] of P.events) {
+  let [visited, pushed, position] = cursor;
+  if (kind === "skip" || kind === "visit") {
+    position = isStack ? P.below[position] : position + 1;
+    if (kind === "visit") visited += 1;
+  } else if (kind === "start" || kind === "push") {
+    pushed += payload;
+    if (isStack && payload) position = pushed - 1;
+  }
+  cursor = [visited, pushed, position];
+  cursors.push(cursor);
+}
+
+function listRepr(items) { return "[" + items.map(i => P.reprs[i]).join(", ") + "]"; }
+
+function buildStep(k) {
+  const [kind, node, payload] = P.events[k];
+  const [visitedCount, pushedCount, position] = cursors[k];
+  const visited = P.order.slice(0, visitedCount);
+  let frontier = [];
+  if (kind !== "done") {
+    if (isStack) {
+      for (let cell = position; cell !== -1; cell = P.below[cell]) frontier.push(P.pushed[cell]);
+      frontier.reverse();
+    } else {
+      frontier = P.pushed.slice(position, pushedCount);
+    }
+  }
+  let edges = [], current = node, explanation;
+  const alg = P.algorithm, fk = P.frontier_key, label = node === null ? "" : P.labels[node];
+  if (kind === "start") {
+    explanation = `Starting ${alg} from node ${label}. Initialize with an empty visited set and add node ${label} to the ${fk}.`;
+    current = null;
+  } else if (kind === "skip") {
+    explanation = `Node ${label} has already been visited, so we skip it and move to the next node in the ${fk}.`;
+  } else if (kind === "visit") {
+    explanation = `Visit node ${label} and mark it as visited. Examine its neighbors: ${listRepr(payload)}.`;
+  } else if (kind === "push") {
+    const added = P.pushed.slice(pushedCount - payload, pushedCount);
+    edges = added.map(v => [node, v]);
+    explanation = `Add unvisited neighbors ${listRepr(added)} to the ${fk} for later processing.`;
+  } else {
+    explanation = `${alg} complete. All reachable nodes have been visited in this order: ${listRepr(visited)}.`;
+  }
+  return {visited, current, frontier, edges, explanation};
+}
+
+// Static drawing: fit the layout into the view box once
+const margin = 30;
+let minX = Infinity, maxX = -Infinity, minY = Infinity, maxY = -Infinity;
+for (const [x, y] of P.positions) {
+  minX = Math.min(minX, x); maxX = Math.max(maxX, x); minY = Math.min(minY, y); maxY = Math.max(maxY, y);
+}
+const scale = Math.min((W - 2 * margin) / ((maxX - minX) || 1), (H - 2 * margin) / ((maxY - minY) || 1));
+const px = P.positions.map(([x, y]) => [margin + (x - minX) * scale, H - margin - (y - minY) * scale]);
+const radius = Math.max(3, Math.min(18, 400 / Math.sqrt(n || 1)));
+
+function svg(tag, attrs, parent) {
+  const el = document.createElementNS(SVG_NS, tag);
+  for (const key in attrs) el.setAttribute(key, attrs[key]);
+  parent.appendChild(el);
+  return el;
+}
+const edgeGroup = document.getElementById("edges"), highlightGroup = document.getElementById("highlights");
+for (const [u, v] of P.edges) {
+  svg("line", {x1: px[u][0], y1: px[u][1], x2: px[v][0], y2: px[v][1], class: "edge"}, edgeGroup);
+}
+const circles = px.map(([x, y]) => svg("circle", {cx: x, cy: y, r: radius, class: "node", fill: "#1f78b4"},
+                                        document.getElementById("nodes")));
+if (radius >= 8) {
+  px.forEach(([x, y], i) => {
+    svg("text", {x: x, y: y, class: "label", "font-size": radius * 0.9}, document.getElementById("labels"))
+      .textContent = P.labels[i];
+  });
+}
+
+// Per-step updates only touch node fills and the highlight overlay
+const fills = new Array(n).fill("#1f78b4");
+function show(k) {
+  const step = buildStep(k);
+  const visited = new Set(step.visited);
+  for (let i = 0; i < n; i++) {
+    const fill = i === step.current ? "#e31a1c" : visited.has(i) ? "#33a02c" : "#1f78b4";
+    if (fill !== fills[i]) { circles[i].setAttribute("fill", fill); fills[i] = fill; }
+  }
+  highlightGroup.replaceChildren();
+  for (const [u, v] of step.edges) {
+    // Stop arrows at the node border
+    const dx = px[v][0] - px[u][0], dy = px[v][1] - px[u][1], len = Math.hypot(dx, dy) || 1;
+    const end = P.directed ? radius / len : 0;
+    const attrs = {x1: px[u][0], y1: px[u][1], x2: px[v][0] - dx * end, y2: px[v][1] - dy * end, class: "edge-hl"};
+    if (P.directed) attrs["marker-end"] = "url(#arrow)";
+    svg("line", attrs, highlightGroup);
+  }
+  document.getElementById("title").textContent = `${P.algorithm} Step ${k + 1}/${P.events.length}`;
+  const info = document.getElementById("info");
+  info.replaceChildren();
+  for (const [name, text] of [["Explanation", step.explanation],
+                              [isStack ? "Stack" : "Queue", listRepr(step.frontier)],
+                              ["Visited Nodes", listRepr(step.visited)]]) {
+    const line = document.createElement("div");
+    const strong = document.createElement("strong");
+    strong.textContent = name + ": ";
+    line.append(strong, text);
+    info.appendChild(line);
+  }
+  slider.value = k;
+  current = k;
+}
+
+// Controls
+const slider = document.getElementById("slider");
+slider.max = Math.max(0, P.events.length - 1);
+let current = 0, timer = null;
+function go(k) { show(Math.max(0, Math.min(P.events.length - 1, k))); }
+function stop() { clearInterval(timer); timer = null; document.getElementById("play").innerHTML = "&#x25B6; Play"; }
+function play() {
+  if (current >= P.events.length - 1) go(0);
+  const rate = parseFloat(document.getElementById("speed").value);
+  timer = setInterval(() => { if (current >= P.events.length - 1) stop(); else go(current + 1); }, 1000 / rate);
+  document.getElementById("play").innerHTML = "&#x23F8; Pause";
+}
+document.getElementById("first").onclick = () => go(0);
+document.getElementById("prev").onclick = () => go(current - 1);
+document.getElementById("next").onclick = () => go(current + 1);
+document.getElementById("last").onclick = () => go(P.events.length - 1);
+document.getElementById("play").onclick = () => timer ? stop() : play();
+document.getElementById("speed").onchange = () => { if (timer) { stop(); play(); } };
+slider.oninput = () => go(parseInt(slider.value));
+document.addEventListener("keydown", e => {
+  if (e.key === "ArrowRight") go(current + 1);
+  if (e.key === "ArrowLeft") go(current - 1);
+  if (e.key === " ") { e.preventDefault(); timer ? stop() : play(); }
+});
+if (P.events.length) go(0);
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,364 @@
+"""
+Background pre-rendering of traversal animations.
+
+Stepping through a trace renders each frame when the user clicks, so every
+click waits for matplotlib. A TracePrerenderer renders the frames ahead of
+time in a pool of worker processes and keeps them as PNGs in a bounded
+cache around the step being viewed; navigation then serves a ready image.
+The same pool exports the whole animation as a GIF or MP4.
+
+All prerenderers of the process, across every session, share one pool of
+at most MAX_RENDER_WORKERS processes, so the number of render processes
+stays bounded however many users press Run.
+"""
+import os
+import pickle
+import shutil
+import subprocess
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from io import BytesIO
+
+from PIL import Image
+
+from graph_index import graph_version, node_index
+from graph_utils import node_colors_for_index
+from renderer import StepRenderer, step_title
+from traces import StepTrace
+
+MAX_RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+# Scenes a worker keeps renderers for, most recently used last
+WORKER_SCENES = 4
+
+# Worker pool shared by all prerenderers of this process, started on first use
+_pool = None
+_pool_lock = threading.Lock()
+
+# Renderers of the current worker process, keyed by scene file
+_worker_renderers = OrderedDict()
+
+
+class TracePrerenderer:
+    """
+    Render the frames of a step trace in the background
+
+    A coordinator thread walks the trace a chunk at a time and submits chunks
+    of frames to a process pool as soon as their steps exist, so a lazy trace
+    is only recorded as far as the cached window reaches; `total` is set once
+    the trace is exhausted. Until then frames are titled with the steps
+    recorded so far, and they are rendered again once the count is known. The graph, layout and render options are pickled once into
+    a scene file; each worker loads it on its first chunk and keeps the
+    StepRenderer, so the artists are built once per worker. Frames use the
+    same render options and titles as frames rendered directly with
+    get_step_renderer and step_title. Finished PNGs are cached for a window of
+    `max_frames` steps around the step last requested through frame(), and
+    frames outside that window are evicted, so memory stays bounded however
+    long the trace is.
+
+    The trace is read only by the coordinator (and by the exports, under a
+    lock), so it must not be shared with other threads: pass a fresh one.
+    The node order is taken from G on construction, so later edits of G by
+    other threads do not reach the frames.
+    """
+
+    def __init__(self, G, pos, steps, algorithm, max_frames=256, chunk_size=8, figsize=(8, 6), rasterize=None):
+        self.version = graph_version(G)
+        self.pos = pos
+        self.rasterize = rasterize
+        self.algorithm = algorithm
+        self.max_frames = max_frames
+        self.chunk_size = chunk_size
+        self.total = None
+        self.error = None
+
+        self._index = node_index(G)[1]  # Never modified, see node_index
+        self._steps = steps
+        self._available = 0  # Steps recorded so far
+        self._provisional = set()  # Cached frames titled before the step count was known
+        self._trace_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._frames = OrderedDict()  # step index -> PNG bytes
+        self._pending = set()
+        self._futures = set()
+        self._focus = 0
+        self._closed = False
+
+        descriptor, self._scene = tempfile.mkstemp(prefix="prerender-", suffix=".pickle")
+        with os.fdopen(descriptor, "wb") as f:
+            pickle.dump((G, pos, {'figsize': figsize, 'rasterize': rasterize}), f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remove_scene = weakref.finalize(self, _remove_file, self._scene)
+
+        self._max_in_flight = 2 * MAX_RENDER_WORKERS
+        self._in_flight = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # Queries
+
+    def is_current(self, G, pos):
+        """Whether the frames still match this graph version and layout"""
+        return self.version == graph_version(G) and self.pos is pos
+
+    def frame(self, index):
+        """
+        Return the PNG of a step if it is ready, otherwise None
+
+        The cache window follows the requested step, so frames around it are
+        rendered next.
+        """
+        with self._condition:
+            if index != self._focus:
+                self._focus = index
+                self._evict()
+                self._condition.notify_all()
+            return self._frames.get(index)
+
+    @property
+    def ready(self):
+        """Number of frames currently cached"""
+        with self._condition:
+            return len(self._frames)
+
+    def close(self):
+        """Stop rendering and cancel the chunks still queued in the shared pool"""
+        with self._condition:
+            self._closed = True
+            futures = list(self._futures)
+            self._condition.notify_all()
+        for future in futures:
+            future.cancel()
+        self._remove_scene()
+
+    # Export
+
+    def export_gif(self, fps=4, max_steps=None):
+        """
+        Render the whole trace as an animated GIF
+
+        Parameters:
+        - fps: Frames per second of the animation
+        - max_steps: Optional limit on the number of steps included
+
+        Returns:
+        - GIF bytes
+        """
+        images = [Image.open(BytesIO(png)).convert('RGB') for png in self._render_all(max_steps)]
+        if not images:
+            raise ValueError("The trace has no steps to export")
+        buffer = BytesIO()
+        images[0].save(buffer, format='GIF', save_all=True, append_images=images[1:],
+                       duration=int(1000 / fps), loop=0)
+        return buffer.getvalue()
+
+    def export_mp4(self, fps=4, max_steps=None):
+        """
+        Render the whole trace as an H.264 MP4 video
+
+        Requires the ffmpeg executable; raises RuntimeError if it is missing.
+
+        Returns:
+        - MP4 bytes
+        """
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg is required for MP4 export")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "animation.mp4")
+            command = [ffmpeg, "-y", "-loglevel", "error", "-f", "image2pipe", "-framerate", str(fps),
+                       "-i", "-", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", path]
+            with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+                for png in self._render_all(max_steps):
+                    process.stdin.write(png)
+                process.stdin.close()
+            if process.returncode != 0:
+                raise RuntimeError(f"ffmpeg exited with status {process.returncode}")
+            with open(path, "rb") as f:
+                return f.read()
+
+    def _render_all(self, max_steps):
+        """Yield the PNG of every step in order, reusing cached frames"""
+        with self._trace_lock:
+            total = len(self._steps)
+        self._recorded(total, True)
+        if max_steps is not None:
+            total = min(total, max_steps)
+
+        chunks = [list(range(i, min(i + self.chunk_size, total))) for i in range(0, total, self.chunk_size)]
+        for chunk in chunks:
+            with self._condition:
+                cached = [self._frames.get(i) for i in chunk]
+            if all(png is not None for png in cached):
+                yield from cached
+            else:
+                specs, _ = self._frame_specs(chunk)
+                yield from _submit(_render_frames, self._scene, specs).result()
+
+    # Coordinator
+
+    def _run(self):
+        try:
+            while True:
+                with self._condition:
+                    batch = self._next_batch()
+                    while batch is None and not self._needs_steps() and not self._closed:
+                        self._condition.wait()
+                        batch = self._next_batch()
+                    if self._closed:
+                        return
+                    if batch is not None:
+                        self._pending.update(batch)
+                        self._in_flight += 1
+
+                if batch is None:
+                    # The window reaches past the recorded steps
+                    self._extend(self._available + self.chunk_size)
+                    continue
+
+                specs, provisional = self._frame_specs(batch)
+                future = _submit(_render_frames, self._scene, specs)
+                with self._condition:
+                    self._futures.add(future)
+                future.add_done_callback(partial(self._store, batch, provisional))
+        except Exception as e:  # Surfaced through .error; the UI falls back to direct rendering
+            with self._condition:
+                self.error = e
+                self._closed = True
+
+    def _extend(self, count):
+        """Record the trace up to count steps"""
+        with self._trace_lock:
+            if isinstance(self._steps, StepTrace):
+                self._steps.extend_to(count - 1)
+                available, finished = self._steps.available, self._steps.finished
+            else:
+                available, finished = len(self._steps), True
+        self._recorded(available, finished)
+
+    def _recorded(self, available, finished):
+        """Note the steps recorded so far; once the trace is exhausted, set total and drop provisional frames"""
+        with self._condition:
+            self._available = max(self._available, available)
+            if finished and self.total is None:
+                self.total = self._available
+                for index in self._provisional:
+                    self._frames.pop(index, None)
+                self._provisional.clear()
+                self._evict()
+            self._condition.notify_all()
+
+    def _window(self):
+        """Steps [start, end) to keep around the focus; before total is known, end may lie past the trace"""
+        if self.total is None:
+            start = max(0, self._focus - self.max_frames // 4)
+            return start, start + self.max_frames
+        start = max(0, min(self._focus - self.max_frames // 4, self.total - self.max_frames))
+        return start, min(self.total, start + self.max_frames)
+
+    def _needs_steps(self):
+        return self.total is None and self._window()[1] > self._available
+
+    def _next_batch(self):
+        """Missing recorded steps to render next, from the focus onward, then the ones before it"""
+        if self._in_flight >= self._max_in_flight:
+            return None
+        start, end = self._window()
+        end = min(end, self._available)
+        focus = min(max(self._focus, start), end)
+        batch = []
+        for index in [*range(focus, end), *range(focus - 1, start - 1, -1)]:
+            if index not in self._frames and index not in self._pending:
+                batch.append(index)
+                if len(batch) == self.chunk_size:
+                    break
+        return sorted(batch) or None
+
+    def _store(self, batch, provisional, future):
+        with self._condition:
+            self._pending.difference_update(batch)
+            self._futures.discard(future)
+            self._in_flight -= 1
+            if not future.cancelled():
+                if future.exception() is not None:
+                    self.error = future.exception()
+                    self._closed = True
+                elif not (provisional and self.total is not None):  # Titles made stale by the step count are dropped
+                    self._frames.update(zip(batch, future.result()))
+                    if provisional:
+                        self._provisional.update(batch)
+                    self._evict()
+            self._condition.notify_all()
+
+    def _evict(self):
+        start, end = self._window()
+        for index in [i for i in self._frames if not start <= i < end]:
+            del self._frames[index]
+            self._provisional.discard(index)
+
+    def _frame_specs(self, indices):
+        """
+        Node colors, highlighted edges and title of each step
+
+        Returns:
+        - List of specs, and whether their titles were made before the step count was known
+        """
+        with self._condition:
+            total, available = self.total, self._available
+        specs = []
+        with self._trace_lock:
+            for index in indices:
+                step = self._steps[index]
+                colors = node_colors_for_index(self._index, visited=step.get('visited', []), current=step.get('current'))
+                if total is not None:
+                    title = step_title(self.algorithm, index, total)
+                else:
+                    title = step_title(self.algorithm, index, available, more=True)
+                specs.append((colors, step.get('edges', []), title))
+        return specs, total is None
+
+
+def _submit(function, *args):
+    """Submit a task to the shared render pool, starting a new pool if a worker died"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_RENDER_WORKERS)
+        try:
+            return _pool.submit(function, *args)
+        except BrokenProcessPool:
+            _pool = ProcessPoolExecutor(max_workers=MAX_RENDER_WORKERS)
+            return _pool.submit(function, *args)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _worker_renderer(scene):
+    """Return this worker's renderer for a scene file, building it on first use"""
+    renderer = _worker_renderers.get(scene)
+    if renderer is None:
+        with open(scene, "rb") as f:
+            G, pos, options = pickle.load(f)
+        renderer = StepRenderer(G, pos, **options)
+        _worker_renderers[scene] = renderer
+        if len(_worker_renderers) > WORKER_SCENES:
+            _worker_renderers.popitem(last=False)
+    else:
+        _worker_renderers.move_to_end(scene)
+    return renderer
+
+
+def _render_frames(scene, specs):
+    """Render a chunk of (node colors, highlighted edges, title) frames to PNG bytes"""
+    renderer = _worker_renderer(scene)
+    return [renderer.render(colors, edges, title) for colors, edges, title in specs]
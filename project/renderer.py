@@ -0,0 +1,210 @@
+"""
+Reusable matplotlib renderer for stepping through algorithm traces.
+
+visualize_graph builds a new figure for every step, redrawing every node,
+edge and label. On large graphs that dominates the time per click. A
+StepRenderer builds the node scatter, the edge LineCollection and the labels
+once per graph and layout; each step only updates the node colors, the
+highlighted-edge overlay and the title.
+"""
+import time
+import weakref
+from collections import deque
+from io import BytesIO
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.colors import to_rgba_array
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.patches import FancyArrowPatch
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
+from PIL import Image
+
+from graph_index import graph_version
+import lod as lod_settings
+
+DEFAULT_NODE_COLOR = '#1f78b4'
+
+# One renderer per graph, rebuilt when the graph or its layout changes
+_renderers = weakref.WeakKeyDictionary()
+
+
+class StepRenderer:
+    """
+    Figure whose artists are built once and updated for each step
+
+    The styling matches visualize_graph: the same node size, colors, edge
+    widths and label font. Highlighted edges are drawn as a red overlay on
+    top of the regular edges; on directed graphs they also get arrowheads,
+    which are kept in a pool and reused across steps.
+
+    Labels never change, so they are converted to glyph outlines once and
+    drawn as a single PathCollection instead of one Text artist per node,
+    whose layout would be recomputed on every frame.
+
+    With lod, large graphs get the same level of detail as visualize_graph:
+    smaller nodes without labels, a sample of the edges, or a density image
+    of all edges when rasterized.
+
+    The figure is not registered with pyplot, so it is never closed by
+    plt.close() and is freed with the renderer.
+    """
+
+    def __init__(self, G, pos, figsize=(8, 6), fps_window=30, lod=True, rasterize=None):
+        self.version = graph_version(G)
+        self.pos = pos
+        self.rasterize = rasterize
+        self.directed = G.is_directed()
+        self.nodes = list(G.nodes())
+        self._frame_times = deque(maxlen=fps_window)
+
+        self.figure = Figure(figsize=figsize)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.ax.axis('off')
+
+        num_nodes = len(self.nodes)
+        detailed = not lod or lod_settings.show_labels(num_nodes)
+        coords = np.array([pos[node] for node in self.nodes], dtype=float).reshape(-1, 2)
+        self.nodes_artist = self.ax.scatter(
+            coords[:, 0], coords[:, 1],
+            s=lod_settings.node_size(num_nodes) if lod else 500,
+            c=DEFAULT_NODE_COLOR,
+            alpha=0.8,
+            edgecolors='black',
+            linewidths=1.0 if detailed else 0.3,
+            zorder=2
+        )
+
+        # Regular edges: all of them, a sample, or a density image
+        segments = np.array([(pos[u], pos[v]) for u, v in G.edges()], dtype=float).reshape(-1, 2, 2)
+        self._edge_alpha = 0.7
+        if lod and lod_settings.should_rasterize(len(segments), rasterize):
+            extent = lod_settings.layout_extent(coords)
+            self.edges_artist = self.ax.imshow(lod_settings.rasterize_segments(segments, extent), extent=extent,
+                                               origin='upper', interpolation='nearest', zorder=1)
+            self.ax.set_aspect('auto')
+            self._edge_alpha = None
+        else:
+            if lod:
+                segments, self._edge_alpha = lod_settings.sample_edges(segments, self._edge_alpha)
+            self.edges_artist = LineCollection(segments, colors='gray', linewidths=1.5,
+                                               alpha=self._edge_alpha, zorder=1)
+            self.ax.add_collection(self.edges_artist)
+
+        self.highlight_artist = LineCollection([], colors='red', linewidths=2.5, alpha=1.0, zorder=1.5)
+        self.ax.add_collection(self.highlight_artist)
+        self._arrows = []
+
+        self.labels_artist = None
+        if detailed:
+            self.labels_artist = self._label_collection(coords, FontProperties(size=14, weight='bold'))
+            self.ax.add_collection(self.labels_artist)
+
+        # A placeholder title makes tight_layout leave room for the real ones
+        self.title_artist = self.ax.set_title(" ", fontsize=16)
+        self.ax.margins(0.08)
+        self.ax.autoscale_view()
+        self.figure.tight_layout()
+
+    def is_current(self, G, pos):
+        """Whether the renderer still matches this graph version and layout"""
+        return self.version == graph_version(G) and self.pos is pos
+
+    def render(self, node_colors=None, highlighted_edges=None, title=None, compress_level=1):
+        """
+        Update the artists for one step and encode the frame as PNG
+
+        Parameters:
+        - node_colors: Colors in G.nodes() order, as returned by get_node_colors
+        - highlighted_edges: List of (u, v) edges to draw in red
+        - title: Figure title
+        - compress_level: zlib level of the PNG; low levels trade size for speed
+
+        Returns:
+        - PNG bytes, ready for st.image
+        """
+        start = time.perf_counter()
+
+        if node_colors is None:
+            node_colors = [DEFAULT_NODE_COLOR] * len(self.nodes)
+        self.nodes_artist.set_facecolors(to_rgba_array(node_colors))
+
+        segments = np.array([(self.pos[u], self.pos[v]) for u, v in highlighted_edges or ()],
+                            dtype=float).reshape(-1, 2, 2)
+        self.highlight_artist.set_segments(segments)
+        if self._edge_alpha is not None:
+            # Regular edges are dimmed while a step highlights some, as in visualize_graph
+            dimmed = highlighted_edges is not None
+            self.edges_artist.set_alpha(self._edge_alpha * (0.5 / 0.7) if dimmed else self._edge_alpha)
+        if self.directed:
+            self._update_arrows(segments)
+
+        self.title_artist.set_text(title or "")
+        self.canvas.draw()
+        buffer = BytesIO()
+        Image.fromarray(np.asarray(self.canvas.buffer_rgba())).save(buffer, format='png',
+                                                                     compress_level=compress_level)
+
+        self._frame_times.append(time.perf_counter() - start)
+        return buffer.getvalue()
+
+    @property
+    def fps(self):
+        """Frames per second over the most recent renders, or None before the first one"""
+        if not self._frame_times:
+            return None
+        return len(self._frame_times) / max(sum(self._frame_times), 1e-9)
+
+    def _label_collection(self, coords, font):
+        """Centered glyph outlines of every node label, sized in points"""
+        paths = []
+        for node in self.nodes:
+            path = TextPath((0, 0), str(node), prop=font)
+            extents = path.get_extents()
+            paths.append(path.transformed(Affine2D().translate(-(extents.x0 + extents.x1) / 2,
+                                                               -(extents.y0 + extents.y1) / 2)))
+        collection = PathCollection(paths, offsets=coords, offset_transform=self.ax.transData,
+                                    facecolors='white', edgecolors='none', zorder=3)
+        # Points to pixels, following the figure dpi
+        collection.set_transform(Affine2D().scale(1 / 72) + self.figure.dpi_scale_trans)
+        return collection
+
+    def _update_arrows(self, segments):
+        while len(self._arrows) < len(segments):
+            arrow = FancyArrowPatch((0, 0), (0, 0), arrowstyle='->', mutation_scale=20,
+                                    color='red', linewidth=2.5, shrinkA=0, shrinkB=12, zorder=1.5)
+            self.ax.add_patch(arrow)
+            self._arrows.append(arrow)
+        for i, arrow in enumerate(self._arrows):
+            if i < len(segments):
+                arrow.set_positions(segments[i][0], segments[i][1])
+            arrow.set_visible(i < len(segments))
+
+
+def step_title(algorithm, index, step_count, more=False):
+    """Title of the frame showing step index, out of step_count steps (more: the trace is still growing)"""
+    return f"{algorithm} Step {index + 1}/{step_count}{'+' if more else ''}"
+
+
+def get_step_renderer(G, pos, figsize=(8, 6), rasterize=None):
+    """
+    Return the StepRenderer for G, building it only when the graph or layout changed
+
+    Parameters:
+    - G: NetworkX graph
+    - pos: Node positions, usually from get_graph_layout (compared by identity)
+    - figsize: Figure size used when a new renderer is built
+    - rasterize: Draw edges as a density image (None: only for very large graphs)
+
+    Returns:
+    - StepRenderer for the current version of G
+    """
+    renderer = _renderers.get(G)
+    if renderer is None or not renderer.is_current(G, pos) or renderer.rasterize != rasterize:
+        renderer = StepRenderer(G, pos, figsize=figsize, rasterize=rasterize)
+        _renderers[G] = renderer
+    return renderer
@@ -0,0 +1,85 @@
+import random
+
+import networkx as nx
+import pytest
+
+from dynamic_bfs import DynamicBFS, get_dynamic_bfs
+from graph_utils import add_edge_to_graph, add_node_to_graph, remove_edge_from_graph, remove_node_from_graph
+
+
+def assert_matches_networkx(search, G):
+    expected = nx.single_source_shortest_path_length(G, search.source) if search.source in G else {}
+    assert search.distance == expected
+    assert search.reached() == len(expected)
+    for node in expected:
+        path = search.path_to(node)
+        assert path[0] == search.source and path[-1] == node
+        assert len(path) - 1 == expected[node]
+        assert all(G.has_edge(u, v) for u, v in zip(path, path[1:]))
+
+
+def random_edit(G, rng):
+    nodes = list(G.nodes())
+    kind = rng.random()
+    if kind < 0.45:
+        add_edge_to_graph(G, rng.choice(nodes), rng.choice(nodes))
+    elif kind < 0.9 and G.number_of_edges():
+        remove_edge_from_graph(G, *rng.choice(list(G.edges())))
+    elif kind < 0.95:
+        add_node_to_graph(G)
+    elif len(nodes) > 2:
+        remove_node_from_graph(G, rng.choice(nodes[1:]))  # Keep the source
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_match_networkx(directed, seed):
+    rng = random.Random(seed)
+    G = nx.gnm_random_graph(40, 60, seed=seed, directed=directed)
+    search = get_dynamic_bfs(G, 0)
+    for _ in range(200):
+        random_edit(G, rng)
+        assert get_dynamic_bfs(G, 0) is search
+        assert_matches_networkx(search, G)
+
+
+def test_removing_a_tree_edge_reattaches_or_repairs():
+    # Node 3 hangs below 1 and 2; cutting 1-3 re-attaches it, cutting 2-3 next repairs the subtree
+    G = nx.Graph([(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (4, 5), (0, 6), (6, 7), (7, 8), (8, 5)])
+    search = get_dynamic_bfs(G, 0)
+    for edge in [(1, 3), (2, 3), (0, 6)]:
+        remove_edge_from_graph(G, *edge)
+        assert_matches_networkx(search, G)
+
+
+def test_adding_an_edge_shortens_downstream_distances():
+    G = nx.path_graph(10)
+    search = get_dynamic_bfs(G, 0)
+    add_edge_to_graph(G, 0, 8)
+    assert_matches_networkx(search, G)
+    assert search.distance_to(9) == 2
+
+
+def test_direct_edits_trigger_a_rebuild():
+    G = nx.path_graph(6)
+    search = get_dynamic_bfs(G, 0)
+    G.add_edge(0, 5)
+    assert get_dynamic_bfs(G, 0) is search
+    assert_matches_networkx(search, G)
+
+
+def test_helper_edit_after_a_direct_edit_rebuilds():
+    G = nx.path_graph(6)
+    search = get_dynamic_bfs(G, 0)
+    G.add_edge(0, 5)
+    add_edge_to_graph(G, 2, 4)
+    assert_matches_networkx(search, G)
+    assert search.distance_to(5) == 1
+
+
+def test_removing_the_source():
+    G = nx.path_graph(4)
+    search = DynamicBFS(G, 2)
+    remove_node_from_graph(G, 2)
+    search.apply(G, ("remove_node", 2))
+    assert search.reached() == 0 and search.distance_to(3) is None
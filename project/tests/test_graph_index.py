@@ -0,0 +1,122 @@
+import gc
+import weakref
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithms import bfs_algorithm, dfs_algorithm
+from graph_index import (add_graph_listener, cached_csr, csr_from_edge_arrays, graph_version, mark_graph_changed,
+                         node_index, to_csr)
+from graph_utils import add_edge_to_graph, add_node_to_graph, remove_edge_from_graph, remove_node_from_graph
+
+
+def assert_same_adjacency(csr, G):
+    assert csr.number_of_nodes() == G.number_of_nodes()
+    assert csr.number_of_edges() == G.number_of_edges()
+    for node in G.nodes():
+        assert list(csr.neighbors(node)) == sorted(G.neighbors(node), key=list(G.nodes()).index)
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_to_csr_matches_networkx(directed):
+    G = nx.gnm_random_graph(50, 120, seed=5, directed=directed)
+    G.add_edge(3, 3)
+    assert_same_adjacency(to_csr(G), G)
+
+
+def test_csr_with_arbitrary_node_ids():
+    G = nx.Graph([("a", "b"), ("b", "c"), ("c", "a"), ("c", "d")])
+    csr = to_csr(G)
+    assert_same_adjacency(csr, G)
+    assert "d" in csr and "e" not in csr
+    assert csr.to_nodes([csr.index_of("c")]) == ["c"]
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_csr_from_edge_arrays_keeps_the_last_duplicate(directed):
+    src = np.array([0, 1, 0, 2, 2, 3])
+    dst = np.array([1, 0, 1, 2, 3, 2])
+    weights = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    csr = csr_from_edge_arrays(src, dst, ["a", "b", "c", "d"], directed=directed, weights=weights)
+
+    # Repeated add_edge calls keep the last weight, like the file readers promise
+    G = nx.DiGraph() if directed else nx.Graph()
+    G.add_nodes_from(["a", "b", "c", "d"])
+    for u, v, w in zip(src.tolist(), dst.tolist(), weights.tolist()):
+        G.add_edge("abcd"[u], "abcd"[v], weight=w)
+    assert_same_adjacency(csr, G)
+    for node in G.nodes():
+        assert dict(csr.weighted_neighbors(node)) == {v: data["weight"] for v, data in G[node].items()}
+
+
+def test_cached_csr_is_reused_until_an_edit():
+    G = nx.cycle_graph(8)
+    csr = cached_csr(G)
+    assert cached_csr(G) is csr
+    assert cached_csr(csr) is csr
+
+    add_edge_to_graph(G, 0, 4)
+    rebuilt = cached_csr(G)
+    assert rebuilt is not csr
+    assert_same_adjacency(rebuilt, G)
+
+
+@pytest.mark.parametrize("edit", [
+    lambda G: add_edge_to_graph(G, 0, 5),
+    lambda G: remove_edge_from_graph(G, 1, 2),
+    lambda G: add_node_to_graph(G),
+    lambda G: remove_node_from_graph(G, 3),
+    lambda G: G.add_edge(0, 5),
+    lambda G: G.remove_edge(1, 2),
+    lambda G: G.add_node(99),
+    lambda G: G.remove_node(3),
+])
+def test_every_edit_invalidates_the_cache(edit):
+    G = nx.path_graph(8)
+    before = graph_version(G)
+    nodes, _ = node_index(G)
+    cached_csr(G)
+
+    edit(G)
+    assert graph_version(G) != before
+    assert_same_adjacency(cached_csr(G), G)
+    assert node_index(G)[0] == list(G.nodes())
+    assert node_index(G)[0] is not nodes
+
+
+def test_weak_listeners_do_not_keep_their_object_alive():
+    class Watcher:
+        def __init__(self):
+            self.changes = []
+
+        def changed(self, G, change, previous):
+            self.changes.append(change)
+
+    G = nx.path_graph(3)
+    watcher = Watcher()
+    add_graph_listener(G, weakref.WeakMethod(watcher.changed))
+    add_edge_to_graph(G, 0, 2)
+    assert watcher.changes == [("add_edge", 0, 2)]
+
+    watcher = weakref.ref(watcher)
+    gc.collect()
+    assert watcher() is None
+    mark_graph_changed(G)  # Drops the dead listener
+
+
+def test_added_nodes_get_a_free_id_of_the_graph_type():
+    G = nx.Graph([(0, 1), (1, 3)])
+    add_node_to_graph(G)
+    assert sorted(G.nodes()) == [0, 1, 3, 4]
+
+    G = nx.Graph([("a", "3"), ("3", "b")])
+    add_node_to_graph(G)
+    assert sorted(G.nodes()) == ["3", "4", "a", "b"]
+
+
+@pytest.mark.parametrize("traversal", [dfs_algorithm, bfs_algorithm])
+def test_traversals_agree_on_csr(traversal):
+    G = nx.gnm_random_graph(40, 80, seed=2)
+    for step_nx, step_csr in zip(traversal(G, 0), traversal(cached_csr(G), 0), strict=True):
+        assert step_nx == step_csr
@@ -0,0 +1,41 @@
+import io
+import warnings
+
+import networkx as nx
+import pytest
+
+from graph_io import read_edge_list, read_graph, read_graphml, write_graph
+
+
+def test_comment_only_chunks_are_skipped_quietly():
+    data = b"# header\n# more\n0 1\n1 2\n# c\n# d\n\n2 3 \n"
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        csr = read_edge_list(io.BytesIO(data), chunk_size=2)
+    assert sorted(csr.neighbors(2)) == [1, 3]
+    assert csr.number_of_edges() == 3
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_graphml_round_trip(directed, tmp_path):
+    G = nx.gnm_random_graph(30, 60, seed=4, directed=directed)
+    for i, (u, v) in enumerate(G.edges()):
+        G[u][v]["weight"] = float(i % 5)
+    path = tmp_path / "graph.graphml"
+    write_graph(G, str(path))
+
+    H = read_graph(str(path))
+    assert H.is_directed() == directed
+    assert set(H.nodes()) == set(G.nodes())
+    assert {(u, v): d["weight"] for u, v, d in H.edges(data=True)} == \
+        {(u, v): d["weight"] for u, v, d in G.edges(data=True)}
+
+
+def test_graphml_written_by_networkx():
+    G = nx.path_graph(6)
+    buffer = io.BytesIO()
+    nx.write_graphml(G, buffer)
+    buffer.seek(0)
+    csr = read_graphml(buffer)
+    assert sorted(csr.neighbors(3)) == [2, 4]
+    assert csr.number_of_edges() == 5
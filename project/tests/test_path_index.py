@@ -0,0 +1,75 @@
+import networkx as nx
+import pytest
+
+from algorithms import calculate_shortest_path
+from graph_utils import add_edge_to_graph, add_node_to_graph, remove_edge_from_graph, remove_node_from_graph
+from path_index import ShortestPathIndex, get_path_index
+
+
+def assert_shortest_paths(G, path_of, sources):
+    """Check path_of(s, t) against NetworkX for every source and target"""
+    for source in sources:
+        expected = nx.single_source_shortest_path_length(G, source)
+        for target in G.nodes():
+            path = path_of(source, target)
+            if target not in expected:
+                assert path is None
+                continue
+            assert path[0] == source and path[-1] == target
+            assert len(path) - 1 == expected[target]
+            assert all(G.has_edge(u, v) for u, v in zip(path, path[1:]))
+
+
+def test_direct_edge_edits_are_noticed():
+    G = nx.path_graph(5)
+    assert calculate_shortest_path(G, 0, 4) == [0, 1, 2, 3, 4]
+
+    G.add_edge(0, 4)
+    assert calculate_shortest_path(G, 0, 4) == [0, 4]
+
+    G.remove_edge(1, 2)
+    G.remove_edge(0, 4)
+    assert calculate_shortest_path(G, 0, 4) is None
+
+
+def test_index_follows_helper_edits():
+    G = nx.gnm_random_graph(60, 90, seed=3)
+    edits = [
+        lambda: add_edge_to_graph(G, 0, 59),
+        lambda: remove_edge_from_graph(G, *next(iter(G.edges(0)))),
+        lambda: add_node_to_graph(G),
+        lambda: add_edge_to_graph(G, 60, 7),
+        lambda: remove_node_from_graph(G, 7),
+        lambda: add_edge_to_graph(G, 60, 59),
+    ]
+    for edit in edits:
+        get_path_index(G).shortest_path(0, 1)  # Warm the cache before every edit
+        edit()
+        assert_shortest_paths(G, lambda s, t: calculate_shortest_path(G, s, t), [0, 1, 59])
+
+
+def test_index_is_reused_until_the_graph_changes():
+    G = nx.cycle_graph(10)
+    index = get_path_index(G)
+    assert get_path_index(G) is index
+
+    add_edge_to_graph(G, 0, 5)
+    assert get_path_index(G) is not index
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_landmark_search_matches_networkx(directed):
+    G = nx.gnm_random_graph(300, 500, seed=11, directed=directed)
+    G.add_nodes_from(range(300, 305))  # Isolated nodes exercise the unreachable case
+    index = ShortestPathIndex(G, num_landmarks=4, landmark_threshold=0)
+    assert index._landmark_distance is not None
+    assert_shortest_paths(G, index.shortest_path, [0, 17, 150, 302])
+
+
+def test_landmark_bound_is_a_lower_bound():
+    G = nx.grid_2d_graph(15, 15)
+    index = ShortestPathIndex(G, num_landmarks=4, landmark_threshold=0)
+    lengths = dict(nx.all_pairs_shortest_path_length(G))
+    for source in [(0, 0), (7, 3), (14, 14)]:
+        for target in G.nodes():
+            assert index.lower_bound(source, target) <= lengths[source][target]
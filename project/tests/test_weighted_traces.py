@@ -0,0 +1,88 @@
+import itertools
+import random
+
+import networkx as nx
+import pytest
+
+from algorithms import dijkstra_algorithm, zero_one_bfs_algorithm
+from graph_index import to_csr
+
+
+def weighted_graph(seed, weights, directed=False):
+    rng = random.Random(seed)
+    G = nx.gnm_random_graph(40, 90, seed=seed, directed=directed)
+    for u, v in G.edges():
+        G[u][v]["weight"] = rng.choice(weights)
+    return G
+
+
+@pytest.mark.parametrize("search, weights", [(dijkstra_algorithm, [0, 1, 2, 7]), (zero_one_bfs_algorithm, [0, 1])])
+@pytest.mark.parametrize("directed", [False, True])
+def test_final_distances_match_networkx(search, weights, directed):
+    for seed in range(4):
+        G = weighted_graph(seed, weights, directed)
+        expected = nx.single_source_dijkstra_path_length(G, 0)
+        assert search(G, 0, record_steps=False)["distance"] == expected
+        assert search(to_csr(G, weight="weight"), 0, record_steps=False)["distance"] == expected
+        steps = search(G, 0)
+        assert steps[-1]["distances"] == expected
+        assert set(steps[-1]["visited"]) == set(expected)
+
+
+def replay_steps(trace):
+    """Rebuild the state after every event of an exported trace with a plain eager replay"""
+    exported = trace.export()
+    dijkstra = exported["algorithm"] == "Dijkstra"
+    visited, distances, frontier, steps = [], {}, [], []
+    pushes = itertools.count()
+    front, back = 0, 0
+    for kind, node, payload in exported["events"]:
+        if kind in ("skip", "visit"):
+            frontier.remove(min(frontier))
+        if kind == "visit":
+            visited.append(node)
+        entries = [(node, 0, 1)] if kind == "start" else payload if kind == "push" else []
+        for neighbor, distance, weight in entries:
+            if dijkstra:
+                key = (distance, next(pushes))
+            elif weight == 0:
+                front -= 1
+                key = front
+            else:
+                key, back = back, back + 1
+            frontier.append((key, neighbor))
+            distances[neighbor] = distance
+        steps.append({
+            "visited": list(visited),
+            "current": None if kind == "start" else node,
+            "queue": [neighbor for _, neighbor in sorted(frontier)],
+            "edges": [(node, neighbor) for neighbor, _, _ in payload] if kind == "push" else [],
+            "distances": dict(distances),
+        })
+    return steps
+
+
+@pytest.mark.parametrize("search, weights", [(dijkstra_algorithm, [1, 3, 4]), (zero_one_bfs_algorithm, [0, 1])])
+def test_compact_trace_rebuilds_every_step(search, weights):
+    G = weighted_graph(7, weights)
+    trace = search(G, 0, compact=True)
+    expected = replay_steps(trace)
+    assert len(trace) == len(expected)
+    assert [{key: step[key] for key in expected[0]} for step in search(G, 0)] == expected
+
+    # Random access moves the replay state back and forth
+    order = list(range(len(expected))) * 2
+    random.Random(0).shuffle(order)
+    for index in order:
+        step = trace[index]
+        assert {key: step[key] for key in expected[index]} == expected[index]
+
+
+def test_priority_queue_is_in_pop_order():
+    G = nx.Graph()
+    G.add_weighted_edges_from([(0, 1, 4), (0, 2, 1), (2, 1, 1), (1, 3, 1)])
+    steps = dijkstra_algorithm(G, 0)
+    pushes = [step for step in steps if step["edges"]]
+    assert pushes[0]["queue"] == [2, 1]
+    assert pushes[1]["queue"] == [1, 1]  # The outdated entry for node 1 stays until it is popped
+    assert steps[-1]["distances"] == {0: 0, 1: 2, 2: 1, 3: 3}
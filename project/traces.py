@@ -0,0 +1,449 @@
+"""
+Compact step traces for the DFS, BFS, Dijkstra and 0-1 BFS visualizations.
+
+The eager step lists copy the visited list and the stack/queue into every
+step, which costs O(V^2) memory on large graphs. A StepTrace stores each step
+as a small event instead and rebuilds the full step dictionary on demand.
+Traces can also be filled lazily from an event generator, so the first step
+is available before the traversal has finished.
+"""
+import bisect
+import heapq
+
+# Event kinds, one per recorded step
+START = "start"
+SKIP = "skip"
+VISIT = "visit"
+PUSH = "push"
+DONE = "done"
+
+
+class StepTrace:
+    """
+    Delta-encoded record of a DFS or BFS traversal
+
+    Each step is stored as an event (start, skip, visit, push, done). The
+    frontier is kept as a log of every node ever pushed:
+    - BFS: the queue is always the slice pushed[head:tail]
+    - DFS: each pushed cell remembers the cell below it, so the stack is
+      the chain of cells under the current top
+
+    The state after a step is therefore just three integers (visited count,
+    pushed count, head/top). That cursor is saved every
+    `checkpoint_interval` steps, and any step is rebuilt by replaying at most
+    `checkpoint_interval` events from the nearest checkpoint.
+
+    The trace behaves like the list returned by dfs_algorithm/bfs_algorithm:
+    len(trace), trace[k], slicing and iteration all yield the same step
+    dictionaries.
+
+    When built from an `events` generator, steps are only pulled from it as
+    they are requested. `available` and `finished` describe how much has
+    been recorded so far; len(trace) runs the traversal to completion.
+    """
+
+    def __init__(self, algorithm, events=None, checkpoint_interval=64):
+        self.algorithm = algorithm
+        self.frontier_key = "stack" if algorithm == "DFS" else "queue"
+        self.checkpoint_interval = checkpoint_interval
+        self._source = iter(events) if events is not None else None
+
+        self._events = []       # (kind, node, payload) for every step
+        self._order = []        # Nodes in the order they were visited
+        self._pushed = []       # Every node ever pushed, in push order
+        self._below = []        # DFS only: cell underneath each pushed cell
+        self._checkpoints = []  # Cursor after every checkpoint_interval steps
+        self._cursor = (0, 0, -1 if self.frontier_key == "stack" else 0)
+        self._last = None       # (index, cursor) of the most recently built step
+
+    # Recording
+
+    def start(self, start_node):
+        """Record the initial step, with start_node as the only frontier entry"""
+        self._push_nodes([start_node])
+        self._record((START, start_node, 1))
+
+    def skip(self, node):
+        """Record popping a node that had already been visited"""
+        self._record((SKIP, node, None))
+
+    def visit(self, node, neighbors):
+        """Record popping and visiting a node, along with its sorted neighbors"""
+        self._order.append(node)
+        self._record((VISIT, node, neighbors))
+
+    def push(self, node, neighbors):
+        """Record pushing the unvisited neighbors of node onto the frontier"""
+        self._push_nodes(neighbors)
+        self._record((PUSH, node, len(neighbors)))
+
+    def finish(self):
+        """Record the final step"""
+        self._record((DONE, None, None))
+
+    def record(self, event):
+        """Record a (kind, node, payload) event as produced by the traversal generators"""
+        kind, node, payload = event
+        if kind == START:
+            self.start(node)
+        elif kind == SKIP:
+            self.skip(node)
+        elif kind == VISIT:
+            self.visit(node, payload)
+        elif kind == PUSH:
+            self.push(node, payload)
+        else:
+            self.finish()
+
+    def _push_nodes(self, nodes):
+        if self.frontier_key == "stack":
+            top = self._cursor[2]
+            # Cells are allocated in push order, so each new cell sits on the previous one
+            for _ in nodes:
+                self._below.append(top)
+                top = len(self._below) - 1
+        self._pushed.extend(nodes)
+
+    def _record(self, event):
+        self._cursor = self._advance(self._cursor, event)
+        self._events.append(event)
+        if (len(self._events) - 1) % self.checkpoint_interval == 0:
+            self._checkpoints.append(self._cursor)
+
+    # Lazy filling
+
+    @property
+    def finished(self):
+        """True once the traversal has produced all of its steps"""
+        return self._source is None
+
+    @property
+    def available(self):
+        """Number of steps recorded so far"""
+        return len(self._events)
+
+    def extend_to(self, index):
+        """Pull events from the source until step index exists; return whether it does"""
+        while len(self._events) <= index and self._source is not None:
+            event = next(self._source, None)
+            if event is None:
+                self._source = None
+            else:
+                self.record(event)
+        return index < len(self._events)
+
+    def complete(self):
+        """Run the traversal to the end and return the trace"""
+        while self._source is not None:
+            self.extend_to(len(self._events))
+        return self
+
+    def export(self):
+        """
+        Return the complete trace as plain lists, e.g. for JSON
+
+        The events are returned as recorded, together with the push log, the
+        DFS cell links and the visit order, so a client can rebuild any step
+        by replaying the same cursor arithmetic as _advance.
+        """
+        self.complete()
+        return {
+            'algorithm': self.algorithm,
+            'frontier_key': self.frontier_key,
+            'events': [list(event) for event in self._events],
+            'pushed': list(self._pushed),
+            'below': list(self._below),
+            'order': list(self._order),
+        }
+
+    # Replay
+
+    def _advance(self, cursor, event):
+        """Apply one event to a (visited count, pushed count, head/top) cursor"""
+        visited_count, pushed_count, position = cursor
+        kind, _, payload = event
+        is_stack = self.frontier_key == "stack"
+
+        if kind in (SKIP, VISIT):
+            # Pop from the top of the stack or the front of the queue
+            position = self._below[position] if is_stack else position + 1
+            if kind == VISIT:
+                visited_count += 1
+        elif kind in (START, PUSH):
+            pushed_count += payload
+            if is_stack and payload:
+                position = pushed_count - 1
+
+        return visited_count, pushed_count, position
+
+    def _cursor_at(self, index):
+        """Rebuild the cursor after step index from the nearest checkpoint"""
+        checkpoint = index // self.checkpoint_interval
+        start, cursor = checkpoint * self.checkpoint_interval, self._checkpoints[checkpoint]
+
+        # Stepping forward resumes from the last built step when it is closer
+        if self._last is not None and start <= self._last[0] <= index:
+            start, cursor = self._last
+
+        for event in self._events[start + 1:index + 1]:
+            cursor = self._advance(cursor, event)
+        self._last = (index, cursor)
+        return cursor
+
+    def _frontier(self, cursor):
+        _, pushed_count, position = cursor
+        if self.frontier_key == "queue":
+            return self._pushed[position:pushed_count]
+
+        stack = []
+        while position != -1:
+            stack.append(self._pushed[position])
+            position = self._below[position]
+        stack.reverse()
+        return stack
+
+    def _build_step(self, index):
+        kind, node, payload = self._events[index]
+        cursor = self._cursor_at(index)
+        visited = self._order[:cursor[0]]
+        frontier = self._frontier(cursor) if kind != DONE else []
+        edges = []
+
+        if kind == START:
+            explanation = (f"Starting {self.algorithm} from node {node}. Initialize with an empty visited set "
+                           f"and add node {node} to the {self.frontier_key}.")
+            node = None
+        elif kind == SKIP:
+            explanation = (f"Node {node} has already been visited, so we skip it and move to the next node "
+                           f"in the {self.frontier_key}.")
+        elif kind == VISIT:
+            explanation = f"Visit node {node} and mark it as visited. Examine its neighbors: {payload}."
+        elif kind == PUSH:
+            pushed_count = cursor[1]
+            edges = [(node, neighbor) for neighbor in self._pushed[pushed_count - payload:pushed_count]]
+            explanation = (f"Add unvisited neighbors {[n for _, n in edges]} to the {self.frontier_key} "
+                           f"for later processing.")
+        else:  # DONE
+            explanation = (f"{self.algorithm} complete. All reachable nodes have been visited in this order: "
+                           f"{visited}.")
+
+        return {
+            'visited': visited,
+            'current': node,
+            self.frontier_key: frontier,
+            'edges': edges,
+            'explanation': explanation
+        }
+
+    # Sequence interface
+
+    def __len__(self):
+        return len(self.complete()._events)
+
+    def __bool__(self):
+        return self.extend_to(0)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or not self.extend_to(index):
+            raise IndexError("step index out of range")
+        return self._build_step(index)
+
+    def __iter__(self):
+        index = 0
+        while self.extend_to(index):
+            yield self._build_step(index)
+            index += 1
+
+
+class WeightedStepTrace(StepTrace):
+    """
+    Delta-encoded record of a Dijkstra or 0-1 BFS run
+
+    Both algorithms always pop the frontier entry with the smallest key:
+    (distance, push number) for Dijkstra's heap, and a deque position for
+    0-1 BFS, where 0-weight pushes count down from the front and 1-weight
+    pushes count up from the back. Every push is logged with its node,
+    distance and key, and every pop with the number of the push it removed,
+    so the state after a step is again a small cursor (visited count, pushed
+    count, popped count):
+    - distances: the pushed distances replayed in push order
+    - queue: the pushed entries not popped yet, sorted by key
+
+    The distances and the sorted live entries of the most recently built
+    step are kept, and moved to the next requested step by applying (or
+    undoing) only the events in between, so stepping through the trace in
+    either direction costs the size of the step rather than every push.
+
+    Events are (kind, node, payload) tuples: START, SKIP (pop an outdated
+    entry), VISIT (pop and settle node; payload is the (neighbor, weight)
+    list), PUSH (payload is a list of (neighbor, distance, weight) triples)
+    and DONE. Steps have the same dictionaries as the eager step lists,
+    including distances.
+    """
+
+    def __init__(self, algorithm, events=None, checkpoint_interval=64):
+        super().__init__(algorithm, events, checkpoint_interval)
+        self._cursor = (0, 0, 0)
+        self._distances = []  # Distance of every push, aligned with _pushed
+        self._keys = []       # Frontier order key of every push
+        self._popped = []     # Push number removed by every pop
+        self._previous = []   # Number of the previous push of the same node, or -1
+        self._latest = {}     # Node -> number of its latest push, while recording
+        self._heap = []       # Heap of (key, push number) while recording
+        self._front = 0       # 0-1 BFS: next deque positions at either end
+        self._back = 0
+        self._start = None
+        # Replay state: step index, cursor, distances and sorted live (key, push number) entries
+        self._replay = (-1, (0, 0, 0), {}, [])
+
+    # Recording
+
+    def record(self, event):
+        kind, node, payload = event
+        if kind == START:
+            self._start = node
+            self._push_entry(node, 0, 1)
+        elif kind in (SKIP, VISIT):
+            _, number = heapq.heappop(self._heap)
+            self._popped.append(number)
+            if kind == VISIT:
+                self._order.append(node)
+        elif kind == PUSH:
+            for neighbor, distance, weight in payload:
+                self._push_entry(neighbor, distance, weight)
+        self._record(event)
+
+    def _push_entry(self, node, distance, weight):
+        number = len(self._pushed)
+        if self.algorithm == "Dijkstra":
+            key = (distance, number)
+        elif weight == 0:
+            self._front -= 1
+            key = self._front
+        else:
+            key = self._back
+            self._back += 1
+        self._pushed.append(node)
+        self._distances.append(distance)
+        self._keys.append(key)
+        self._previous.append(self._latest.get(node, -1))
+        self._latest[node] = number
+        heapq.heappush(self._heap, (key, number))
+
+    def export(self):
+        """Return the complete trace as plain lists, with the push and pop logs"""
+        self.complete()
+        return {
+            'algorithm': self.algorithm,
+            'frontier_key': self.frontier_key,
+            'events': [list(event) for event in self._events],
+            'pushed': list(self._pushed),
+            'distances': list(self._distances),
+            'popped': list(self._popped),
+            'order': list(self._order),
+        }
+
+    # Replay
+
+    def _advance(self, cursor, event):
+        """Apply one event to a (visited count, pushed count, popped count) cursor"""
+        visited_count, pushed_count, popped_count = cursor
+        kind, _, payload = event
+        if kind == START:
+            pushed_count += 1
+        elif kind in (SKIP, VISIT):
+            popped_count += 1
+            if kind == VISIT:
+                visited_count += 1
+        elif kind == PUSH:
+            pushed_count += len(payload)
+        return visited_count, pushed_count, popped_count
+
+    def _replay_to(self, index):
+        """Move the replay state to step index, event by event, and return it"""
+        current, cursor, distances, live = self._replay
+        while current < index:
+            current += 1
+            cursor = self._apply(cursor, self._events[current], distances, live)
+        while current > index:
+            cursor = self._undo(cursor, self._events[current], distances, live)
+            current -= 1
+        self._replay = (current, cursor, distances, live)
+        return cursor, distances, live
+
+    def _apply(self, cursor, event, distances, live):
+        """Apply one event to the replay state and return the cursor after it"""
+        advanced = self._advance(cursor, event)
+        if event[0] in (SKIP, VISIT):
+            del live[0]  # Every pop removed the entry with the smallest key
+        for number in range(cursor[1], advanced[1]):
+            distances[self._pushed[number]] = self._distances[number]
+            bisect.insort(live, (self._keys[number], number))
+        return advanced
+
+    def _undo(self, cursor, event, distances, live):
+        """Take one event back out of the replay state and return the cursor before it"""
+        visited_count, pushed_count, popped_count = cursor
+        kind, _, payload = event
+        if kind in (SKIP, VISIT):
+            number = self._popped[popped_count - 1]
+            live.insert(0, (self._keys[number], number))
+            return visited_count - (kind == VISIT), pushed_count, popped_count - 1
+
+        count = 1 if kind == START else len(payload) if kind == PUSH else 0
+        for number in range(pushed_count - 1, pushed_count - count - 1, -1):
+            del live[bisect.bisect_left(live, (self._keys[number], number))]
+            previous = self._previous[number]
+            if previous < 0:
+                del distances[self._pushed[number]]
+            else:
+                distances[self._pushed[number]] = self._distances[previous]
+        return visited_count, pushed_count - count, popped_count
+
+    def _build_step(self, index):
+        kind, node, payload = self._events[index]
+        (visited_count, _, _), distances, live = self._replay_to(index)
+        visited = self._order[:visited_count]
+        distances = dict(distances)
+        queue = [self._pushed[number] for _, number in live]
+        edges = []
+        dijkstra = self.algorithm == "Dijkstra"
+
+        if kind == START:
+            if dijkstra:
+                explanation = (f"Starting Dijkstra's algorithm from node {self._start}. Its distance is 0 and every "
+                               f"other node starts at infinity.")
+            else:
+                explanation = (f"Starting 0-1 BFS from node {self._start}. Its distance is 0 and it is the only node "
+                               f"in the deque.")
+            node = None
+        elif kind == SKIP:
+            entry = "outdated queue entry" if dijkstra else "duplicate deque entry"
+            explanation = f"Node {node} was already settled with distance {distances[node]}, so this {entry} is skipped."
+        elif kind == VISIT:
+            explanation = f"Settle node {node} at distance {distances[node]}. Examine its neighbors and edge weights: {payload}."
+        elif kind == PUSH:
+            edges = [(node, neighbor) for neighbor, _, _ in payload]
+            updates = {neighbor: distances[neighbor] for _, neighbor in edges}
+            if dijkstra:
+                explanation = (f"Shorter paths found through node {node}: {updates}. Push these neighbors onto the "
+                               f"priority queue.")
+            else:
+                explanation = (f"Shorter paths found through node {node}: {updates}. 0-weight neighbors go to the "
+                               f"front of the deque, 1-weight neighbors to the back.")
+        else:  # DONE
+            name = "Dijkstra's algorithm" if dijkstra else "0-1 BFS"
+            explanation = f"{name} complete. Shortest distances from node {self._start}: {distances}."
+
+        return {
+            'visited': visited,
+            'current': node,
+            'queue': queue,
+            'edges': edges,
+            'distances': distances,
+            'explanation': explanation
+        }
@@ -1,14 +1,31 @@
+import os
 import streamlit as st
+import streamlit.components.v1 as components
 import numpy as np
 import matplotlib.pyplot as plt
 import networkx as nx
 from io import BytesIO
 import base64
 
-from graph_utils import create_sample_graph, visualize_graph, get_node_colors, add_node_to_graph, add_edge_to_graph
-from algorithms import dfs_algorithm, bfs_algorithm, get_algorithm_properties
-from llm_integration import get_explanation, get_hint, get_chat_response
+from graph_utils import (create_sample_graph, visualize_graph, get_node_colors, add_node_to_graph, add_edge_to_graph,
+                         get_graph_layout)
+from algorithms import dfs_trace, bfs_trace, get_algorithm_properties
+from llm_integration import explain_trace, llm_available, stream_explanation, stream_hint, stream_chat_response
 from tutorials import get_tutorial_content, get_exercise, get_algorithm_quiz, get_comparison_content
+from traces import StepTrace
+from graph_index import cached_csr
+from dynamic_bfs import get_dynamic_bfs
+from renderer import get_step_renderer, step_title
+from prerender import TracePrerenderer
+from playback import playback_html
+from graph_io import read_graph, write_graph
+from explanation_prefetch import ExplanationPrefetcher
+
+# Number of steps computed ahead of the current one for lazy traces
+STEP_LOOKAHEAD = 50
+
+# Steps explained by the "Explain the next steps" button, in batched requests
+BATCH_EXPLANATION_STEPS = 40
 
 def sidebar():
     """Create and manage the sidebar elements"""
@@ -23,6 +40,7 @@ def sidebar():
         st.session_state.algorithm = algorithm
         st.session_state.algorithm_steps = []
         st.session_state.current_step = 0
+        stop_frame_prerender()
     
     # User level selection
     user_level = st.sidebar.select_slider(
@@ -45,10 +63,39 @@ def sidebar():
             edge_probability=edge_probability,
             directed=directed
         )
+        stop_frame_prerender()
         st.session_state.algorithm_steps = []
         st.session_state.current_step = 0
         st.session_state.start_node = 0
     
+    # Import and export
+    with st.sidebar.expander("Import / Export Graph"):
+        uploaded = st.file_uploader(
+            "Edge list, GraphML or .npz",
+            type=["txt", "csv", "tsv", "edges", "edgelist", "graphml", "xml", "npz"]
+        )
+        import_directed = st.checkbox("Edge list is directed", value=False)
+        if uploaded is not None and st.button("Load Graph"):
+            try:
+                with st.spinner("Reading graph..."):
+                    graph = read_graph(uploaded, directed=import_directed)
+            except (ValueError, KeyError, SyntaxError) as e:
+                st.error(f"Could not read {uploaded.name}: {e}")
+            else:
+                stop_frame_prerender()
+                st.session_state.graph = graph
+                st.session_state.algorithm_steps = []
+                st.session_state.current_step = 0
+                st.session_state.start_node = next(iter(graph.nodes()), 0)
+                st.success(f"Loaded {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges")
+        
+        export_format = st.selectbox("Export format", ["edgelist", "graphml", "npz"])
+        if st.button("Export Graph"):
+            buffer = BytesIO()
+            write_graph(st.session_state.graph, buffer, file_format=export_format)
+            extension = {"edgelist": "txt", "graphml": "graphml", "npz": "npz"}[export_format]
+            st.download_button("Download Graph", buffer.getvalue(), file_name=f"graph.{extension}")
+    
     # Display algorithm properties
     st.sidebar.header("Algorithm Properties")
     properties = get_algorithm_properties()[algorithm]
@@ -109,15 +156,23 @@ def tutorial_ui():
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Get AI response
+        # Stream the AI response as it is generated
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = get_chat_response(st.session_state.messages, st.session_state.algorithm)
-                st.markdown(response)
+            response = stream_markdown(stream_chat_response(st.session_state.messages, st.session_state.algorithm))
         
         # Add AI response to chat history
         st.session_state.messages.append({"role": "assistant", "content": response})
 
+def stream_markdown(chunks):
+    """Render streamed text fragments as they arrive, with a cursor until the end; return the full text"""
+    placeholder = st.empty()
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        placeholder.markdown(text + "▌")
+    placeholder.markdown(text)
+    return text
+
 def practice_ui():
     """Display practice exercises"""
     st.header("Practice Exercises")
@@ -142,9 +197,12 @@ def practice_ui():
         for i in range(graph_def["nodes"]):
             G.add_node(i)
             
-        # Add edges
+        # Add edges, with weights for exercises on weighted graphs
+        weights = graph_def.get("weights", {})
         for edge in graph_def["edges"]:
             G.add_edge(edge[0], edge[1])
+            if f"({edge[0]},{edge[1]})" in weights:
+                G[edge[0]][edge[1]]["weight"] = weights[f"({edge[0]},{edge[1]})"]
         
         # Visualize
         plt_fig = visualize_graph(G, title="Exercise Graph")
@@ -170,10 +228,8 @@ def practice_ui():
                     st.write(exercise["explanation"])
                     
                 # Get personalized feedback using LLM
-                with st.spinner("Analyzing your answer..."):
-                    st.subheader("AI Analysis of Your Answer")
-                    hint = get_hint(f"Is this answer correct for the question: {exercise['question']}? The answer given is: {user_answer}. The correct answer is {exercise['answer']}.", st.session_state.algorithm, level)
-                    st.write(hint)
+                st.subheader("AI Analysis of Your Answer")
+                stream_markdown(stream_hint(f"Is this answer correct for the question: {exercise['question']}? The answer given is: {user_answer}. The correct answer is {exercise['answer']}.", st.session_state.algorithm, level))
             else:
                 st.info("No reference answer available for this exercise.")
     
@@ -218,23 +274,103 @@ def practice_ui():
             st.session_state.quiz_answered = False
             st.experimental_rerun()
 
+def navigable_step_count(steps):
+    """Number of steps that can be navigated to without finishing a lazy trace"""
+    if isinstance(steps, StepTrace) and not steps.finished:
+        return steps.available
+    return len(steps)
+
+def start_frame_prerender():
+    """Pre-render every step of the current algorithm run in the background"""
+    stop_frame_prerender()
+    graph = st.session_state.graph
+    trace_function = dfs_trace if st.session_state.algorithm == "DFS" else bfs_trace
+    # The prerenderer walks its own copy of the trace in a background thread
+    st.session_state.frame_prerenderer = TracePrerenderer(
+        graph,
+        get_graph_layout(graph),
+        trace_function(cached_csr(graph), st.session_state.start_node),
+        st.session_state.algorithm,
+        rasterize=rasterize_option()
+    )
+
+def rasterize_option():
+    """Rasterize setting of the step renderers: forced on by the checkbox, otherwise automatic"""
+    return True if st.session_state.get('rasterize_edges', False) else None
+
+def playback_component_html(trace):
+    """HTML of the browser playback component, built once per trace"""
+    cached = st.session_state.get('playback_cache')
+    if cached is None or cached[0] is not trace:
+        cached = (trace, playback_html(st.session_state.graph, trace.complete()))
+        st.session_state.playback_cache = cached
+    return cached[1]
+
+def stop_frame_prerender():
+    """Shut down the background renderer of the previous run, if any"""
+    prerenderer = st.session_state.get('frame_prerenderer')
+    if prerenderer is not None:
+        prerenderer.close()
+        st.session_state.frame_prerenderer = None
+
+def trace_survives_edge(graph, from_node, to_node):
+    """
+    Whether the current trace stays valid once the edge from_node -> to_node is added
+    
+    A traversal only follows edges out of nodes it reaches, so an edge
+    between nodes that are unreachable from the start node cannot change it.
+    Must be called before the edge is added.
+    """
+    reachable = get_dynamic_bfs(graph, st.session_state.start_node)
+    ends = (from_node,) if graph.is_directed() else (from_node, to_node)
+    return all(reachable.distance_to(node) is None for node in ends)
+
+def explanation_prefetcher():
+    """This session's explanation prefetcher, created on first use"""
+    if st.session_state.get('explanation_prefetcher') is None:
+        st.session_state.explanation_prefetcher = ExplanationPrefetcher()
+    return st.session_state.explanation_prefetcher
+
+def stop_explanation_prefetch():
+    """Cancel the explanation requests of the previous run, if any"""
+    prefetcher = st.session_state.get('explanation_prefetcher')
+    if prefetcher is not None:
+        prefetcher.cancel()
+
 def visualization_ui():
     """Display algorithm visualization"""
     st.header("Algorithm Visualization")
     
+    # Compute a few steps ahead so the slider and Next button have room
+    if isinstance(st.session_state.algorithm_steps, StepTrace):
+        st.session_state.algorithm_steps.extend_to(st.session_state.current_step + STEP_LOOKAHEAD)
+    
+    # In playback mode the browser steps through the trace on its own
+    playback_mode = (st.session_state.get('client_playback', False)
+                     and isinstance(st.session_state.algorithm_steps, StepTrace))
+    
     # Graph display
     col1, col2 = st.columns([2, 1])
     
     with col1:
+        # Artists are built once per graph and layout; each step only recolors them
+        pos = get_graph_layout(st.session_state.graph)
+        rasterize = rasterize_option()
+        renderer = get_step_renderer(st.session_state.graph, pos, rasterize=rasterize)
+        prerenderer = st.session_state.get('frame_prerenderer')
+        if prerenderer is not None and (not prerenderer.is_current(st.session_state.graph, pos)
+                                        or prerenderer.rasterize != rasterize):
+            stop_frame_prerender()
+            prerenderer = None
         if not st.session_state.algorithm_steps:
             # Regular graph visualization
-            plt_fig = visualize_graph(
-                st.session_state.graph, 
-                title=f"Graph Visualization"
-            )
-            st.pyplot(plt_fig)
-            plt.close()
+            st.image(renderer.render(title="Graph Visualization"))
+        elif playback_mode:
+            components.html(playback_component_html(st.session_state.algorithm_steps), height=820)
         else:
+            # Serve the pre-rendered frame when it is ready
+            frame = prerenderer.frame(st.session_state.current_step) if prerenderer is not None else None
+            
             # Show current step
             step = st.session_state.algorithm_steps[st.session_state.current_step]
             
@@ -248,15 +384,23 @@ def visualization_ui():
             # Highlight edges if any
             edges = step.get('edges', [])
             
-            # Visualize
-            plt_fig = visualize_graph(
-                st.session_state.graph,
-                node_colors=node_colors,
-                highlighted_edges=edges,
-                title=f"{st.session_state.algorithm} Step {st.session_state.current_step+1}/{len(st.session_state.algorithm_steps)}"
-            )
-            st.pyplot(plt_fig)
-            plt.close()
+            # Visualize; once the prerenderer knows the step count, titles use it like its frames do
+            if prerenderer is not None and prerenderer.total is not None:
+                step_count, more_steps = prerenderer.total, False
+            else:
+                step_count = navigable_step_count(st.session_state.algorithm_steps)
+                more_steps = not getattr(st.session_state.algorithm_steps, "finished", True)
+            if frame is None:
+                frame = renderer.render(
+                    node_colors=node_colors,
+                    highlighted_edges=edges,
+                    title=step_title(st.session_state.algorithm, st.session_state.current_step, step_count, more_steps)
+                )
+            st.image(frame)
+        if renderer.fps is not None and not playback_mode:
+            st.caption(f"Rendering at {renderer.fps:.1f} frames per second")
+        if prerenderer is not None and not playback_mode:
+            st.caption(f"{prerenderer.ready} frames pre-rendered")
     
     with col2:
         st.subheader("Algorithm Controls")
@@ -273,25 +417,54 @@ def visualization_ui():
             st.session_state.start_node = start_node
             st.session_state.algorithm_steps = []
             st.session_state.current_step = 0
+            stop_frame_prerender()
+            stop_explanation_prefetch()
+        
+        st.checkbox(
+            "Rasterize edges",
+            key="rasterize_edges",
+            help="Draw all edges as one density image; large graphs switch to it automatically"
+        )
+        st.checkbox(
+            "Play in browser",
+            key="client_playback",
+            help="Send the whole trace to the browser once and step through it there, without server reruns"
+        )
         
         # Run algorithm button
         if st.button(f"Run {st.session_state.algorithm}"):
+            # Frames of the previous run must not be served, even when this one plays in the browser
+            stop_frame_prerender()
             with st.spinner(f"Running {st.session_state.algorithm}..."):
                 if st.session_state.algorithm == "DFS":
-                    st.session_state.algorithm_steps = dfs_algorithm(
-                        st.session_state.graph, 
+                    st.session_state.algorithm_steps = dfs_trace(
+                        cached_csr(st.session_state.graph), 
                         st.session_state.start_node
                     )
                 else:  # BFS
-                    st.session_state.algorithm_steps = bfs_algorithm(
-                        st.session_state.graph,
+                    st.session_state.algorithm_steps = bfs_trace(
+                        cached_csr(st.session_state.graph),
                         st.session_state.start_node
                     )
+                st.session_state.algorithm_steps.extend_to(STEP_LOOKAHEAD)
                 st.session_state.current_step = 0
-                st.success(f"{st.session_state.algorithm} completed!")
+                if not st.session_state.get('client_playback', False):
+                    start_frame_prerender()
+                st.success(f"{st.session_state.algorithm} started!")
+        
+        # Export the pre-rendered animation
+        prerenderer = st.session_state.get('frame_prerenderer')
+        if prerenderer is not None and st.button("Export animation (GIF)"):
+            with st.spinner("Rendering animation..."):
+                st.download_button(
+                    "Download GIF",
+                    prerenderer.export_gif(),
+                    file_name=f"{st.session_state.algorithm.lower()}_animation.gif",
+                    mime="image/gif"
+                )
     
     # Step navigation
-    if st.session_state.algorithm_steps:
+    if st.session_state.algorithm_steps and not playback_mode:
         col1, col2, col3 = st.columns([1, 3, 1])
         
         with col1:
@@ -305,14 +478,14 @@ def visualization_ui():
             step = st.slider(
                 "Current Step",
                 0,
-                len(st.session_state.algorithm_steps) - 1,
+                navigable_step_count(st.session_state.algorithm_steps) - 1,
                 st.session_state.current_step
             )
             if step != st.session_state.current_step:
                 st.session_state.current_step = step
                 
         with col3:
-            if st.button("Next ▶️") and st.session_state.current_step < len(st.session_state.algorithm_steps) - 1:
+            if st.button("Next ▶️") and st.session_state.current_step < navigable_step_count(st.session_state.algorithm_steps) - 1:
                 st.session_state.current_step += 1
             if st.button("Last ⏭️"):
                 st.session_state.current_step = len(st.session_state.algorithm_steps) - 1
@@ -335,22 +508,38 @@ def visualization_ui():
         st.markdown(f"**Visited Nodes**: {current_step.get('visited', [])}")
         
         # Get detailed explanation from GPT if API key is provided
-        if "OPENAI_API_KEY" in st.secrets or "OPENAI_API_KEY" in os.environ:
+        if llm_available():
+            # Request this step and the next few in the background, cancelling stale requests
+            prefetcher = explanation_prefetcher()
+            prefetcher.schedule(
+                st.session_state.graph,
+                st.session_state.algorithm_steps,
+                st.session_state.current_step,
+                st.session_state.algorithm
+            )
             with st.expander("AI-Powered Explanation", expanded=True):
-                with st.spinner("Getting detailed explanation..."):
-                    explanation = get_explanation(
-                        st.session_state.algorithm,
-                        current_step
-                    )
+                explanation = prefetcher.result(st.session_state.algorithm, current_step)
+                if explanation is not None:
                     st.markdown(explanation)
+                else:
+                    stream_markdown(stream_explanation(st.session_state.algorithm, current_step))
+                
+                # Fill the explanation cache for the steps ahead with a few batched requests
+                if st.button(f"Explain the next {BATCH_EXPLANATION_STEPS} steps"):
+                    with st.spinner("Explaining upcoming steps..."):
+                        explained = explain_trace(
+                            st.session_state.algorithm,
+                            st.session_state.algorithm_steps,
+                            start=st.session_state.current_step + 1,
+                            end=st.session_state.current_step + 1 + BATCH_EXPLANATION_STEPS
+                        )
+                    st.success(f"{len(explained)} step explanations ready")
                     
         # Offer hint
         with st.expander("Need a hint?"):
             hint_question = st.text_input("Ask for a hint about this step")
             if hint_question:
-                with st.spinner("Generating hint..."):
-                    hint = get_hint(hint_question, st.session_state.algorithm)
-                    st.markdown(hint)
+                stream_markdown(stream_hint(hint_question, st.session_state.algorithm))
     
     # Graph editing tools
     st.header("Graph Editor")
@@ -360,10 +549,10 @@ def visualization_ui():
     with col1:
         st.subheader("Add Node/Edge")
         
-        # Add node
+        # Add node; a new node has no edges, so no traversal can reach it and the trace stays valid
         if st.button("Add Node"):
             st.session_state.graph = add_node_to_graph(st.session_state.graph)
-            st.session_state.algorithm_steps = []
+            st.session_state.playback_cache = None
             st.success(f"Node {len(st.session_state.graph.nodes())-1} added!")
             st.experimental_rerun()
         
@@ -376,8 +565,11 @@ def visualization_ui():
                 if st.session_state.graph.has_edge(edge_from, edge_to):
                     st.warning(f"Edge ({edge_from}, {edge_to}) already exists!")
                 else:
+                    keep_trace = trace_survives_edge(st.session_state.graph, edge_from, edge_to)
                     st.session_state.graph = add_edge_to_graph(st.session_state.graph, edge_from, edge_to)
-                    st.session_state.algorithm_steps = []
+                    st.session_state.playback_cache = None
+                    if not keep_trace:
+                        st.session_state.algorithm_steps = []
                     st.success(f"Edge ({edge_from}, {edge_to}) added!")
                     st.experimental_rerun()
             else:
@@ -389,12 +581,20 @@ def visualization_ui():
         st.markdown(f"**Nodes**: {len(st.session_state.graph.nodes())}")
         st.markdown(f"**Edges**: {len(st.session_state.graph.edges())}")
         
-        if nx.is_connected(st.session_state.graph):
+        # Distances from the start node are maintained incrementally across edits,
+        # so an undirected graph is connected exactly when they cover every node.
+        # Imported graphs can be directed, where weak connectivity still needs a full scan
+        start_distances = get_dynamic_bfs(st.session_state.graph, st.session_state.start_node)
+        if st.session_state.graph.is_directed():
+            connected = nx.is_weakly_connected(st.session_state.graph)
+        else:
+            connected = start_distances.reached() == st.session_state.graph.number_of_nodes()
+        if connected:
             st.success("Graph is connected")
         else:
             st.warning("Graph is not connected")
             
-        if nx.has_path(st.session_state.graph, st.session_state.start_node, list(st.session_state.graph.nodes())[-1]):
+        if start_distances.distance_to(list(st.session_state.graph.nodes())[-1]) is not None:
             st.success(f"Path exists from node {st.session_state.start_node} to node {list(st.session_state.graph.nodes())[-1]}")
         else:
             st.warning(f"No path from node {st.session_state.start_node} to node {list(st.session_state.graph.nodes())[-1]}")
\ No newline at end of file